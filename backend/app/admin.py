@@ -1,42 +1,132 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import func
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .database import get_db
-from .models import User, Region, AlertHistory, FloodPrediction
-from .schemas import RegionSummary, DashboardStats
+from .database import get_async_read_db, get_read_db
+from .models import Region, RegionCurrentRisk
+from .schemas import RegionSummary, RegionSummaryPage, DashboardStats
+from .scheduler import scheduler_stats
+from .stats import dashboard_stats
+from .services.region_geometry import choose_encoding, get_region_geometry, zoom_band
+from .services.region_resolver import get_region_resolver
 
 
 router = APIRouter()
 
 
-@router.get("/regions", response_model=list[RegionSummary])
-def list_regions(db: Session = Depends(get_db)):
-    regions = db.query(Region).limit(200).all()
-    items: list[RegionSummary] = []
-    for r in regions:
-        latest = db.query(FloodPrediction).filter(FloodPrediction.region_id == r.id).order_by(FloodPrediction.created_at.desc()).first()
-        items.append(RegionSummary(
-            id=r.id,
-            name=r.name,
-            state=r.state,
-            latest_risk_level=latest.risk_level if latest else None,
-            latest_risk_score=latest.risk_score if latest else None,
-        ))
-    return items
+def region_summaries(
+    db: Session,
+    cursor: Optional[int] = None,
+    limit: int = 200,
+    min_score: Optional[int] = None,
+) -> list[RegionSummary]:
+    """Return a page of regions with their current risk in one query.
 
+    Regions are paged by id (keyset pagination) and joined to the
+    ``region_current_risk`` projection, which holds one row per region, so
+    the cost depends on the page size rather than on how much prediction
+    history has accumulated.
 
-@router.get("/stats", response_model=DashboardStats)
-def basic_stats(db: Session = Depends(get_db)):
-    total_users = db.query(func.count(User.id)).scalar() or 0
-    total_regions = db.query(func.count(Region.id)).scalar() or 0
-    alerts_sent_24h = db.query(func.count(AlertHistory.id)).scalar() or 0
-    return DashboardStats(
-        total_users=total_users,
-        total_regions=total_regions,
-        alerts_sent_24h=alerts_sent_24h,
+    Args:
+        db: Database session.
+        cursor: Id of the last region on the previous page, if any.
+        limit: Maximum number of regions to return.
+        min_score: Only return regions whose current risk score is at least
+            this value (used to pick alert targets).
+
+    Returns:
+        Region summaries ordered by region id.
+    """
+    stmt = (
+        select(
+            Region.id,
+            Region.name,
+            Region.state,
+            RegionCurrentRisk.risk_level,
+            RegionCurrentRisk.risk_score,
+        )
+        .outerjoin(RegionCurrentRisk, RegionCurrentRisk.region_id == Region.id)
+        .order_by(Region.id)
+        .limit(limit)
     )
+    if cursor is not None:
+        stmt = stmt.where(Region.id > cursor)
+    if min_score is not None:
+        stmt = stmt.where(RegionCurrentRisk.risk_score >= min_score)
+
+    return [
+        RegionSummary(
+            id=row.id,
+            name=row.name,
+            state=row.state,
+            latest_risk_level=row.risk_level,
+            latest_risk_score=row.risk_score,
+        )
+        for row in db.execute(stmt)
+    ]
+
+
+@router.get("/regions", response_model=RegionSummaryPage)
+async def list_regions(
+    cursor: Optional[int] = None,
+    limit: int = Query(200, ge=1, le=500),
+    min_score: Optional[int] = Query(None, ge=0, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    items = await db.run_sync(region_summaries, cursor=cursor, limit=limit, min_score=min_score)
+    next_cursor = items[-1].id if len(items) == limit else None
+    return RegionSummaryPage(items=items, next_cursor=next_cursor)
+
 
+@router.get("/regions/geometry")
+def region_geometry(
+    request: Request,
+    zoom: int = Query(7, ge=0, le=22),
+    db: Session = Depends(get_read_db),
+):
+    """District boundaries simplified for ``zoom`` with each region's current risk.
 
+    Responses carry an ETag over the geometry and risk data, so unchanged
+    maps revalidate with a 304, and are brotli or gzip compressed when the
+    client accepts it.
+    """
+    geometry = get_region_geometry(get_region_resolver())
+    if geometry is None:
+        raise HTTPException(status_code=503, detail="Region geometry not loaded")
+
+    risks = {
+        row.region_id: (row.risk_level, row.risk_score)
+        for row in db.execute(
+            select(RegionCurrentRisk.region_id, RegionCurrentRisk.risk_level, RegionCurrentRisk.risk_score)
+        )
+    }
+    band = zoom_band(zoom)
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    headers = {"Cache-Control": "public, max-age=60", "Vary": "Accept-Encoding", "X-Zoom-Band": band.name}
+
+    etag = geometry.etag(band, risks)
+    if etag in {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}:
+        return Response(status_code=304, headers={**headers, "ETag": etag})
+
+    etag, body = geometry.body(band, risks, encoding)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/geo+json", headers={**headers, "ETag": etag})
+
+
+@router.get("/stats", response_model=DashboardStats)
+def basic_stats(db: Session = Depends(get_read_db)):
+    """Totals from the maintained counters and alerts over the last 24h, cached for a few seconds."""
+    return dashboard_stats(db)
 
 
+@router.get("/scheduler")
+def rescore_stats():
+    """Regions skipped (inputs unchanged) vs. re-computed by the re-scoring scheduler in this process."""
+    stats = scheduler_stats()
+    if stats is None:
+        raise HTTPException(status_code=404, detail="The re-scoring scheduler does not run in this process")
+    return stats
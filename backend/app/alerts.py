@@ -2,10 +2,12 @@ import os
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-from .database import get_db
-from .models import Alert, User
+from .database import get_db, get_read_db
+from .models import Alert, AlertHistory
 from .schemas import AlertCreate, AlertResponse
-from .auth import get_current_user
+from .auth import Principal, get_current_user
+from .dispatch import enqueue_alert_dispatch
+from .targeting import region_id_for_name
 from .services.sms_service import sms_service, whatsapp_service
 import logging
 
@@ -13,46 +15,48 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.post("/alerts/", response_model=AlertResponse)
-def create_alert(alert: AlertCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """Create a new alert and send notifications to users"""
+def create_alert(alert: AlertCreate, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
+    """Create a new alert and queue notifications to users in the region"""
     if current_user.role != "authority":
         raise HTTPException(status_code=403, detail="Only authorities can create alerts")
     
-    # Create alert in database
-    db_alert = Alert(**alert.dict())
+    # Create alert in database, targeted at the named region
+    db_alert = Alert(
+        **alert.dict(), region_id=region_id_for_name(db, alert.region), created_by=current_user.phone_number
+    )
     db.add(db_alert)
-    db.commit()
-    db.refresh(db_alert)
+    db.flush()
     
-    # Get all users in the affected region
-    users = db.query(User).filter(User.location.contains(alert.region)).all()
+    # Track delivery progress against the region when it is a known one
+    history = None
+    if db_alert.region_id is not None:
+        history = AlertHistory(
+            region_id=db_alert.region_id,
+            message=alert.message,
+            risk_level=alert.risk_level,
+            created_by=db_alert.created_by,
+        )
+        db.add(history)
+        db.flush()
     
-    # Send notifications based on user preferences
-    for user in users:
-        try:
-            message = f"FLOOD ALERT: {alert.message} - Risk Level: {alert.risk_level}"
-            
-            # Send SMS if user has opted in
-            if user.sms_alerts:
-                sms_service.send_sms(user.phone_number, message)
-            
-            # Send WhatsApp if user has opted in
-            if user.whatsapp_alerts:
-                whatsapp_service.send_whatsapp(user.phone_number, message)
-                
-        except Exception as e:
-            logger.error(f"Failed to send alert to user {user.id}: {e}")
+    # Notifications are sent by the dispatch workers; the job commits with the alert
+    enqueue_alert_dispatch(db, db_alert, history)
+    db.commit()
+    db.refresh(db_alert)
     
     return db_alert
 
 @router.get("/alerts/", response_model=List[AlertResponse])
-def get_alerts(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_alerts(db: Session = Depends(get_read_db), current_user: Principal = Depends(get_current_user)):
     """Get all alerts for the current user's region"""
-    alerts = db.query(Alert).filter(Alert.region.contains(current_user.location)).all()
+    region_id = current_user.region_id
+    if region_id is None:
+        return []
+    alerts = db.query(Alert).filter(Alert.region_id == region_id).order_by(Alert.created_at.desc()).limit(100).all()
     return alerts
 
 @router.post("/alerts/{alert_id}/confirm")
-def confirm_alert(alert_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def confirm_alert(alert_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     """Mark an alert as confirmed by the user"""
     alert = db.query(Alert).filter(Alert.id == alert_id).first()
     if not alert:
@@ -63,7 +67,7 @@ def confirm_alert(alert_id: int, db: Session = Depends(get_db), current_user: Us
     return {"message": "Alert confirmed successfully"}
 
 @router.post("/alerts/test-sms")
-def test_sms(phone_number: str, message: str = "Test SMS from AegisFlood", current_user: User = Depends(get_current_user)):
+def test_sms(phone_number: str, message: str = "Test SMS from AegisFlood", current_user: Principal = Depends(get_current_user)):
     """Test SMS functionality (for development)"""
     if current_user.role != "authority":
         raise HTTPException(status_code=403, detail="Only authorities can test SMS")
@@ -75,7 +79,7 @@ def test_sms(phone_number: str, message: str = "Test SMS from AegisFlood", curre
         raise HTTPException(status_code=500, detail="Failed to send test SMS")
 
 @router.post("/alerts/test-whatsapp")
-def test_whatsapp(phone_number: str, message: str = "Test WhatsApp from AegisFlood", current_user: User = Depends(get_current_user)):
+def test_whatsapp(phone_number: str, message: str = "Test WhatsApp from AegisFlood", current_user: Principal = Depends(get_current_user)):
     """Test WhatsApp functionality (for development)"""
     if current_user.role != "authority":
         raise HTTPException(status_code=403, detail="Only authorities can test WhatsApp")
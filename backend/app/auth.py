@@ -1,16 +1,21 @@
+import hashlib
 import os
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import NamedTuple, Optional
 from dotenv import load_dotenv
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
 
-from .database import get_db
+from .database import SessionLocal, get_db, read_session, wants_primary
 from .models import User
-from .schemas import RegisterRequest, VerifyRequest, TokenResponse, AdminLoginRequest
+from .schemas import RegisterRequest, VerifyRequest, TokenResponse, AdminLoginRequest, LocationUpdate
+from .services.auth_cache import ExpiringLRU
+from .stats import USERS, increment
+from .targeting import assign_user_region
 
 # Load environment variables
 load_dotenv()
@@ -24,6 +29,13 @@ if JWT_SECRET == "change_me":
     raise ValueError("JWT_SECRET must be set in environment variables for security")
 JWT_ALG = "HS256"
 JWT_EXPIRE_HOURS = int(os.getenv("JWT_EXPIRE_HOURS", "24"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_SECONDS = float(os.getenv("PROFILE_CACHE_SECONDS", "30"))
+
+# Verified claims by token hash, each kept until the token's own expiry
+token_cache = ExpiringLRU("verified_tokens", TOKEN_CACHE_SIZE)
+profile_cache = ExpiringLRU("user_profiles", PROFILE_CACHE_SIZE)
 
 
 def create_access_token(subject: str, role: str, expires_delta: Optional[timedelta] = None) -> str:
@@ -32,26 +44,136 @@ def create_access_token(subject: str, role: str, expires_delta: Optional[timedel
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALG)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+class UserProfile(NamedTuple):
+    id: int
+    region_id: Optional[int]
+    language: str
+    sms_alerts: bool
+    whatsapp_alerts: bool
+
+
+def load_profile(phone_number: str, primary: bool = False) -> Optional[UserProfile]:
+    """Profile fields of a user, cached for PROFILE_CACHE_SECONDS; None for admins and unknown users.
+
+    A cache miss reads from a replica like any other read, or from the
+    primary when ``primary`` is set (the caller just wrote).
+    """
+    profile = profile_cache.get(phone_number, profile_cache)
+    if profile is not profile_cache:
+        return profile
+    profile = None
+    if not phone_number.startswith("admin:"):
+        db = SessionLocal() if primary else read_session()
+        try:
+            row = db.query(
+                User.id, User.region_id, User.language, User.sms_alerts, User.whatsapp_alerts
+            ).filter(User.phone_number == phone_number).one_or_none()
+        finally:
+            db.close()
+        profile = UserProfile(*row) if row is not None else None
+    profile_cache.put(phone_number, profile, time.time() + PROFILE_CACHE_SECONDS)
+    return profile
+
+
+_UNLOADED = object()
+
+
+class Principal:
+    """Caller identified by a verified token.
+
+    ``phone_number`` and ``role`` come from the token itself; profile
+    fields such as ``region_id`` are loaded on first access, routed like
+    the request's own reads. Item access (``user["role"]``) is kept for
+    existing callers.
+    """
+
+    __slots__ = ("phone_number", "role", "_profile", "_primary")
+
+    def __init__(self, phone_number: str, role: str, primary: bool = False):
+        self.phone_number = phone_number
+        self.role = role
+        self._profile = _UNLOADED
+        self._primary = primary
+
+    def __getitem__(self, key: str):
+        if key not in ("phone_number", "role"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    @property
+    def profile(self) -> Optional[UserProfile]:
+        if self._profile is _UNLOADED:
+            self._profile = load_profile(self.phone_number, self._primary)
+        return self._profile
+
+    @property
+    def region_id(self) -> Optional[int]:
+        return self.profile.region_id if self.profile else None
+
+    @property
+    def language(self) -> str:
+        return self.profile.language if self.profile else "en"
+
+    @property
+    def sms_alerts(self) -> bool:
+        return bool(self.profile and self.profile.sms_alerts)
+
+    @property
+    def whatsapp_alerts(self) -> bool:
+        return bool(self.profile and self.profile.whatsapp_alerts)
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def verify_token(token: str) -> Optional[tuple]:
+    """Verify the JWT signature and expiry; ``(phone_number, role, exp)`` or None if invalid."""
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
-        phone = payload.get("sub")
-        role = payload.get("role")
-        if phone is None or role is None:
-            raise credentials_exception
-        return {"phone_number": phone, "role": role}
     except JWTError:
-        raise credentials_exception
+        return None
+    phone, role, exp = payload.get("sub"), payload.get("role"), payload.get("exp")
+    if phone is None or role is None:
+        return None
+    return phone, role, exp
+
+
+def cached_claims(token: str) -> Optional[tuple]:
+    """``verify_token`` through the token cache."""
+    key = _token_key(token)
+    claims = token_cache.get(key)
+    if claims is None:
+        claims = verify_token(token)
+        # Tokens without an expiry are verified every time rather than cached forever
+        if claims is not None and claims[2] is not None:
+            token_cache.put(key, claims, float(claims[2]))
+    return claims
+
+
+def token_subject(authorization: Optional[str]) -> Optional[str]:
+    """Subject of a valid ``Authorization: Bearer`` header value, or None."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    claims = cached_claims(token)
+    return claims[0] if claims is not None else None
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), request: Request = None) -> Principal:
+    claims = cached_claims(token)
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return Principal(claims[0], claims[1], wants_primary(request))
 
 
 def require_role(required_role: str):
-    def _role_checker(user=Depends(get_current_user)):
-        if user["role"] != required_role:
+    def _role_checker(user: Principal = Depends(get_current_user)):
+        if user.role != required_role:
             raise HTTPException(status_code=403, detail="Insufficient permissions")
         return user
 
@@ -72,8 +194,11 @@ def register(req: RegisterRequest, db: Session = Depends(get_db)):
         # For MVP, store location as name if no coordinates provided
         if req.location and not req.name:
             user.name = req.location
+        assign_user_region(db, user, req.lat, req.lon, req.location)
         db.add(user)
+        increment(db, USERS)
         db.commit()
+        profile_cache.invalidate(phone)
     # For MVP we mock OTP sending
     return {"otp_sent": True}
 
@@ -90,6 +215,19 @@ def verify(req: VerifyRequest, db: Session = Depends(get_db)):
     return TokenResponse(access_token=token, role=user.role)
 
 
+@router.put("/location")
+def update_location(req: LocationUpdate, db: Session = Depends(get_db), user: Principal = Depends(get_current_user)):
+    db_user = db.query(User).filter(User.phone_number == user.phone_number).one_or_none()
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if (req.lat is None) != (req.lon is None):
+        raise HTTPException(status_code=422, detail="lat and lon must be given together")
+    assign_user_region(db, db_user, req.lat, req.lon, req.location)
+    db.commit()
+    profile_cache.invalidate(db_user.phone_number)
+    return {"region_id": db_user.region_id}
+
+
 @router.post("/admin/login", response_model=TokenResponse)
 def admin_login(req: AdminLoginRequest):
     admin_user = os.getenv("ADMIN_USERNAME", "admin")
@@ -0,0 +1,207 @@
+import logging
+import os
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from .dispatch import enqueue_alert_dispatch
+from .models import Alert, AlertHistory, Region, RiskTransition
+
+logger = logging.getLogger(__name__)
+
+# Alert when a region's level rises to or past this one; "off" disables automatic alerts
+AUTO_ALERT_LEVEL = os.getenv('AUTO_ALERT_LEVEL', 'high')
+# No second alert for a region while one at or above AUTO_ALERT_LEVEL is this recent
+AUTO_ALERT_COOLDOWN_SECONDS = float(os.getenv('AUTO_ALERT_COOLDOWN_SECONDS', '21600'))
+# Transitions consumed per pass, and new region alerts per pass (the rest wait for the next one)
+AUTO_ALERT_BATCH_SIZE = int(os.getenv('AUTO_ALERT_BATCH_SIZE', '5000'))
+AUTO_ALERT_MAX_PER_PASS = int(os.getenv('AUTO_ALERT_MAX_PER_PASS', '100'))
+AUTO_ALERT_CREATOR = 'system:auto-alert'
+
+# Rule levels (low/medium/high) and assessment levels (minimal..critical) on one scale
+RISK_RANKS = {'minimal': 0, 'low': 1, 'medium': 2, 'moderate': 2, 'high': 3, 'critical': 4}
+
+
+def risk_rank(level: Optional[str]) -> int:
+    """Position of ``level`` on the common scale; -1 for no previous level."""
+    return RISK_RANKS.get(level, 0) if level is not None else -1
+
+
+class Trigger(NamedTuple):
+    transition_id: int
+    region_id: int
+    from_level: Optional[str]
+    to_level: str
+    to_score: int
+
+
+class RegionAlert(NamedTuple):
+    region_id: int
+    risk_level: str
+    risk_score: int
+    transition_ids: List[int]
+
+
+class AlertPlan(NamedTuple):
+    alerts: List[RegionAlert]
+    handled: List[int]  # transitions consumed, whether or not they led to an alert
+    coalesced: int
+    cooldown: int
+    no_crossing: int
+    deferred: int
+
+
+def plan_alerts(
+    triggers: Iterable[Trigger],
+    recently_alerted: Set[int],
+    threshold: str = AUTO_ALERT_LEVEL,
+    max_alerts: int = AUTO_ALERT_MAX_PER_PASS,
+) -> AlertPlan:
+    """Turn pending transitions into at most one alert per region.
+
+    A region alerts when one of its transitions crossed ``threshold``
+    upwards and it is still at or above it after the last one; a region
+    that flapped back below does not. Regions alerted within the cooldown
+    are skipped. When more regions qualify than ``max_alerts`` (a surge),
+    the highest scores go now and the rest stay pending for the next pass.
+    """
+    limit = RISK_RANKS[threshold]
+    by_region: "OrderedDict[int, List[Trigger]]" = OrderedDict()
+    for trigger in sorted(triggers, key=lambda t: t.transition_id):
+        by_region.setdefault(trigger.region_id, []).append(trigger)
+
+    candidates, handled = [], []
+    coalesced = cooldown = no_crossing = 0
+    for region_id, group in by_region.items():
+        ids = [trigger.transition_id for trigger in group]
+        latest = group[-1]
+        crossed = any(risk_rank(t.from_level) < limit <= risk_rank(t.to_level) for t in group)
+        if not crossed or risk_rank(latest.to_level) < limit:
+            no_crossing += 1
+            handled.extend(ids)
+        elif region_id in recently_alerted:
+            cooldown += 1
+            handled.extend(ids)
+        else:
+            coalesced += len(group) - 1
+            candidates.append(RegionAlert(region_id, latest.to_level, latest.to_score, ids))
+
+    candidates.sort(key=lambda alert: (-risk_rank(alert.risk_level), -alert.risk_score, alert.region_id))
+    alerts = candidates[:max_alerts]
+    for alert in alerts:
+        handled.extend(alert.transition_ids)
+    return AlertPlan(alerts, handled, coalesced, cooldown, no_crossing, len(candidates) - len(alerts))
+
+
+def alert_message(region_name: str, risk_level: str) -> str:
+    return f"Flood risk in {region_name} has risen to {risk_level}. Stay alert and follow official advisories."
+
+
+def _recently_alerted(db: Session, region_ids: Set[int], threshold: str) -> Set[int]:
+    """Regions with an alert (automatic or manual) at or above ``threshold`` inside the cooldown."""
+    rows = db.execute(
+        select(Alert.region_id, Alert.risk_level).where(
+            Alert.region_id.in_(region_ids),
+            Alert.created_at >= func.now() - timedelta(seconds=AUTO_ALERT_COOLDOWN_SECONDS),
+        )
+    ).all()
+    return {row.region_id for row in rows if risk_rank(row.risk_level) >= RISK_RANKS[threshold]}
+
+
+def run_auto_alerts(db: Session, threshold: str = AUTO_ALERT_LEVEL) -> Optional[Dict]:
+    """Consume pending risk transitions and raise alerts for regions that crossed ``threshold``.
+
+    Runs in one transaction: the alerts, their history rows, their dispatch
+    jobs and the consumed transitions commit together, so a transition is
+    never alerted twice or lost. Pending rows are claimed with SKIP LOCKED,
+    so concurrent passes never see the same transition. Dispatch jobs are
+    created in descending severity and the workers claim them in that order.
+
+    Returns:
+        Counts for the pass, or None when automatic alerts are off.
+    """
+    if threshold == 'off':
+        return None
+    triggers = [
+        Trigger(*row)
+        for row in db.execute(
+            select(
+                RiskTransition.id,
+                RiskTransition.region_id,
+                RiskTransition.from_level,
+                RiskTransition.to_level,
+                RiskTransition.to_score,
+            )
+            .where(RiskTransition.processed_at.is_(None))
+            .order_by(RiskTransition.id)
+            .limit(AUTO_ALERT_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+    ]
+    if not triggers:
+        db.rollback()
+        return {'transitions': 0, 'alerted': 0, 'coalesced': 0, 'cooldown': 0, 'no_crossing': 0, 'deferred': 0}
+
+    plan = plan_alerts(triggers, _recently_alerted(db, {t.region_id for t in triggers}, threshold), threshold)
+    names = dict(db.execute(
+        select(Region.id, Region.name).where(Region.id.in_([alert.region_id for alert in plan.alerts]))
+    ).all()) if plan.alerts else {}
+
+    alerts = [
+        Alert(
+            region=names.get(planned.region_id, str(planned.region_id)),
+            region_id=planned.region_id,
+            message=alert_message(names.get(planned.region_id, str(planned.region_id)), planned.risk_level),
+            risk_level=planned.risk_level,
+            created_by=AUTO_ALERT_CREATOR,
+        )
+        for planned in plan.alerts
+    ]
+    db.add_all(alerts)
+    db.flush()
+    histories = [
+        AlertHistory(
+            region_id=alert.region_id,
+            message=alert.message,
+            risk_level=alert.risk_level,
+            created_by=AUTO_ALERT_CREATOR,
+        )
+        for alert in alerts
+    ]
+    db.add_all(histories)
+    db.flush()
+    # Added (and so numbered) in severity order, which is the order workers claim them
+    for alert, history in zip(alerts, histories):
+        enqueue_alert_dispatch(db, alert, history)
+
+    db.execute(
+        update(RiskTransition).where(RiskTransition.id.in_(plan.handled)).values(processed_at=func.now())
+    )
+    alert_ids = {
+        transition_id: alert.id
+        for planned, alert in zip(plan.alerts, alerts)
+        for transition_id in planned.transition_ids
+    }
+    if alert_ids:
+        db.execute(update(RiskTransition), [{'id': tid, 'alert_id': aid} for tid, aid in alert_ids.items()])
+    db.commit()
+
+    report = {
+        'transitions': len(triggers),
+        'alerted': len(alerts),
+        'coalesced': plan.coalesced,
+        'cooldown': plan.cooldown,
+        'no_crossing': plan.no_crossing,
+        'deferred': plan.deferred,
+    }
+    if plan.deferred:
+        logger.warning(
+            f"Alert surge: {len(alerts) + plan.deferred} regions crossed {threshold}; "
+            f"alerted the {len(alerts)} most severe, {plan.deferred} wait for the next pass"
+        )
+    elif alerts:
+        logger.info(f"Raised {len(alerts)} automatic alerts ({plan.cooldown} regions in cooldown)")
+    return report
@@ -0,0 +1,358 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import Alert, AlertDelivery, AlertDispatchJob, AlertHistory, User
+from .services.sms_service import sms_service, whatsapp_service
+from .stats import record_alerts
+from .targeting import region_recipients
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_WORKERS = int(os.getenv('ALERT_DISPATCH_WORKERS', '1'))
+DISPATCH_BATCH_SIZE = int(os.getenv('ALERT_DISPATCH_BATCH_SIZE', '500'))
+DISPATCH_CONCURRENCY = int(os.getenv('ALERT_DISPATCH_CONCURRENCY', '32'))
+DISPATCH_SEND_RETRIES = int(os.getenv('ALERT_DISPATCH_SEND_RETRIES', '2'))
+DISPATCH_MAX_ATTEMPTS = int(os.getenv('ALERT_DISPATCH_MAX_ATTEMPTS', '5'))
+DISPATCH_BACKOFF_SECONDS = float(os.getenv('ALERT_DISPATCH_BACKOFF_SECONDS', '30'))
+DISPATCH_LEASE_SECONDS = int(os.getenv('ALERT_DISPATCH_LEASE_SECONDS', '120'))
+DISPATCH_POLL_SECONDS = float(os.getenv('ALERT_DISPATCH_POLL_SECONDS', '2'))
+PROVIDER_RATES = {
+    'sms': float(os.getenv('SMS_RATE_PER_SECOND', '50')),
+    'whatsapp': float(os.getenv('WHATSAPP_RATE_PER_SECOND', '20')),
+}
+
+
+def format_alert_message(message: str, risk_level: str) -> str:
+    return f"FLOOD ALERT: {message} - Risk Level: {risk_level}"
+
+
+def enqueue_alert_dispatch(db: Session, alert: Alert, alert_history: Optional[AlertHistory] = None) -> AlertDispatchJob:
+    """Persist a dispatch job for ``alert``; the caller commits.
+
+    Committing the job together with the alert means an accepted alert is
+    never lost, even if the process restarts before a worker picks it up.
+    """
+    job = AlertDispatchJob(
+        alert_id=alert.id,
+        alert_history_id=alert_history.id if alert_history else None,
+        region=alert.region,
+        region_id=alert.region_id,
+        message=format_alert_message(alert.message, alert.risk_level),
+    )
+    db.add(job)
+    return job
+
+
+class TokenBucket:
+    """Thread-safe token bucket enforcing a provider's messages-per-second limit."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Message(NamedTuple):
+    key: str
+    user_id: int
+    channel: str
+    phone_number: str
+
+
+class Outcome(NamedTuple):
+    ok: bool
+    attempts: int
+    error: Optional[str]
+
+
+class DeliverySender:
+    """Sends a batch of messages with bounded concurrency, rate limits and retries."""
+
+    def __init__(
+        self,
+        providers: Dict[str, Callable[[str, str], bool]],
+        rates: Dict[str, float],
+        concurrency: int = DISPATCH_CONCURRENCY,
+        retries: int = DISPATCH_SEND_RETRIES,
+        backoff: float = 0.5,
+    ):
+        self.providers = providers
+        self.buckets = {channel: TokenBucket(rate) for channel, rate in rates.items() if rate > 0}
+        self.retries = retries
+        self.backoff = backoff
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='alert-send')
+
+    def _send(self, message: Message, text: str) -> Outcome:
+        provider = self.providers[message.channel]
+        bucket = self.buckets.get(message.channel)
+        error = None
+        for attempt in range(1, self.retries + 2):
+            if bucket:
+                bucket.acquire()
+            try:
+                if provider(message.phone_number, text):
+                    return Outcome(True, attempt, None)
+                error = 'provider rejected message'
+            except Exception as e:
+                error = str(e)
+            if attempt <= self.retries:
+                time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+        return Outcome(False, self.retries + 1, error)
+
+    def send_all(self, messages: List[Message], text: str) -> Dict[str, Outcome]:
+        outcomes = self.executor.map(lambda m: self._send(m, text), messages)
+        return {message.key: outcome for message, outcome in zip(messages, outcomes)}
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+def default_sender() -> DeliverySender:
+    return DeliverySender(
+        providers={'sms': sms_service.send_sms, 'whatsapp': whatsapp_service.send_whatsapp},
+        rates=PROVIDER_RATES,
+    )
+
+
+class DispatchWorker(threading.Thread):
+    """Drains ``alert_dispatch_jobs``.
+
+    Jobs are claimed with ``FOR UPDATE SKIP LOCKED`` and held under a lease
+    that is renewed after every batch, so several workers (in one or many
+    processes) can share the queue and a crashed worker's job is resumed
+    from its cursor once the lease expires. Recipients are read in keyset
+    batches; every delivery is recorded under an idempotency key so a
+    resumed job does not message anyone twice. Failed deliveries are
+    retried in later passes with exponential backoff.
+    """
+
+    def __init__(self, sender: DeliverySender, session_factory=SessionLocal, name: Optional[str] = None):
+        super().__init__(name=name or 'alert-dispatch', daemon=True)
+        self.sender = sender
+        self.session_factory = session_factory
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{self.name}"
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                job_id = self.claim()
+                if job_id is None:
+                    self._stop_event.wait(DISPATCH_POLL_SECONDS)
+                    continue
+                self.process(job_id)
+            except Exception as e:
+                logger.error(f"Alert dispatch worker error: {e}")
+                self._stop_event.wait(DISPATCH_POLL_SECONDS)
+
+    def claim(self) -> Optional[int]:
+        """Lease the next due job, or return None if the queue is empty."""
+        with self.session_factory() as db:
+            job = db.scalars(
+                select(AlertDispatchJob)
+                .where(
+                    AlertDispatchJob.status.in_(('pending', 'running', 'retrying')),
+                    AlertDispatchJob.next_attempt_at <= func.now(),
+                    or_(AlertDispatchJob.locked_until.is_(None), AlertDispatchJob.locked_until < func.now()),
+                )
+                # Jobs enqueued together share next_attempt_at; id keeps their enqueue order
+                .order_by(AlertDispatchJob.next_attempt_at, AlertDispatchJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).first()
+            if job is None:
+                return None
+            if job.status == 'pending':
+                job.status = 'running'
+            job.attempts += 1
+            job.locked_by = self.worker_id
+            job.locked_until = func.now() + timedelta(seconds=DISPATCH_LEASE_SECONDS)
+            db.commit()
+            return job.id
+
+    def process(self, job_id: int) -> None:
+        with self.session_factory() as db:
+            job = db.get(AlertDispatchJob, job_id)
+            # Deliveries that fail during this claim wait for the next one
+            claimed_at = db.scalar(select(func.now()))
+            if job.status == 'running':
+                while not self._stop_event.is_set() and self._send_next_batch(db, job):
+                    pass
+            if job.status == 'retrying':
+                while not self._stop_event.is_set() and self._retry_next_batch(db, job, claimed_at):
+                    pass
+            if self._stop_event.is_set():
+                # Hand the job back; the next worker resumes from the cursor
+                job.locked_by = None
+                job.locked_until = None
+                db.commit()
+            else:
+                self._finish(db, job)
+
+    def _recipients(self, db: Session, job: AlertDispatchJob):
+        if job.region_id is None:
+            return []
+        return region_recipients(db, job.region_id, job.cursor, DISPATCH_BATCH_SIZE)
+
+    def _send_next_batch(self, db: Session, job: AlertDispatchJob) -> bool:
+        users = self._recipients(db, job)
+        if not users:
+            job.status = 'retrying' if job.failed_count else 'running'
+            return False
+
+        messages = []
+        for user in users:
+            for channel, enabled in (('sms', user.sms_alerts), ('whatsapp', user.whatsapp_alerts)):
+                if enabled:
+                    messages.append(Message(f"{job.id}:{user.id}:{channel}", user.id, channel, user.phone_number))
+        already_sent = set(db.scalars(
+            select(AlertDelivery.idempotency_key).where(
+                AlertDelivery.idempotency_key.in_([m.key for m in messages]),
+                AlertDelivery.status == 'sent',
+            )
+        ))
+        pending = [m for m in messages if m.key not in already_sent]
+        outcomes = self.sender.send_all(pending, job.message)
+        self._record(db, job, pending, outcomes)
+
+        sent = sum(1 for o in outcomes.values() if o.ok)
+        job.sent_count += sent
+        job.failed_count += len(outcomes) - sent
+        job.cursor = users[-1].id
+        self._checkpoint(db, job)
+        return True
+
+    def _retry_next_batch(self, db: Session, job: AlertDispatchJob, claimed_at: datetime) -> bool:
+        failed = db.execute(
+            select(AlertDelivery, User.phone_number)
+            .join(User, User.id == AlertDelivery.user_id)
+            .where(
+                AlertDelivery.job_id == job.id,
+                AlertDelivery.status == 'failed',
+                AlertDelivery.attempts < DISPATCH_MAX_ATTEMPTS * (self.sender.retries + 1),
+                AlertDelivery.updated_at < claimed_at,
+            )
+            .order_by(AlertDelivery.id)
+            .limit(DISPATCH_BATCH_SIZE)
+        ).all()
+        if not failed:
+            return False
+        messages = [
+            Message(delivery.idempotency_key, delivery.user_id, delivery.channel, phone_number)
+            for delivery, phone_number in failed
+        ]
+        outcomes = self.sender.send_all(messages, job.message)
+        self._record(db, job, messages, outcomes)
+
+        recovered = sum(1 for o in outcomes.values() if o.ok)
+        job.sent_count += recovered
+        job.failed_count -= recovered
+        self._checkpoint(db, job)
+        return True
+
+    def _record(self, db: Session, job: AlertDispatchJob, messages: List[Message], outcomes: Dict[str, Outcome]) -> None:
+        if not messages:
+            return
+        errors = [o.error for o in outcomes.values() if not o.ok]
+        if errors:
+            job.last_error = errors[-1]
+        stmt = insert(AlertDelivery).values([
+            {
+                'job_id': job.id,
+                'user_id': m.user_id,
+                'channel': m.channel,
+                'idempotency_key': m.key,
+                'status': 'sent' if outcomes[m.key].ok else 'failed',
+                'attempts': outcomes[m.key].attempts,
+                'last_error': outcomes[m.key].error,
+                'updated_at': func.now(),
+            }
+            for m in messages
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[AlertDelivery.idempotency_key],
+            set_={
+                'status': stmt.excluded.status,
+                'attempts': AlertDelivery.attempts + stmt.excluded.attempts,
+                'last_error': stmt.excluded.last_error,
+                'updated_at': stmt.excluded.updated_at,
+            },
+        ))
+
+    def _checkpoint(self, db: Session, job: AlertDispatchJob) -> None:
+        """Commit progress, mirror it into AlertHistory and renew the lease."""
+        job.locked_until = func.now() + timedelta(seconds=DISPATCH_LEASE_SECONDS)
+        if job.alert_history_id:
+            db.execute(
+                update(AlertHistory)
+                .where(AlertHistory.id == job.alert_history_id)
+                .values(sent_to_count=job.sent_count)
+            )
+        db.commit()
+
+    def _finish(self, db: Session, job: AlertDispatchJob) -> None:
+        job.locked_by = None
+        job.locked_until = None
+        if job.failed_count and job.attempts < DISPATCH_MAX_ATTEMPTS:
+            job.status = 'retrying'
+            delay = DISPATCH_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+            job.next_attempt_at = func.now() + timedelta(seconds=random.uniform(delay / 2, delay))
+        else:
+            job.status = 'failed' if job.failed_count else 'completed'
+            job.completed_at = func.now()
+            # An alert counts as sent once its dispatch is over and reached someone
+            if job.sent_count:
+                record_alerts(db)
+        db.commit()
+        logger.info(
+            f"Alert dispatch job {job.id} {job.status}: {job.sent_count} sent, {job.failed_count} failed"
+        )
+
+
+def start_dispatch_workers(count: int = DISPATCH_WORKERS) -> List[DispatchWorker]:
+    """Start ``count`` worker threads sharing one sender pool."""
+    if count <= 0:
+        return []
+    sender = default_sender()
+    workers = [DispatchWorker(sender, name=f"alert-dispatch-{i}") for i in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def stop_dispatch_workers(workers: List[DispatchWorker]) -> None:
+    for worker in workers:
+        worker.stop()
+    for worker in workers:
+        worker.join(timeout=DISPATCH_LEASE_SECONDS)
+    if workers:
+        workers[0].sender.close()
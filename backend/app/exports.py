@@ -0,0 +1,171 @@
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, select
+
+from .auth import require_role
+from .database import read_session
+from .models import AlertHistory, FloodPrediction, PredictionPayload
+from .prediction_store import decode_payload
+
+
+router = APIRouter()
+
+# Rows fetched per round trip from the server-side cursor and encoded per chunk
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def stream_rows(stmt, transform: Optional[Callable] = None, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[List]:
+    """Run ``stmt`` on a server-side cursor and yield its rows ``chunk_rows`` at a time.
+
+    The generator owns its session (on a read replica when one is
+    configured), so the connection stays checked out only while the
+    response is being streamed.
+    """
+    db = read_session()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=chunk_rows))
+        for partition in result.partitions():
+            yield [transform(row) for row in partition] if transform else partition
+    finally:
+        db.close()
+
+
+def encode_chunks(columns: Sequence[str], chunks: Iterable[List], fmt: str) -> Iterator[bytes]:
+    """Encode row chunks as CSV (with a header) or NDJSON, one output chunk per input chunk."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(columns)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.getvalue():
+            # No rows: still send the header
+            yield buffer.getvalue().encode()
+    else:
+        for chunk in chunks:
+            yield "".join(
+                json.dumps(dict(zip(columns, row)), default=str, separators=(",", ":")) + "\n" for row in chunk
+            ).encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(
+    request: Request, name: str, columns: Sequence[str], chunks: Iterable[List], fmt: str
+) -> StreamingResponse:
+    body = encode_chunks(columns, chunks, fmt)
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{fmt}"', "Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+def _check_range(start: Optional[date], end: Optional[date]) -> None:
+    if start is not None and end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+
+
+@router.get("/predictions")
+def export_predictions(
+    request: Request,
+    region_id: Optional[int] = None,
+    start: Optional[date] = Query(None, description="First prediction date (inclusive)"),
+    end: Optional[date] = Query(None, description="Last prediction date (inclusive)"),
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    include_inputs: bool = Query(False, description="Include the weather inputs of each prediction"),
+    user=Depends(require_role("authority")),
+):
+    """Stream prediction history as CSV or NDJSON, gzip-compressed when the client accepts it.
+
+    The date range filters on ``prediction_date``, so only the matching
+    monthly partitions are scanned. Rows come in (prediction_date, id)
+    order, read from ix_flood_predictions_date_id partition by partition
+    instead of being sorted.
+    """
+    _check_range(start, end)
+    columns = ["id", "region_id", "prediction_date", "created_at", "risk_level", "risk_score"]
+    stmt = select(
+        FloodPrediction.id,
+        FloodPrediction.region_id,
+        FloodPrediction.prediction_date,
+        FloodPrediction.created_at,
+        FloodPrediction.risk_level,
+        FloodPrediction.risk_score,
+    ).order_by(FloodPrediction.prediction_date, FloodPrediction.id)
+    if region_id is not None:
+        stmt = stmt.where(FloodPrediction.region_id == region_id)
+    if start is not None:
+        stmt = stmt.where(FloodPrediction.prediction_date >= start)
+    if end is not None:
+        stmt = stmt.where(FloodPrediction.prediction_date <= end)
+
+    transform = None
+    if include_inputs:
+        columns.append("weather_data")
+        stmt = stmt.add_columns(FloodPrediction.weather_data, PredictionPayload.payload).outerjoin(
+            PredictionPayload,
+            and_(
+                PredictionPayload.prediction_id == FloodPrediction.id,
+                PredictionPayload.prediction_date == FloodPrediction.prediction_date,
+            ),
+        )
+        encode_inputs = (lambda inputs: inputs) if fmt == "ndjson" else (
+            lambda inputs: json.dumps(inputs, default=str) if inputs is not None else ""
+        )
+
+        def transform(row):
+            return (*row[:6], encode_inputs(decode_payload(row[6], row[7])))
+
+    return export_response(request, "predictions", columns, stream_rows(stmt, transform), fmt)
+
+
+@router.get("/alerts")
+def export_alert_history(
+    request: Request,
+    region_id: Optional[int] = None,
+    start: Optional[date] = Query(None, description="First day alerts were sent (inclusive)"),
+    end: Optional[date] = Query(None, description="Last day alerts were sent (inclusive)"),
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    user=Depends(require_role("authority")),
+):
+    """Stream alert history as CSV or NDJSON, gzip-compressed when the client accepts it."""
+    _check_range(start, end)
+    columns = ["id", "region_id", "risk_level", "message", "sent_to_count", "sent_at", "created_by"]
+    stmt = select(
+        AlertHistory.id,
+        AlertHistory.region_id,
+        AlertHistory.risk_level,
+        AlertHistory.message,
+        AlertHistory.sent_to_count,
+        AlertHistory.sent_at,
+        AlertHistory.created_by,
+    ).order_by(AlertHistory.sent_at, AlertHistory.id)
+    if region_id is not None:
+        stmt = stmt.where(AlertHistory.region_id == region_id)
+    if start is not None:
+        stmt = stmt.where(AlertHistory.sent_at >= datetime.combine(start, datetime.min.time()))
+    if end is not None:
+        stmt = stmt.where(AlertHistory.sent_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+
+    return export_response(request, "alert_history", columns, stream_rows(stmt), fmt)
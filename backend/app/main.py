@@ -1,4 +1,9 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 import os
@@ -7,15 +12,104 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-from .auth import router as auth_router
+from .auth import router as auth_router, token_subject
 from .prediction import router as prediction_router
 from .alerts import router as alerts_router
 from .admin import router as admin_router
+from .exports import router as exports_router
+from .database import (
+    DATABASE_REPLICA_URLS,
+    READ_YOUR_WRITES_COOKIE,
+    READ_YOUR_WRITES_SECONDS,
+    SessionLocal,
+    async_engine,
+    pin_to_primary,
+    replica_router,
+)
+from .dispatch import start_dispatch_workers, stop_dispatch_workers
+from .prediction_history import run_maintenance
+from .scheduler import start_scheduler, stop_scheduler
+from .services.rainfall_store import load_rainfall_store
+from .services.rainfall_features import load_rainfall_features
+from .services.risk_model import load_risk_model
+from .services.http_client import UpstreamClient
+from .services.weather_service import attach_http_client
+from .services.region_resolver import get_region_resolver, load_region_resolver, refresh_region_resolver
+from .services.region_geometry import get_region_geometry
+from .services.vulnerability import load_vulnerability_index, refresh_vulnerability_index
+
+logger = logging.getLogger(__name__)
+
+REGION_REFRESH_SECONDS = float(os.getenv("REGION_RESOLVER_REFRESH_SECONDS", "60"))
+PREDICTION_MAINTENANCE_SECONDS = float(os.getenv("PREDICTION_MAINTENANCE_SECONDS", "300"))
+
+
+def _with_session(fn):
+    db = SessionLocal()
+    try:
+        return fn(db)
+    finally:
+        db.close()
+
+
+async def _refresh_regions_periodically():
+    """Reload the region resolver and vulnerability index when their tables change."""
+    while True:
+        await asyncio.sleep(REGION_REFRESH_SECONDS)
+        try:
+            if await asyncio.to_thread(_with_session, refresh_region_resolver):
+                await asyncio.to_thread(get_region_geometry, get_region_resolver())
+            await asyncio.to_thread(_with_session, refresh_vulnerability_index)
+        except Exception as e:
+            logger.warning(f"Region resolver refresh failed: {e}")
+
+
+async def _maintain_predictions_periodically():
+    """Roll up new predictions, keep partitions ahead of time and apply retention."""
+    while True:
+        try:
+            await asyncio.to_thread(_with_session, run_maintenance)
+        except Exception as e:
+            logger.warning(f"Prediction maintenance failed: {e}")
+        await asyncio.sleep(PREDICTION_MAINTENANCE_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Map the rainfall history once so requests never parse the CSV
+    store = load_rainfall_store()
+    load_rainfall_features(store)
+    load_risk_model()
+
+    # Region polygons in memory so coordinates resolve without a DB round trip
+    resolver = await asyncio.to_thread(_with_session, load_region_resolver)
+    await asyncio.to_thread(get_region_geometry, resolver)
+    await asyncio.to_thread(_with_session, load_vulnerability_index)
+    region_refresh = asyncio.create_task(_refresh_regions_periodically())
+    prediction_maintenance = asyncio.create_task(_maintain_predictions_periodically())
+
+    # One pooled client for every IMD/CWC call made by this worker
+    app.state.http_client = UpstreamClient()
+    attach_http_client(app.state.http_client)
+    dispatch_workers = start_dispatch_workers()
+    # Predictions are precomputed here (or by a dedicated scheduler process) and only read by the API
+    scheduler = start_scheduler()
+    try:
+        yield
+    finally:
+        region_refresh.cancel()
+        prediction_maintenance.cancel()
+        await stop_scheduler(scheduler)
+        stop_dispatch_workers(dispatch_workers)
+        attach_http_client(None)
+        await app.state.http_client.aclose()
+        await async_engine.dispose()
 
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title="AegisFlood API (MVP)",
+        lifespan=lifespan,
         docs_url="/docs" if os.getenv("ENVIRONMENT") != "production" else None,
         redoc_url="/redoc" if os.getenv("ENVIRONMENT") != "production" else None
     )
@@ -35,13 +129,38 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    if DATABASE_REPLICA_URLS:
+        @app.middleware("http")
+        async def read_your_writes(request: Request, call_next):
+            """Pin a client's reads to the primary for a few seconds after it writes.
+
+            Bearer clients are pinned by token subject; the cookie covers
+            same-site clients without a token.
+            """
+            request.state.subject = token_subject(request.headers.get("authorization"))
+            response = await call_next(request)
+            if request.method in ("POST", "PUT", "PATCH", "DELETE") and response.status_code < 400:
+                if request.state.subject is not None:
+                    pin_to_primary(request.state.subject)
+                response.set_cookie(
+                    READ_YOUR_WRITES_COOKIE,
+                    str(time.time() + READ_YOUR_WRITES_SECONDS),
+                    max_age=int(READ_YOUR_WRITES_SECONDS) + 1,
+                    httponly=True,
+                    samesite="lax",
+                )
+            return response
+
     app.include_router(auth_router, prefix="/auth", tags=["auth"])
     app.include_router(prediction_router, prefix="/predictions", tags=["predictions"])
     app.include_router(alerts_router, prefix="/alerts", tags=["alerts"])
     app.include_router(admin_router, prefix="/dashboard", tags=["dashboard"])
+    app.include_router(exports_router, prefix="/exports", tags=["exports"])
 
     @app.get("/health")
     def health():
+        if DATABASE_REPLICA_URLS:
+            return {"status": "ok", "replicas": replica_router.status()}
         return {"status": "ok"}
 
     return app
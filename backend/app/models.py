@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Boolean, JSON, Text
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, Float, LargeBinary, String, Date, DateTime, ForeignKey, Boolean, JSON, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from geoalchemy2 import Geography
@@ -13,7 +13,9 @@ class User(Base):
     phone_number = Column(String(15), unique=True, nullable=False, index=True)
     name = Column(String(255), nullable=True)
     # Geography Point (lon, lat)
-    location = Column(Geography(geometry_type='POINT', srid=4326), nullable=True)
+    location = Column(Geography(geometry_type='POINT', srid=4326, spatial_index=True), nullable=True)
+    # Region containing ``location``, maintained on registration and location change
+    region_id = Column(Integer, ForeignKey("regions.id"), nullable=True)
     language = Column(String(10), nullable=False, default='en')
     role = Column(String(20), nullable=False, default='citizen')  # citizen, authority
     sms_alerts = Column(Boolean, nullable=False, default=True)
@@ -21,6 +23,11 @@ class User(Base):
     is_active = Column(Boolean, nullable=False, default=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
 
+    __table_args__ = (
+        # Recipients of a regional alert are read in (region_id, id) keyset order
+        Index("ix_users_region_id_id", "region_id", "id"),
+    )
+
 
 class Region(Base):
     __tablename__ = "regions"
@@ -28,32 +35,142 @@ class Region(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     state = Column(String(100), nullable=True)
-    geometry = Column(Geography(geometry_type='POLYGON', srid=4326), nullable=True)
+    geometry = Column(Geography(geometry_type='MULTIPOLYGON', srid=4326, spatial_index=True), nullable=True)
     population = Column(Integer, nullable=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
     predictions = relationship("FloodPrediction", back_populates="region")
 
+    __table_args__ = (
+        # NULLS NOT DISTINCT so re-loading a region without a state still conflicts
+        UniqueConstraint("name", "state", name="uq_regions_name_state", postgresql_nulls_not_distinct=True),
+    )
+
 
 class FloodPrediction(Base):
     __tablename__ = "flood_predictions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Range-partitioned by month on prediction_date, so the partition key is part of the primary key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    prediction_date = Column(Date, primary_key=True, server_default=func.current_date(), nullable=False)
     region_id = Column(Integer, ForeignKey("regions.id"), nullable=False)
-    prediction_date = Column(Date, server_default=func.current_date(), nullable=False)
     risk_level = Column(String(20), nullable=False)
     risk_score = Column(Integer, nullable=False)
+    # Small inputs only; larger payloads live compressed in prediction_payloads
     weather_data = Column(JSON, nullable=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
 
     region = relationship("Region", back_populates="predictions")
 
+    __table_args__ = (
+        # Serves "latest prediction per region" lookups as a single index probe
+        Index("ix_flood_predictions_region_created", "region_id", created_at.desc()),
+        # Incremental rollups scan by creation time
+        Index("ix_flood_predictions_created", "created_at"),
+        # Exports stream in (prediction_date, id) order
+        Index("ix_flood_predictions_date_id", "prediction_date", "id"),
+        {"postgresql_partition_by": "RANGE (prediction_date)"},
+    )
+
+
+class PredictionPayload(Base):
+    """zlib-compressed JSON payload of a prediction, dropped after the payload retention period."""
+    __tablename__ = "prediction_payloads"
+
+    prediction_id = Column(Integer, primary_key=True)
+    prediction_date = Column(Date, primary_key=True)
+    payload = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        {"postgresql_partition_by": "RANGE (prediction_date)"},
+    )
+
+
+class PredictionRollup(Base):
+    """Per-region prediction counts and scores per hour/day bucket and risk level."""
+    __tablename__ = "prediction_rollups"
+
+    region_id = Column(Integer, ForeignKey("regions.id"), primary_key=True)
+    granularity = Column(String(10), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    risk_level = Column(String(20), primary_key=True)
+    prediction_count = Column(Integer, nullable=False)
+    max_score = Column(Integer, nullable=False)
+    score_sum = Column(BigInteger, nullable=False)
+
+
+class RollupWatermark(Base):
+    """How far (by flood_predictions.created_at) a rollup has consumed raw rows."""
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    rolled_up_to = Column(DateTime, nullable=False)
+
+
+class RegionCurrentRisk(Base):
+    """Latest prediction per region, upserted alongside every FloodPrediction insert."""
+    __tablename__ = "region_current_risk"
+
+    region_id = Column(Integer, ForeignKey("regions.id"), primary_key=True)
+    prediction_id = Column(Integer, nullable=False)
+    # Partition key of the prediction, so looking it up touches one partition
+    # (NULL only for rows written before the column existed)
+    prediction_date = Column(Date, nullable=True)
+    risk_level = Column(String(20), nullable=False)
+    risk_score = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
+    # Fingerprint of the scheduler inputs behind this prediction; NULL when written by another path
+    input_fingerprint = Column(String(40), nullable=True)
+
+
+class RiskTransition(Base):
+    """A change of a region's risk level, recorded when a new prediction moves it.
+
+    Steady states are not recorded, so consumers (alerting) only see
+    regions whose level actually changed.
+    """
+    __tablename__ = "risk_transitions"
+
+    id = Column(BigInteger, primary_key=True, index=True)
+    region_id = Column(Integer, ForeignKey("regions.id"), nullable=False, index=True)
+    prediction_id = Column(Integer, nullable=False)
+    from_level = Column(String(20), nullable=True)  # NULL for a region's first prediction
+    to_level = Column(String(20), nullable=False)
+    from_score = Column(Integer, nullable=True)
+    to_score = Column(Integer, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
+    # Set once the auto-alert stage has consumed the transition, with the alert it raised (if any)
+    processed_at = Column(DateTime, nullable=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id"), nullable=True)
+
+    __table_args__ = (
+        Index("ix_risk_transitions_pending", "id", postgresql_where=processed_at.is_(None)),
+    )
+
+
+class RegionVulnerability(Base):
+    """District Flood Severity Index (DFSI) inputs, matched to a region once at ingest."""
+    __tablename__ = "region_vulnerability"
+
+    region_id = Column(Integer, ForeignKey("regions.id"), primary_key=True)
+    source_name = Column(String(255), nullable=False)
+    match_score = Column(Float, nullable=False)
+    dfsi = Column(Float, nullable=False)
+    dfsi_percentile = Column(Float, nullable=False)
+    flooded_area_pct = Column(Float, nullable=True)
+    fatalities_per_100k = Column(Float, nullable=True)
+    injuries_per_100k = Column(Float, nullable=True)
+    flood_duration = Column(Float, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
+
 
 class Alert(Base):
     __tablename__ = "alerts"
 
     id = Column(Integer, primary_key=True, index=True)
     region = Column(String(255), nullable=False)
+    region_id = Column(Integer, ForeignKey("regions.id"), nullable=True, index=True)
     message = Column(Text, nullable=False)
     risk_level = Column(String(20), nullable=False)  # low, medium, high, critical
     created_by = Column(String(100), nullable=True)
@@ -72,5 +189,60 @@ class AlertHistory(Base):
     created_by = Column(String(100), nullable=True)
 
 
+class StatCounter(Base):
+    """Running totals for the dashboard, incremented in the same transaction as the rows they count."""
+    __tablename__ = "stat_counters"
+
+    name = Column(String(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+class AlertMinuteCount(Base):
+    """Ring buffer of per-minute alert counts: one slot per minute of the day, reused after 24h."""
+    __tablename__ = "alert_minute_counts"
+
+    slot = Column(SmallInteger, primary_key=True)
+    bucket_start = Column(DateTime, nullable=False)
+    alert_count = Column(Integer, nullable=False)
+
+
+class AlertDispatchJob(Base):
+    """Durable fan-out of one alert to its recipients, drained by dispatch workers."""
+    __tablename__ = "alert_dispatch_jobs"
 
+    id = Column(Integer, primary_key=True, index=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id"), nullable=False)
+    alert_history_id = Column(Integer, ForeignKey("alert_history.id"), nullable=True)
+    region = Column(String(255), nullable=False)
+    region_id = Column(Integer, ForeignKey("regions.id"), nullable=True)
+    message = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default='pending')  # pending, running, retrying, completed, failed
+    cursor = Column(Integer, nullable=False, default=0)  # last user id handed to the providers
+    sent_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, server_default=func.now(), nullable=False)
+    locked_by = Column(String(64), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    completed_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        Index("ix_alert_dispatch_jobs_status_next", "status", "next_attempt_at"),
+    )
+
+
+class AlertDelivery(Base):
+    """One message to one user on one channel; the idempotency key makes re-runs skip it."""
+    __tablename__ = "alert_deliveries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("alert_dispatch_jobs.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    channel = Column(String(20), nullable=False)  # sms, whatsapp
+    idempotency_key = Column(String(100), nullable=False, unique=True)
+    status = Column(String(20), nullable=False)  # sent, failed
+    attempts = Column(Integer, nullable=False, default=1)
+    last_error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
@@ -1,19 +1,38 @@
+import logging
 import random
-from datetime import date, timedelta
-from typing import Dict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .database import get_db
-from .models import FloodPrediction, Region
-from .schemas import PredictionResponse
-from .services.weather_service import IntegratedWeatherService, IMDWeatherService, CWCService
+from .auth import require_role
+from .database import get_async_db, get_async_read_db, get_db, get_read_db
+from .models import FloodPrediction, Region, RegionCurrentRisk
+from .prediction_history import risk_history
+from .prediction_store import load_payload, save_prediction, save_predictions
+from .schemas import PredictionResponse, BatchPredictionRequest, RiskHistoryPoint
+from .services.cache import cache_stats
+from .services.prediction_cache import prediction_cache
+from .services.region_resolver import ResolvedRegion, get_region_resolver
+from .services.rainfall_features import get_rainfall_features
+from .services.risk_model import get_risk_model, region_inputs
+from .services.vulnerability import ESCALATION_PERCENTILE, MAX_POINTS, Vulnerability, get_vulnerability_index
+from .services.weather_service import imd_service, cwc_service, integrated_weather_service
 
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def vulnerability_for(region_id: int) -> Optional[Vulnerability]:
+    index = get_vulnerability_index()
+    return index.get(region_id) if index is not None else None
+
+
 class SimplePredictionEngine:
     def predict_flood_risk(self, region_id: int, weather_data: Dict) -> Dict:
         rainfall_24h = weather_data.get('rainfall_24h', random.uniform(0, 150))
@@ -26,57 +45,396 @@ class SimplePredictionEngine:
         else:
             risk_level = 'low'
             risk_score = max(10, int(rainfall_24h))
+        factors = {
+            'rainfall_24h': rainfall_24h,
+            'prediction_method': 'simple_rules'
+        }
+
+        # Hazard x vulnerability: DFSI adds points, and the most flood-prone
+        # districts move up a level once the hazard is above low
+        vulnerability = vulnerability_for(region_id)
+        if vulnerability is not None:
+            risk_score = min(100, risk_score + vulnerability.points)
+            if vulnerability.escalates and risk_level == 'medium':
+                factors['escalated_from'] = risk_level
+                risk_level = 'high'
+                risk_score = max(risk_score, 60)
+            factors.update(vulnerability.factors())
+
         return {
             'region_id': region_id,
             'risk_level': risk_level,
             'risk_score': risk_score,
-            'factors': {
-                'rainfall_24h': rainfall_24h,
-                'prediction_method': 'simple_rules'
-            },
+            'factors': factors,
             'valid_until': date.today() + timedelta(days=1)
         }
 
 
-@router.get("/{region_id}", response_model=PredictionResponse)
-def get_prediction(region_id: int, db: Session = Depends(get_db)):
-    region = db.query(Region).filter(Region.id == region_id).one_or_none()
-    if region is None:
-        raise HTTPException(status_code=404, detail="Region not found")
-
-    engine = SimplePredictionEngine()
-    weather_data = {
-        'rainfall_24h': random.uniform(0, 150),
-        'temperature': random.uniform(20, 35)
-    }
-    prediction = engine.predict_flood_risk(region_id, weather_data)
-
-    db_prediction = FloodPrediction(
-        region_id=region_id,
-        risk_level=prediction['risk_level'],
-        risk_score=prediction['risk_score'],
-        weather_data=weather_data,
-    )
-    db.add(db_prediction)
+class BatchPredictionEngine:
+    """Vectorized counterpart of the per-region scoring rules.
+
+    Scores N regions in one NumPy pass. ``predict_flood_risk`` reproduces
+    ``SimplePredictionEngine.predict_flood_risk`` and ``assess_flood_risk``
+    reproduces ``IntegratedWeatherService._assess_flood_risk``, value for
+    value, so batch and single-region results are interchangeable.
+    """
+
+    SIMPLE_LEVELS = np.array(['low', 'medium', 'high'])
+    ASSESSMENT_LEVELS = np.array(['minimal', 'low', 'moderate', 'high', 'critical'])
+    # Assessment levels on the low/medium/high scale, for escalating a rule or model result
+    ASSESSMENT_AS_SIMPLE = {'minimal': 'low', 'low': 'low', 'moderate': 'medium', 'high': 'high', 'critical': 'high'}
+
+    def predict_flood_risk(
+        self,
+        rainfall_24h: np.ndarray,
+        region_ids: Optional[np.ndarray] = None,
+        dfsi_percentile: Optional[np.ndarray] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Apply the 24h rainfall rules to every region.
+
+        Args:
+            rainfall_24h: 24h rainfall in mm, one entry per region.
+            region_ids: Region ids aligned with ``rainfall_24h``; when given,
+                DFSI vulnerability is folded in as on the single path.
+            dfsi_percentile: DFSI percentiles aligned with ``rainfall_24h``,
+                used instead of the loaded index (e.g. in worker processes).
+
+        Returns:
+            Dict with ``risk_level`` (str array), ``risk_score`` (int array)
+            and ``escalated`` (bool array).
+        """
+        rainfall = np.asarray(rainfall_24h, dtype=np.float64)
+        high = rainfall > 100
+        medium = ~high & (rainfall > 50)
+        # np.trunc matches int() on the scalar path
+        risk_score = np.select(
+            [high, medium],
+            [
+                np.minimum(90, 60 + np.trunc(rainfall - 100)),
+                30 + np.trunc(rainfall - 50),
+            ],
+            default=np.maximum(10, np.trunc(rainfall)),
+        ).astype(np.int64)
+        level_index = high * 2 + medium * 1
+        escalated = np.zeros(len(rainfall), dtype=bool)
+
+        index = get_vulnerability_index()
+        if dfsi_percentile is None and region_ids is not None and index is not None:
+            dfsi_percentile = index.percentiles(region_ids)
+        if dfsi_percentile is not None:
+            percentile = np.asarray(dfsi_percentile, dtype=np.float64)
+            points = np.round(MAX_POINTS * np.nan_to_num(percentile)).astype(np.int64)
+            risk_score = np.minimum(100, risk_score + points)
+            escalated = (percentile >= ESCALATION_PERCENTILE) & medium
+            level_index = level_index + escalated
+            risk_score = np.where(escalated, np.maximum(risk_score, 60), risk_score)
+
+        return {
+            'risk_level': self.SIMPLE_LEVELS[level_index],
+            'risk_score': risk_score,
+            'escalated': escalated,
+        }
+
+    def assess_flood_risk(
+        self,
+        rainfall_6h: np.ndarray,
+        water_level_m: Optional[np.ndarray] = None,
+        warning_level_m: float | np.ndarray = 7.0,
+        danger_level_m: float | np.ndarray = 8.5,
+    ) -> Dict[str, np.ndarray]:
+        """Apply the combined IMD rainfall / CWC water level rules.
+
+        Args:
+            rainfall_6h: 6h nowcast rainfall in mm.
+            water_level_m: Current river level per region; NaN where no
+                station data is available.
+            warning_level_m: Warning level(s) for the stations.
+            danger_level_m: Danger level(s) for the stations.
+
+        Returns:
+            Dict with ``risk_level`` (str array) and ``risk_score`` (int array).
+        """
+        rainfall = np.asarray(rainfall_6h, dtype=np.float64)
+        score = np.select(
+            [rainfall > 80, rainfall > 50, rainfall > 20],
+            [40, 25, 15],
+            default=0,
+        )
+        if water_level_m is not None:
+            level = np.asarray(water_level_m, dtype=np.float64)
+            score = score + np.select(
+                [level >= danger_level_m, level >= warning_level_m],
+                [50, 30],
+                default=0,
+            )
+        level_index = np.searchsorted([15, 30, 50, 70], score, side='right')
+        return {
+            'risk_level': self.ASSESSMENT_LEVELS[level_index],
+            'risk_score': np.minimum(100, score).astype(np.int64),
+        }
+
+
+class ModelPredictionEngine:
+    """Scores regions with the trained risk model, if one is loaded.
+
+    Regions without a rainfall history district fall back to the rules,
+    as does everything when no model artifact is present.
+    """
+
+    def score(
+        self,
+        region_ids: np.ndarray,
+        region_names: List[str],
+        rainfall_24h: np.ndarray,
+        dfsi_percentile: Optional[np.ndarray] = None,
+        reading_days: Optional[np.ndarray] = None,
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """Model output for the regions; ``reading_days`` are the day numbers the
+        rainfall readings are for (default today, i.e. live readings)."""
+        model, features = get_risk_model(), get_rainfall_features()
+        if model is None or features is None:
+            return None
+        dfsi = dfsi_percentile
+        if dfsi is None:
+            index = get_vulnerability_index()
+            dfsi = index.percentiles(region_ids) if index is not None else np.full(len(region_ids), np.nan)
+        X, available = region_inputs(features, region_names, rainfall_24h, dfsi, reading_days=reading_days)
+        scored = model.score(X)
+        scored['available'] = available
+        return scored
+
+
+def apply_model_score(prediction: Dict, scored: Dict[str, np.ndarray], i: int) -> None:
+    """Replace a rule-based prediction with row ``i`` of the model's output when available."""
+    if scored is None or not scored['available'][i]:
+        return
+    prediction['risk_level'] = str(scored['risk_level'][i])
+    prediction['risk_score'] = int(scored['risk_score'][i])
+    factors = prediction['factors']
+    # Vulnerability is a model input, so the rule adjustments no longer apply
+    factors.pop('escalated_from', None)
+    factors.pop('vulnerability_points', None)
+    factors['prediction_method'] = 'logistic_regression'
+    factors['flood_probability'] = round(float(scored['probability'][i]), 4)
+
+
+def apply_assessment(prediction: Dict, assessed: Dict[str, np.ndarray], i: int) -> None:
+    """Escalate a prediction to row ``i`` of the 6h rainfall / water level assessment when that is more severe."""
+    level = str(assessed['risk_level'][i])
+    score = int(assessed['risk_score'][i])
+    factors = prediction['factors']
+    factors['assessment_level'] = level
+    factors['assessment_score'] = score
+    simple = BatchPredictionEngine.ASSESSMENT_AS_SIMPLE[level]
+    ranks = list(BatchPredictionEngine.SIMPLE_LEVELS)
+    if ranks.index(simple) > ranks.index(prediction['risk_level']):
+        factors['assessment_escalated_from'] = prediction['risk_level']
+        prediction['risk_level'] = simple
+        prediction['risk_score'] = max(prediction['risk_score'], score)
+
+
+def assemble_predictions(
+    region_ids: List[int],
+    inputs: List[Dict],
+    scored: Dict[str, np.ndarray],
+    modelled: Optional[Dict[str, np.ndarray]],
+    assessed: Optional[Dict[str, np.ndarray]] = None,
+) -> List[Dict]:
+    """Per-region prediction dicts from vectorized rule, model and (optionally) assessment output.
+
+    ``assessed`` comes from ``BatchPredictionEngine.assess_flood_risk`` plus
+    an ``applies`` mask for the regions that supplied a 6h reading or a
+    water level; it can only raise a region's level.
+    """
+    valid_until = date.today() + timedelta(days=1)
+    predictions = []
+    for i, region_id in enumerate(region_ids):
+        factors = {**inputs[i], 'prediction_method': 'simple_rules'}
+        if scored['escalated'][i]:
+            factors['escalated_from'] = 'medium'
+        vulnerability = vulnerability_for(region_id)
+        if vulnerability is not None:
+            factors.update(vulnerability.factors())
+        prediction = {
+            'region_id': region_id,
+            'risk_level': str(scored['risk_level'][i]),
+            'risk_score': int(scored['risk_score'][i]),
+            'factors': factors,
+            'valid_until': valid_until,
+        }
+        apply_model_score(prediction, modelled, i)
+        if assessed is not None and assessed['applies'][i]:
+            apply_assessment(prediction, assessed, i)
+        predictions.append(prediction)
+    return predictions
+
+
+@router.post("/batch", response_model=List[PredictionResponse])
+def batch_predictions(
+    request: BatchPredictionRequest,
+    db: Session = Depends(get_db),
+    user=Depends(require_role("authority")),
+):
+    """Score many regions in one vectorized pass and store the results in bulk.
+
+    Items that also carry ``rainfall_6h`` or ``water_level_m`` are assessed
+    with the combined IMD/CWC rules as well, and take that level when it is
+    more severe.
+    """
+    region_ids = [item.region_id for item in request.items]
+    names = dict(db.execute(select(Region.id, Region.name).where(Region.id.in_(set(region_ids)))).all())
+    missing = sorted(set(region_ids) - set(names))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Regions not found: {missing}")
+
+    engine = BatchPredictionEngine()
+    rainfall_24h = np.array([item.rainfall_24h for item in request.items], dtype=np.float64)
+    scored = engine.predict_flood_risk(rainfall_24h, np.array(region_ids))
+    modelled = ModelPredictionEngine().score(np.array(region_ids), [names[i] for i in region_ids], rainfall_24h)
+
+    # Optional IMD 6h nowcast / CWC water level per item, NaN where not supplied
+    rainfall_6h = np.array([np.nan if item.rainfall_6h is None else item.rainfall_6h for item in request.items])
+    water_level = np.array([np.nan if item.water_level_m is None else item.water_level_m for item in request.items])
+    applies = ~np.isnan(rainfall_6h) | ~np.isnan(water_level)
+    assessed = None
+    if applies.any():
+        assessed = engine.assess_flood_risk(np.nan_to_num(rainfall_6h), water_level)
+        assessed['applies'] = applies
+
+    inputs = [item.dict(exclude={'region_id'}, exclude_none=True) for item in request.items]
+    predictions = assemble_predictions(region_ids, inputs, scored, modelled, assessed)
+    rows = [
+        {
+            'region_id': prediction['region_id'],
+            'risk_level': prediction['risk_level'],
+            'risk_score': prediction['risk_score'],
+            'weather_data': prediction['factors'],
+        }
+        for prediction in predictions
+    ]
+
+    save_predictions(db, rows)
     db.commit()
+    prediction_cache.invalidate(set(region_ids))
+    return predictions
+
+
+def resolve_region(lat: float, lon: float) -> Optional[ResolvedRegion]:
+    """Map a coordinate to its region with the in-memory resolver (no DB round trip)."""
+    resolver = get_region_resolver()
+    return resolver.resolve(lat, lon) if resolver is not None else None
+
+
+# Declared before /{region_id} so "location" is not parsed as a region id
+@router.get("/location", response_model=PredictionResponse)
+async def get_prediction_by_location(lat: float, lon: float, db: AsyncSession = Depends(get_async_read_db)):
+    region = resolve_region(lat, lon)
+    if region is None or region.region_id is None:
+        raise HTTPException(status_code=404, detail="No region found for this location")
+    return await get_prediction(region.region_id, db)
+
 
-    return prediction
+async def prediction_inputs(region_id: int, name: str) -> Dict:
+    """Inputs for a region's prediction: recorded daily rainfall plus the cached IMD nowcast.
 
+    Recorded rainfall is used while it is current (yesterday or today);
+    otherwise the 24h figure is extrapolated from the nowcast, as for
+    regions without gauge history. Both only change when new upstream
+    data arrives, so the scheduler compares them between runs to find
+    regions with rising rainfall.
+    """
+    inputs = {}
+    resolver = get_region_resolver()
+    centroid = resolver.centroid(region_id) if resolver is not None else None
+    if centroid is not None:
+        try:
+            nowcast = await imd_service.get_nowcast_data(*centroid)
+            inputs['rainfall_6h'] = nowcast['nowcast']['rainfall_6h']
+            inputs['temperature'] = nowcast['weather_conditions']['temperature']
+            inputs['nowcast_time'] = nowcast['timestamp']
+        except Exception as e:
+            logger.warning(f"Nowcast unavailable for region {region_id}: {e}")
 
-@router.get("/location")
-def get_prediction_by_location(lat: float, lon: float, db: Session = Depends(get_db)):
-    # MVP: naive mapping to nearest region by ID for demo purposes
-    region = db.query(Region).first()
-    if region is None:
-        raise HTTPException(status_code=404, detail="No regions available")
-    return get_prediction(region.id, db)
+    features = get_rainfall_features()
+    recorded = features.current(name) if features is not None else None
+    if recorded is not None:
+        inputs['rainfall_24h'] = round(recorded['rainfall_1d'], 2)
+        inputs['rainfall_date'] = features.latest_day(name).isoformat()
+    else:
+        # No current gauge record for this region: extrapolate the 6h nowcast
+        inputs['rainfall_24h'] = round(4 * inputs.get('rainfall_6h', 0.0), 2)
+    return inputs
+
+
+def stored_prediction(prediction: FloodPrediction, stored_inputs: Optional[Dict]) -> Dict:
+    """API shape of a stored prediction; its factors are the scalar entries of the stored inputs."""
+    factors = {
+        key: value for key, value in (stored_inputs or {}).items()
+        if isinstance(value, (int, float, str)) and not isinstance(value, bool)
+    }
+    return {
+        'region_id': prediction.region_id,
+        'risk_level': prediction.risk_level,
+        'risk_score': prediction.risk_score,
+        'factors': factors,
+        'valid_until': prediction.prediction_date + timedelta(days=1),
+    }
+
+
+@router.get("/{region_id}", response_model=PredictionResponse)
+async def get_prediction(region_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    """Latest precomputed prediction for a region, as written by the re-scoring scheduler.
+
+    Nothing is scored on the request path. The current prediction id
+    doubles as the cache fingerprint, so every worker serves a new
+    result as soon as it is committed.
+    """
+    current = (await db.execute(
+        select(RegionCurrentRisk.prediction_id, RegionCurrentRisk.prediction_date)
+        .where(RegionCurrentRisk.region_id == region_id)
+    )).one_or_none()
+    if current is None:
+        if await db.get(Region, region_id) is None:
+            raise HTTPException(status_code=404, detail="Region not found")
+        raise HTTPException(status_code=503, detail="Region has not been scored yet", headers={"Retry-After": "60"})
+    prediction_id = current.prediction_id
+
+    async def load() -> Dict:
+        stmt = select(FloodPrediction).where(FloodPrediction.id == prediction_id)
+        if current.prediction_date is not None:
+            # Prunes the lookup to the prediction's monthly partition
+            stmt = stmt.where(FloodPrediction.prediction_date == current.prediction_date)
+        prediction = (await db.execute(stmt)).scalar_one_or_none()
+        if prediction is None:
+            # Raced with retention or a replica behind the projection; the next rescore fixes it
+            raise HTTPException(status_code=503, detail="Region prediction is unavailable", headers={"Retry-After": "60"})
+        return stored_prediction(prediction, await db.run_sync(load_payload, prediction))
+
+    return await prediction_cache.get_or_compute(region_id, str(prediction_id), load)
+
+
+@router.get("/history/{region_id}", response_model=List[RiskHistoryPoint])
+def get_prediction_history(
+    region_id: int,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    days: int = Query(30, ge=1, le=3650),
+    db: Session = Depends(get_read_db),
+):
+    """Risk trend for a region from the hourly/daily rollups, without touching raw predictions."""
+    since = datetime.combine(date.today() - timedelta(days=days), datetime.min.time())
+    return risk_history(db, region_id, granularity, since)
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for the shared upstream response caches and the prediction cache"""
+    return {"caches": cache_stats(), "predictions": await prediction_cache.stats()}
 
 
 @router.get("/imd/nowcast")
 async def get_imd_nowcast(lat: float, lon: float):
     """Get IMD nowcast data for a specific location"""
     try:
-        imd_service = IMDWeatherService()
         nowcast_data = await imd_service.get_nowcast_data(lat, lon)
         return {
             "status": "success",
@@ -88,11 +446,10 @@ async def get_imd_nowcast(lat: float, lon: float):
 
 
 @router.get("/imd/rainfall")
-async def get_imd_rainfall(lat: float, lon: float, days: int = 7):
+async def get_imd_rainfall(lat: float, lon: float, days: int = 7, district: Optional[str] = None):
     """Get IMD historical rainfall data for a specific location"""
     try:
-        imd_service = IMDWeatherService()
-        rainfall_data = await imd_service.get_rainfall_data(lat, lon, days)
+        rainfall_data = await imd_service.get_rainfall_data(lat, lon, days, district)
         return {
             "status": "success",
             "data": rainfall_data,
@@ -106,7 +463,6 @@ async def get_imd_rainfall(lat: float, lon: float, days: int = 7):
 async def get_cwc_water_level(station_id: str):
     """Get CWC water level data for a specific monitoring station"""
     try:
-        cwc_service = CWCService()
         water_level_data = await cwc_service.get_water_level_data(station_id)
         return {
             "status": "success",
@@ -121,7 +477,6 @@ async def get_cwc_water_level(station_id: str):
 async def get_cwc_flood_forecast(basin_id: str):
     """Get CWC flood forecast data for a specific river basin"""
     try:
-        cwc_service = CWCService()
         forecast_data = await cwc_service.get_flood_forecast(basin_id)
         return {
             "status": "success",
@@ -137,37 +492,44 @@ async def get_comprehensive_flood_data(
     lat: float, 
     lon: float, 
     station_id: str = None,
-    db: Session = Depends(get_db)
+    basin_id: str = None,
+    district: str = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get comprehensive flood prediction data combining IMD and CWC data"""
     try:
-        # Get the nearest region for database storage
-        region = db.query(Region).first()
-        if region is None:
-            raise HTTPException(status_code=404, detail="No regions available")
+        # Region containing the point, for database storage and the rainfall history
+        region = resolve_region(lat, lon)
+        if region is None or region.region_id is None:
+            raise HTTPException(status_code=404, detail="No region found for this location")
         
         # Get comprehensive data from integrated service
-        weather_service = IntegratedWeatherService()
-        comprehensive_data = await weather_service.get_comprehensive_flood_data(lat, lon, station_id)
+        comprehensive_data = await integrated_weather_service.get_comprehensive_flood_data(
+            lat, lon, station_id, basin_id, district or region.name
+        )
         
         # Store prediction in database
         risk_assessment = comprehensive_data.get('flood_risk_assessment', {})
-        db_prediction = FloodPrediction(
-            region_id=region.id,
+        await db.run_sync(
+            save_prediction,
+            region_id=region.region_id,
             risk_level=risk_assessment.get('risk_level', 'unknown'),
             risk_score=risk_assessment.get('risk_score', 0),
             weather_data=comprehensive_data,
         )
-        db.add(db_prediction)
-        db.commit()
+        # The new prediction id is the cache fingerprint, so no invalidation is needed
+        await db.commit()
         
         return {
             "status": "success",
             "data": comprehensive_data,
             "source": "Integrated IMD + CWC Data",
-            "region_id": region.id
+            "region_id": region.region_id,
+            "district": region.name
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate comprehensive data: {str(e)}")
 
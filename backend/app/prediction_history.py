@@ -0,0 +1,256 @@
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from .models import PredictionRollup
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("flood_predictions", "prediction_payloads")
+PARTITION_MONTHS_AHEAD = int(os.getenv("PREDICTION_PARTITION_MONTHS_AHEAD", "2"))
+# Raw prediction rows are dropped a whole month at a time once older than this;
+# the rollups keep their history.
+PREDICTION_RETENTION_DAYS = int(os.getenv("PREDICTION_RETENTION_DAYS", "365"))
+PAYLOAD_RETENTION_DAYS = int(os.getenv("PREDICTION_PAYLOAD_RETENTION_DAYS", "30"))
+# Rows younger than this may still be in open transactions and are rolled up next run
+ROLLUP_LAG_SECONDS = int(os.getenv("PREDICTION_ROLLUP_LAG_SECONDS", "60"))
+GRANULARITIES = ("hour", "day")
+MAINTENANCE_LOCK_ID = 7_301_017
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _create_partition(db: Session, table: str, name: str, start: date, end: date) -> None:
+    """Create one monthly partition, first moving any rows the default partition holds for its range.
+
+    Postgres refuses ``PARTITION OF`` while the default partition has rows
+    in the new range (e.g. written before maintenance caught up), so those
+    are moved into a plain table that is then attached.
+    """
+    bounds = {"start": start, "end": end}
+    stranded = db.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE prediction_date >= :start AND prediction_date < :end)"
+    ), bounds).scalar()
+    values = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    if not stranded:
+        db.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {values}"))
+        return
+    db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = db.execute(text(
+        f"""
+        WITH moved AS (
+            DELETE FROM {table}_default
+            WHERE prediction_date >= :start AND prediction_date < :end
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """
+    ), bounds).rowcount
+    db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {values}"))
+    logger.info(f"Moved {moved} rows from {table}_default into {name}")
+
+
+def ensure_partitions(db: Session, today: Optional[date] = None, months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """Create monthly partitions through ``months_ahead`` months from now, plus a default partition.
+
+    Returns:
+        Names of the partitions that were created.
+    """
+    month = _month_start(today or date.today())
+    created = []
+    for table in PARTITIONED_TABLES:
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+        current = month
+        for _ in range(months_ahead + 1):
+            name = partition_name(table, current)
+            exists = db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+            if exists is None:
+                _create_partition(db, table, name, current, _next_month(current))
+                created.append(name)
+            current = _next_month(current)
+    return created
+
+
+def _monthly_partitions(db: Session, table: str) -> Dict[str, date]:
+    """Monthly partitions of ``table`` by name, with the first day they cover."""
+    rows = db.execute(text(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:table AS regclass)
+        """
+    ), {"table": table}).scalars()
+    prefix = f"{table}_p"
+    partitions = {}
+    for name in rows:
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            suffix = name[len(prefix):]
+            partitions[name] = date(int(suffix[:4]), int(suffix[4:]), 1)
+    return partitions
+
+
+def apply_retention(db: Session, today: Optional[date] = None) -> List[str]:
+    """Drop payload and raw prediction partitions that are entirely past retention.
+
+    Raw partitions are only dropped once the rollups have consumed them,
+    and never while ``region_current_risk`` still points into them (a
+    region that has not been re-scored since).
+
+    Returns:
+        Names of the dropped partitions.
+    """
+    today = today or date.today()
+    watermark = db.execute(
+        text("SELECT min(rolled_up_to) FROM rollup_watermarks WHERE name = ANY(:names)"),
+        {"names": list(GRANULARITIES)},
+    ).scalar()
+    rolled_up = watermark.date() if watermark is not None else date.min
+    unknown, oldest_current = db.execute(
+        text("SELECT bool_or(prediction_date IS NULL), min(prediction_date) FROM region_current_risk")
+    ).one()
+    if unknown:
+        current = date.min  # rows from before prediction_date was tracked: keep everything
+    else:
+        current = oldest_current or date.max
+
+    dropped = []
+    limits = {
+        "prediction_payloads": today - timedelta(days=PAYLOAD_RETENTION_DAYS),
+        "flood_predictions": min(today - timedelta(days=PREDICTION_RETENTION_DAYS), rolled_up, current),
+    }
+    for table, cutoff in limits.items():
+        for name, month in _monthly_partitions(db, table).items():
+            if _next_month(month) <= cutoff:
+                db.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+    return dropped
+
+
+def roll_up(db: Session) -> int:
+    """Fold predictions created since the last run into the hourly and daily rollups.
+
+    The watermark row is locked for the duration, so concurrent runs queue
+    up and every raw row is counted exactly once.
+
+    Returns:
+        Number of raw predictions consumed.
+    """
+    consumed = 0
+    for granularity in GRANULARITIES:
+        db.execute(text(
+            "INSERT INTO rollup_watermarks (name, rolled_up_to) VALUES (:name, '1970-01-01') "
+            "ON CONFLICT (name) DO NOTHING"
+        ), {"name": granularity})
+        since, until = db.execute(text(
+            "SELECT rolled_up_to, now()::timestamp - make_interval(secs => :lag) "
+            "FROM rollup_watermarks WHERE name = :name FOR UPDATE"
+        ), {"name": granularity, "lag": ROLLUP_LAG_SECONDS}).one()
+        if until <= since:
+            continue
+        # Data-modifying CTEs always run, so the outer SELECT can just count the batch
+        counted = db.execute(text(
+            """
+            WITH batch AS (
+                SELECT region_id, date_trunc(:granularity, created_at) AS bucket_start, risk_level,
+                       count(*) AS n, max(risk_score) AS max_score, sum(risk_score) AS score_sum
+                FROM flood_predictions
+                WHERE created_at >= :since AND created_at < :until
+                  AND prediction_date >= CAST(:since AS date)
+                GROUP BY 1, 2, 3
+            ), merged AS (
+                INSERT INTO prediction_rollups
+                    (region_id, granularity, bucket_start, risk_level, prediction_count, max_score, score_sum)
+                SELECT region_id, :granularity, bucket_start, risk_level, n, max_score, score_sum FROM batch
+                ON CONFLICT (region_id, granularity, bucket_start, risk_level) DO UPDATE SET
+                    prediction_count = prediction_rollups.prediction_count + EXCLUDED.prediction_count,
+                    max_score = GREATEST(prediction_rollups.max_score, EXCLUDED.max_score),
+                    score_sum = prediction_rollups.score_sum + EXCLUDED.score_sum
+            )
+            SELECT coalesce(sum(n), 0) FROM batch
+            """
+        ), {"granularity": granularity, "since": since, "until": until}).scalar()
+        consumed = max(consumed, int(counted))
+        db.execute(
+            text("UPDATE rollup_watermarks SET rolled_up_to = :until WHERE name = :name"),
+            {"until": until, "name": granularity},
+        )
+    return consumed
+
+
+def run_maintenance(db: Session) -> Optional[Dict]:
+    """Partitions, rollups and retention in one transaction; skipped if another worker holds the lock."""
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": MAINTENANCE_LOCK_ID}).scalar():
+        db.rollback()
+        return None
+    # A failed partition step is logged and rolled back on its own, so it can
+    # never hold up rollups and retention
+    try:
+        with db.begin_nested():
+            created = ensure_partitions(db)
+    except Exception as e:
+        logger.warning(f"Prediction partition creation failed: {e}")
+        created = []
+    report = {
+        "partitions_created": created,
+        "rolled_up": roll_up(db),
+        "partitions_dropped": apply_retention(db),
+    }
+    db.commit()
+    if report["partitions_created"] or report["partitions_dropped"]:
+        logger.info(
+            f"Prediction partitions created {report['partitions_created']}, dropped {report['partitions_dropped']}"
+        )
+    return report
+
+
+def risk_history(db: Session, region_id: int, granularity: str, since: datetime) -> List[Dict]:
+    """Rollup buckets for a region: prediction count, max and mean score, and a level histogram."""
+    rows = db.execute(
+        select(
+            PredictionRollup.bucket_start,
+            PredictionRollup.risk_level,
+            PredictionRollup.prediction_count,
+            PredictionRollup.max_score,
+            PredictionRollup.score_sum,
+        )
+        .where(
+            PredictionRollup.region_id == region_id,
+            PredictionRollup.granularity == granularity,
+            PredictionRollup.bucket_start >= since,
+        )
+        .order_by(PredictionRollup.bucket_start)
+    )
+    buckets: Dict[datetime, Dict] = {}
+    for row in rows:
+        bucket = buckets.setdefault(row.bucket_start, {
+            "bucket_start": row.bucket_start, "prediction_count": 0, "max_score": 0, "score_sum": 0, "levels": {},
+        })
+        bucket["prediction_count"] += row.prediction_count
+        bucket["max_score"] = max(bucket["max_score"], row.max_score)
+        bucket["score_sum"] += row.score_sum
+        bucket["levels"][row.risk_level] = row.prediction_count
+    return [
+        {
+            "bucket_start": b["bucket_start"],
+            "prediction_count": b["prediction_count"],
+            "max_score": b["max_score"],
+            "mean_score": round(b["score_sum"] / b["prediction_count"], 2),
+            "levels": b["levels"],
+        }
+        for b in buckets.values()
+    ]
@@ -0,0 +1,255 @@
+import json
+import os
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, insert as sa_insert, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .models import FloodPrediction, PredictionPayload, RegionCurrentRisk, RiskTransition
+
+# weather_data larger than this (serialized) is compressed into prediction_payloads
+PAYLOAD_INLINE_BYTES = int(os.getenv("PREDICTION_PAYLOAD_INLINE_BYTES", "1024"))
+# First key of the (space, region_id) advisory locks that serialize transition recording
+TRANSITION_LOCK_SPACE = 7_301_024
+
+
+class SavedPredictions(NamedTuple):
+    ids: List[int]  # in the order of the saved rows
+    transitions: int
+
+
+def split_payload(weather_data: Optional[Dict]) -> Tuple[Optional[Dict], Optional[bytes]]:
+    """Keep small inputs inline; compress large ones (e.g. comprehensive responses) for the side table."""
+    if weather_data is None:
+        return None, None
+    encoded = json.dumps(weather_data, default=str, separators=(",", ":")).encode()
+    if len(encoded) <= PAYLOAD_INLINE_BYTES:
+        return weather_data, None
+    return None, zlib.compress(encoded, 6)
+
+
+def decode_payload(inline: Optional[Dict], payload: Optional[bytes]) -> Optional[Dict]:
+    """Inverse of ``split_payload``."""
+    if inline is not None:
+        return inline
+    return json.loads(zlib.decompress(payload)) if payload is not None else None
+
+
+def load_payload(db: Session, prediction: FloodPrediction) -> Optional[Dict]:
+    """Inputs of a prediction, from the row itself or the compressed side table."""
+    if prediction.weather_data is not None:
+        return prediction.weather_data
+    stored = db.get(PredictionPayload, (prediction.id, prediction.prediction_date))
+    return decode_payload(None, stored.payload if stored is not None else None)
+
+
+def _current_risk_upsert(values: List[Dict]):
+    stmt = insert(RegionCurrentRisk).values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=[RegionCurrentRisk.region_id],
+        set_={
+            "prediction_id": stmt.excluded.prediction_id,
+            "prediction_date": stmt.excluded.prediction_date,
+            "risk_level": stmt.excluded.risk_level,
+            "risk_score": stmt.excluded.risk_score,
+            "updated_at": stmt.excluded.updated_at,
+            "input_fingerprint": stmt.excluded.input_fingerprint,
+        },
+        # Ids come from a sequence: a writer committing late with an older
+        # prediction must not move the projection backwards
+        where=RegionCurrentRisk.prediction_id < stmt.excluded.prediction_id,
+    )
+
+
+def record_transitions(db: Session, latest: List) -> int:
+    """Insert a ``RiskTransition`` for every region whose level differs from its current risk.
+
+    Must run before ``region_current_risk`` is updated. A transaction-level
+    advisory lock per region is held until the caller commits, so two
+    writers never both see the old level; unlike row locks this also covers
+    a region's first prediction, which has no current row to lock. Locks
+    are taken in region order so concurrent writers cannot deadlock. A
+    prediction older than the region's current one records nothing, as the
+    projection will not move to it.
+
+    Args:
+        db: Database session; the caller commits.
+        latest: The new prediction per region, with ``id``, ``region_id``,
+            ``risk_level`` and ``risk_score``.
+
+    Returns:
+        Number of transitions recorded.
+    """
+    region_ids = sorted({row.region_id for row in latest})
+    # unnest keeps the array order, so the locks are taken in region order
+    db.execute(
+        text(
+            "SELECT pg_advisory_xact_lock(:space, region_id) "
+            "FROM (SELECT unnest(CAST(:region_ids AS integer[])) AS region_id) AS regions"
+        ),
+        {"space": TRANSITION_LOCK_SPACE, "region_ids": region_ids},
+    )
+    previous = {
+        row.region_id: row
+        for row in db.execute(
+            select(
+                RegionCurrentRisk.region_id,
+                RegionCurrentRisk.prediction_id,
+                RegionCurrentRisk.risk_level,
+                RegionCurrentRisk.risk_score,
+            ).where(RegionCurrentRisk.region_id.in_(region_ids))
+        )
+    }
+    transitions = []
+    for row in latest:
+        before = previous.get(row.region_id)
+        if before is not None and (before.prediction_id >= row.id or before.risk_level == row.risk_level):
+            continue
+        transitions.append({
+            "region_id": row.region_id,
+            "prediction_id": row.id,
+            "from_level": before.risk_level if before is not None else None,
+            "to_level": row.risk_level,
+            "from_score": before.risk_score if before is not None else None,
+            "to_score": row.risk_score,
+        })
+    if transitions:
+        db.execute(sa_insert(RiskTransition), transitions)
+    return len(transitions)
+
+
+def upsert_current_risk(db: Session, prediction: FloodPrediction) -> None:
+    """Point ``region_current_risk`` at ``prediction`` for its region.
+
+    Runs inside the caller's transaction so the projection can never
+    disagree with ``flood_predictions`` after a commit. A level change is
+    recorded as a ``RiskTransition`` first.
+    """
+    record_transitions(db, [prediction])
+    db.execute(_current_risk_upsert([{
+        "region_id": prediction.region_id,
+        "prediction_id": prediction.id,
+        "prediction_date": prediction.prediction_date,
+        "risk_level": prediction.risk_level,
+        "risk_score": prediction.risk_score,
+        "updated_at": func.now(),
+        "input_fingerprint": None,
+    }]))
+
+
+def save_prediction(
+    db: Session,
+    region_id: int,
+    risk_level: str,
+    risk_score: int,
+    weather_data: Optional[Dict] = None,
+) -> FloodPrediction:
+    """Append a prediction to history and refresh the region's current risk.
+
+    The caller owns the transaction and is expected to commit.
+    """
+    inline, payload = split_payload(weather_data)
+    prediction = FloodPrediction(
+        region_id=region_id,
+        risk_level=risk_level,
+        risk_score=risk_score,
+        weather_data=inline,
+    )
+    db.add(prediction)
+    db.flush()
+    if payload is not None:
+        db.add(PredictionPayload(
+            prediction_id=prediction.id, prediction_date=prediction.prediction_date, payload=payload
+        ))
+    upsert_current_risk(db, prediction)
+    return prediction
+
+
+def save_predictions(db: Session, rows: List[Dict]) -> SavedPredictions:
+    """Bulk-insert predictions and refresh current risk for every region touched.
+
+    Level changes are recorded as ``RiskTransition`` rows.
+
+    Args:
+        db: Database session; the caller commits.
+        rows: Dicts with ``region_id``, ``risk_level``, ``risk_score`` and
+            optionally ``weather_data`` and ``input_fingerprint``.
+
+    Returns:
+        Ids of the inserted predictions, in the order of ``rows``, and the
+        number of transitions recorded.
+    """
+    if not rows:
+        return SavedPredictions([], 0)
+    values, payloads, fingerprints = [], [], []
+    for row in rows:
+        row = dict(row)
+        fingerprints.append(row.pop("input_fingerprint", None))
+        inline, payload = split_payload(row.get("weather_data"))
+        values.append({**row, "weather_data": inline})
+        payloads.append(payload)
+    inserted = db.execute(
+        sa_insert(FloodPrediction).returning(
+            FloodPrediction.id,
+            FloodPrediction.prediction_date,
+            FloodPrediction.region_id,
+            FloodPrediction.risk_level,
+            FloodPrediction.risk_score,
+            sort_by_parameter_order=True,
+        ),
+        values,
+    ).all()
+    external = [
+        {"prediction_id": row.id, "prediction_date": row.prediction_date, "payload": payload}
+        for row, payload in zip(inserted, payloads)
+        if payload is not None
+    ]
+    if external:
+        db.execute(sa_insert(PredictionPayload), external)
+
+    # A region may appear more than once in a batch; the last row wins, and
+    # ON CONFLICT may only touch each region once per statement.
+    latest = {row.region_id: (row, fingerprint) for row, fingerprint in zip(inserted, fingerprints)}
+    transitions = record_transitions(db, [row for row, _ in latest.values()])
+    db.execute(_current_risk_upsert([
+        {
+            "region_id": row.region_id,
+            "prediction_id": row.id,
+            "prediction_date": row.prediction_date,
+            "risk_level": row.risk_level,
+            "risk_score": row.risk_score,
+            "updated_at": func.now(),
+            "input_fingerprint": fingerprint,
+        }
+        for row, fingerprint in latest.values()
+    ]))
+    return SavedPredictions([row.id for row in inserted], transitions)
+
+
+def get_current_risk(db: Session, region_id: int) -> Optional[RegionCurrentRisk]:
+    """Primary-key lookup of a region's latest risk."""
+    return db.get(RegionCurrentRisk, region_id)
+
+
+def rebuild_current_risk(db: Session) -> None:
+    """Recompute ``region_current_risk`` from the full prediction history.
+
+    Only needed to backfill the projection for history written before it
+    existed; normal writes keep it current through ``save_prediction``.
+    """
+    db.execute(text(
+        """
+        INSERT INTO region_current_risk (region_id, prediction_id, prediction_date, risk_level, risk_score, updated_at)
+        SELECT DISTINCT ON (region_id) region_id, id, prediction_date, risk_level, risk_score, created_at
+        FROM flood_predictions
+        ORDER BY region_id, created_at DESC
+        ON CONFLICT (region_id) DO UPDATE SET
+            prediction_id = EXCLUDED.prediction_id,
+            prediction_date = EXCLUDED.prediction_date,
+            risk_level = EXCLUDED.risk_level,
+            risk_score = EXCLUDED.risk_score,
+            updated_at = EXCLUDED.updated_at
+        """
+    ))
@@ -0,0 +1,363 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, select, text
+from sqlalchemy.orm import Session
+
+from .auto_alerts import run_auto_alerts
+from .database import SessionLocal, engine
+from .models import FloodPrediction, Region, RegionCurrentRisk
+from .prediction import BatchPredictionEngine, ModelPredictionEngine, assemble_predictions, prediction_inputs
+from .prediction_store import save_predictions
+from .services.prediction_cache import input_fingerprint
+from .services.rainfall_features import load_rainfall_features
+from .services.rainfall_store import load_rainfall_store, to_day_number
+from .services.risk_model import load_risk_model
+from .services.vulnerability import get_vulnerability_index
+
+logger = logging.getLogger(__name__)
+
+# "lifespan" runs the scheduler inside each API process (one holds the lock per tick);
+# "off" leaves it to a dedicated `python start_backend.py --scheduler` process
+PREDICTION_SCHEDULER = os.getenv('PREDICTION_SCHEDULER', 'lifespan')
+RESCORE_TICK_SECONDS = float(os.getenv('RESCORE_TICK_SECONDS', '60'))
+RESCORE_PROCESSES = int(os.getenv('RESCORE_PROCESSES', '2'))
+RESCORE_CHUNK_SIZE = int(os.getenv('RESCORE_CHUNK_SIZE', '250'))
+RESCORE_FETCH_CONCURRENCY = int(os.getenv('RESCORE_FETCH_CONCURRENCY', '16'))
+SCHEDULER_LOCK_ID = 7_301_023
+
+_active: Optional['RescoreScheduler'] = None
+
+
+def _with_session(fn):
+    db = SessionLocal()
+    try:
+        return fn(db)
+    finally:
+        db.close()
+
+
+def _init_worker() -> None:
+    """Load the rainfall features and risk model once per worker process."""
+    load_rainfall_features(load_rainfall_store())
+    load_risk_model()
+
+
+def score_chunk(
+    region_ids: np.ndarray,
+    region_names: List[str],
+    rainfall_24h: np.ndarray,
+    dfsi_percentile: np.ndarray,
+    reading_days: np.ndarray,
+) -> Tuple[Dict[str, np.ndarray], Optional[Dict[str, np.ndarray]]]:
+    """Rule and model scores for one chunk of regions; runs in a worker process.
+
+    DFSI percentiles are passed in because the vulnerability index is
+    loaded from the database in the parent only.
+    """
+    scored = BatchPredictionEngine().predict_flood_risk(rainfall_24h, region_ids, dfsi_percentile)
+    modelled = ModelPredictionEngine().score(region_ids, region_names, rainfall_24h, dfsi_percentile, reading_days)
+    return scored, modelled
+
+
+def scoring_fingerprint(inputs: Dict, dfsi_percentile: float, day: date) -> str:
+    """Fingerprint of the values a region's score depends on, and nothing else.
+
+    The 24h rainfall, the latest rainfall date (the model's history
+    windows end there) and the DFSI percentile, plus the scoring day:
+    predictions are valid for one day, so every region is re-scored at
+    least daily. The 6h nowcast only counts for regions without a
+    current gauge record, whose 24h rainfall is extrapolated from it;
+    temperature and the nowcast time never do.
+    """
+    snapshot = {'rainfall_24h': inputs.get('rainfall_24h'), 'rainfall_date': inputs.get('rainfall_date')}
+    if snapshot['rainfall_date'] is None:
+        snapshot['rainfall_6h'] = inputs.get('rainfall_6h')
+    snapshot['dfsi_percentile'] = None if math.isnan(dfsi_percentile) else round(float(dfsi_percentile), 6)
+    snapshot['day'] = day.isoformat()
+    return input_fingerprint(snapshot)
+
+
+def reading_day(inputs: Dict, today: Optional[date] = None) -> int:
+    """Day number the 24h rainfall is for: its recorded date, else today (a live reading)."""
+    recorded = inputs.get('rainfall_date')
+    return to_day_number(date.fromisoformat(recorded) if recorded else today or date.today())
+
+
+class DueRegion(NamedTuple):
+    region_id: int
+    name: str
+    inputs: Dict
+    dfsi_percentile: float
+    fingerprint: str
+    rising: float
+
+
+def _rainfall(inputs: Optional[Dict]) -> Optional[Tuple[float, float]]:
+    """(6h, 24h) rainfall of scheduler inputs; None for inputs stored by another path."""
+    if not isinstance(inputs, dict) or not isinstance(inputs.get('rainfall_24h'), (int, float)):
+        return None
+    return inputs.get('rainfall_6h', 0.0), inputs['rainfall_24h']
+
+
+class RescoreScheduler:
+    """Re-scores regions whose inputs changed so the API only serves stored predictions.
+
+    Each tick gathers the current inputs of all regions and fingerprints
+    them; regions whose fingerprint matches the one stored with their
+    current prediction are skipped. Of the rest, regions with more rainfall
+    than the inputs stored with their current prediction go first, steepest
+    rise first, so every process agrees on the order. Chunks
+    are scored in a process pool and each chunk is written with one bulk
+    insert, which also records any risk level transitions. The tick ends
+    with an auto-alert pass over the new transitions.
+    """
+
+    def __init__(self, processes: int = RESCORE_PROCESSES, chunk_size: int = RESCORE_CHUNK_SIZE):
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.totals = {'runs': 0, 'recomputed': 0, 'skipped': 0, 'transitions': 0, 'failed_chunks': 0, 'alerted': 0}
+        self.last_run: Optional[Dict] = None
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.processes <= 0:
+            return None
+        if self._pool is None:
+            # spawn: never fork a process that runs an event loop and dispatch threads
+            self._pool = ProcessPoolExecutor(
+                self.processes, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker
+            )
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    @staticmethod
+    def _load_regions(db: Session) -> List:
+        """Regions with the fingerprint and inputs of their current prediction."""
+        return db.execute(
+            select(
+                Region.id,
+                Region.name,
+                RegionCurrentRisk.input_fingerprint,
+                FloodPrediction.weather_data.label('scored_inputs'),
+            )
+            .outerjoin(RegionCurrentRisk, RegionCurrentRisk.region_id == Region.id)
+            .outerjoin(FloodPrediction, and_(
+                FloodPrediction.id == RegionCurrentRisk.prediction_id,
+                FloodPrediction.prediction_date == RegionCurrentRisk.prediction_date,
+            ))
+            .order_by(Region.id)
+        ).all()
+
+    async def _gather_inputs(self, regions: List) -> List[Dict]:
+        limit = asyncio.Semaphore(RESCORE_FETCH_CONCURRENCY)
+
+        async def fetch(region):
+            async with limit:
+                return await prediction_inputs(region.id, region.name)
+
+        return await asyncio.gather(*(fetch(region) for region in regions))
+
+    def due_regions(self, regions: List, inputs: List[Dict], day: Optional[date] = None) -> List[DueRegion]:
+        """Regions whose input fingerprint changed, rising rainfall first (steepest first)."""
+        day = day or date.today()
+        index = get_vulnerability_index()
+        region_ids = np.array([region.id for region in regions], dtype=np.int64)
+        dfsi = index.percentiles(region_ids) if index is not None else np.full(len(regions), np.nan)
+        due = []
+        for region, region_inputs, percentile in zip(regions, inputs, dfsi):
+            fingerprint = scoring_fingerprint(region_inputs, percentile, day)
+            if fingerprint == region.input_fingerprint:
+                continue
+            last = _rainfall(region.scored_inputs)
+            current = _rainfall(region_inputs)
+            rising = max(0.0, max(c - p for c, p in zip(current, last))) if last is not None else 0.0
+            due.append(DueRegion(region.id, region.name, region_inputs, float(percentile), fingerprint, rising))
+        due.sort(key=lambda region: -region.rising)
+        return due
+
+    async def _score(self, chunk: List[DueRegion]):
+        args = (
+            np.array([region.region_id for region in chunk], dtype=np.int64),
+            [region.name for region in chunk],
+            np.array([region.inputs['rainfall_24h'] for region in chunk], dtype=np.float64),
+            np.array([region.dfsi_percentile for region in chunk], dtype=np.float64),
+            np.array([reading_day(region.inputs) for region in chunk], dtype=np.int64),
+        )
+        pool = self._executor()
+        if pool is None:
+            return await asyncio.to_thread(score_chunk, *args)
+        return await asyncio.get_running_loop().run_in_executor(pool, score_chunk, *args)
+
+    def _save(self, chunk: List[DueRegion], predictions: List[Dict]) -> int:
+        """Store one chunk; returns the level transitions recorded."""
+        rows = [
+            {
+                'region_id': prediction['region_id'],
+                'risk_level': prediction['risk_level'],
+                'risk_score': prediction['risk_score'],
+                'weather_data': prediction['factors'],
+                'input_fingerprint': region.fingerprint,
+            }
+            for region, prediction in zip(chunk, predictions)
+        ]
+        db = SessionLocal()
+        try:
+            saved = save_predictions(db, rows)
+            db.commit()
+        finally:
+            db.close()
+        return saved.transitions
+
+    async def _write(self, chunk: List[DueRegion], scoring) -> Tuple[int, int]:
+        """Assemble and store one scored chunk; returns (regions written, level transitions)."""
+        scored, modelled = await scoring
+        region_ids = [region.region_id for region in chunk]
+        predictions = assemble_predictions(region_ids, [region.inputs for region in chunk], scored, modelled)
+        transitions = await asyncio.to_thread(self._save, chunk, predictions)
+        return len(chunk), transitions
+
+    async def run_once(self) -> Optional[Dict]:
+        """One scheduling pass; skipped (None) if another process holds the scheduler lock."""
+        lock = await asyncio.to_thread(engine.connect)
+        try:
+            acquired = await asyncio.to_thread(
+                lambda: lock.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": SCHEDULER_LOCK_ID}).scalar()
+            )
+            if not acquired:
+                return None
+            try:
+                return await self._run_locked()
+            finally:
+                await asyncio.to_thread(
+                    lambda: lock.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": SCHEDULER_LOCK_ID})
+                )
+        finally:
+            await asyncio.to_thread(lock.close)
+
+    async def _run_locked(self) -> Dict:
+        started = time.perf_counter()
+        regions = await asyncio.to_thread(_with_session, self._load_regions)
+        inputs = await self._gather_inputs(regions)
+        due = self.due_regions(regions, inputs)
+
+        # Chunks are scored concurrently across the pool; each is written as soon as it is scored
+        chunks = [due[i:i + self.chunk_size] for i in range(0, len(due), self.chunk_size)]
+        results = await asyncio.gather(
+            *(self._write(chunk, self._score(chunk)) for chunk in chunks), return_exceptions=True
+        )
+        failed = [result for result in results if isinstance(result, BaseException)]
+        for error in failed:
+            logger.warning(f"Re-scoring chunk failed: {error}")
+        written = [result for result in results if not isinstance(result, BaseException)]
+
+        # Also picks up transitions written outside the scheduler and regions deferred by a surge
+        try:
+            alerts = await asyncio.to_thread(_with_session, run_auto_alerts)
+        except Exception as e:
+            logger.warning(f"Automatic alerting failed: {e}")
+            alerts = None
+
+        report = {
+            'regions': len(regions),
+            'skipped': len(regions) - len(due),
+            'recomputed': sum(count for count, _ in written),
+            'rising': sum(1 for region in due if region.rising),
+            'transitions': sum(transitions for _, transitions in written),
+            'failed_chunks': len(failed),
+            'alerts': alerts,
+            'seconds': round(time.perf_counter() - started, 2),
+        }
+        self.totals['runs'] += 1
+        for key in ('recomputed', 'skipped', 'transitions', 'failed_chunks'):
+            self.totals[key] += report[key]
+        self.totals['alerted'] += alerts['alerted'] if alerts else 0
+        self.last_run = report
+        if due:
+            logger.info(
+                f"Re-scored {report['recomputed']}/{report['regions']} regions ({report['rising']} rising, "
+                f"{report['skipped']} unchanged, {report['transitions']} level transitions) in {report['seconds']}s"
+            )
+        return report
+
+    async def run_forever(self, tick_seconds: float = RESCORE_TICK_SECONDS) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning(f"Prediction re-scoring failed: {e}")
+            await asyncio.sleep(tick_seconds)
+
+    def stats(self) -> Dict:
+        return {'processes': self.processes, 'last_run': self.last_run, 'totals': dict(self.totals)}
+
+
+def scheduler_stats() -> Optional[Dict]:
+    """Skipped vs. recomputed counters of the scheduler in this process, if it runs here."""
+    return _active.stats() if _active is not None else None
+
+
+def start_scheduler() -> Optional[Tuple[RescoreScheduler, asyncio.Task]]:
+    """Run the scheduler in the current event loop, unless it runs as its own process."""
+    global _active
+    if PREDICTION_SCHEDULER != 'lifespan':
+        return None
+    _active = RescoreScheduler()
+    return _active, asyncio.create_task(_active.run_forever())
+
+
+async def stop_scheduler(running: Optional[Tuple[RescoreScheduler, asyncio.Task]]) -> None:
+    global _active
+    if running is None:
+        return
+    scheduler, task = running
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await asyncio.to_thread(scheduler.shutdown)
+    _active = None
+
+
+async def run_standalone() -> None:
+    """Scheduler as its own process (``python start_backend.py --scheduler``), with PREDICTION_SCHEDULER=off on the API."""
+    global _active
+    from .services.http_client import UpstreamClient
+    from .services.region_resolver import load_region_resolver, refresh_region_resolver
+    from .services.vulnerability import load_vulnerability_index, refresh_vulnerability_index
+    from .services.weather_service import attach_http_client
+
+    _init_worker()
+    await asyncio.to_thread(_with_session, load_region_resolver)
+    await asyncio.to_thread(_with_session, load_vulnerability_index)
+    http_client = UpstreamClient()
+    attach_http_client(http_client)
+    _active = scheduler = RescoreScheduler()
+    logger.info(f"Prediction scheduler started: tick {RESCORE_TICK_SECONDS:g}s, {scheduler.processes} processes")
+    try:
+        while True:
+            try:
+                # Pick up regions added since the last tick
+                await asyncio.to_thread(_with_session, refresh_region_resolver)
+                await asyncio.to_thread(_with_session, refresh_vulnerability_index)
+                await scheduler.run_once()
+            except Exception as e:
+                logger.warning(f"Prediction re-scoring failed: {e}")
+            await asyncio.sleep(RESCORE_TICK_SECONDS)
+    finally:
+        scheduler.shutdown()
+        attach_http_client(None)
+        await http_client.aclose()
@@ -1,6 +1,6 @@
-from datetime import date
+from datetime import date, datetime
 from typing import Optional, List, Dict
-from pydantic import BaseModel, Field, constr, conint
+from pydantic import BaseModel, Field, constr, conint, confloat, conlist
 
 
 PhoneNumberStr = constr(min_length=8, max_length=15)
@@ -11,10 +11,18 @@ class RegisterRequest(BaseModel):
     name: Optional[str] = None
     language: Optional[str] = Field(default="en", pattern=r"^[a-z]{2}(-[A-Z]{2})?$")
     location: Optional[str] = None
+    lat: Optional[float] = Field(default=None, ge=-90, le=90)
+    lon: Optional[float] = Field(default=None, ge=-180, le=180)
     sms_alerts: Optional[bool] = True
     whatsapp_alerts: Optional[bool] = False
 
 
+class LocationUpdate(BaseModel):
+    lat: Optional[float] = Field(default=None, ge=-90, le=90)
+    lon: Optional[float] = Field(default=None, ge=-180, le=180)
+    location: Optional[str] = None
+
+
 class VerifyRequest(BaseModel):
     phone_number: PhoneNumberStr
     otp: constr(min_length=4, max_length=8)
@@ -39,6 +47,17 @@ class PredictionResponse(BaseModel):
     valid_until: date
 
 
+class BatchPredictionItem(BaseModel):
+    region_id: int
+    rainfall_24h: confloat(ge=0)
+    rainfall_6h: Optional[confloat(ge=0)] = None
+    water_level_m: Optional[confloat(ge=0)] = None
+
+
+class BatchPredictionRequest(BaseModel):
+    items: conlist(BatchPredictionItem, min_length=1, max_length=5000)
+
+
 class AlertCreate(BaseModel):
     region: str
     message: constr(min_length=1, max_length=500)
@@ -84,6 +103,19 @@ class RegionSummary(BaseModel):
     latest_risk_score: Optional[int] = None
 
 
+class RegionSummaryPage(BaseModel):
+    items: List[RegionSummary]
+    next_cursor: Optional[int] = None
+
+
+class RiskHistoryPoint(BaseModel):
+    bucket_start: datetime
+    prediction_count: int
+    max_score: int
+    mean_score: float
+    levels: Dict[str, int]
+
+
 class DashboardStats(BaseModel):
     total_users: int
     total_regions: int
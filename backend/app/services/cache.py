@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTTLCache:
+    """Shared async cache for upstream API responses.
+
+    Entries are fresh for ``ttl`` seconds and may then be served stale for
+    another ``stale_ttl`` seconds while a single background refresh runs
+    (stale-while-revalidate). Concurrent misses for the same key share one
+    upstream call, and the least recently used entry is evicted once
+    ``maxsize`` is reached.
+    """
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float = 0, maxsize: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.evictions = 0
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key``, calling ``fetch`` at most once per miss.
+
+        Args:
+            key: Cache key, e.g. a rounded grid cell or a station id.
+            fetch: Coroutine factory that loads the value from upstream.
+
+        Returns:
+            The cached or freshly fetched value.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self.refreshes += 1
+                    self._start_fetch(key, fetch)
+                return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            future = self._start_fetch(key, fetch)
+        # Shield so a cancelled caller does not cancel the fetch other callers await
+        return await asyncio.shield(future)
+
+    def _start_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        future = asyncio.ensure_future(fetch())
+        self._inflight[key] = future
+        future.add_done_callback(lambda f: self._finish_fetch(key, f))
+        return future
+
+    def _finish_fetch(self, key: Hashable, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.errors += 1
+            logger.warning(f"{self.name} cache fetch failed for {key}: {error}")
+            return
+        self._entries[key] = (future.result(), time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or every entry when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            'name': self.name,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl_seconds': self.ttl,
+            'stale_ttl_seconds': self.stale_ttl,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'evictions': self.evictions,
+            'hit_ratio': round((self.hits + self.stale_hits + self.coalesced) / lookups, 4) if lookups else None,
+        }
+
+
+_registry: List[AsyncTTLCache] = []
+
+
+def register_cache(cache: AsyncTTLCache) -> AsyncTTLCache:
+    _registry.append(cache)
+    return cache
+
+
+def cache_stats() -> List[Dict[str, Any]]:
+    return [cache.stats() for cache in _registry]
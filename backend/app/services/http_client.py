@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+import random
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class UpstreamClient:
+    """App-lifetime async HTTP client for the IMD/CWC integrations.
+
+    Wraps a single pooled ``httpx.AsyncClient`` (keep-alive, HTTP/2 when the
+    ``h2`` package is installed) and adds a per-host concurrency limit plus
+    retries with exponential backoff and full jitter for transport errors
+    and retryable status codes.
+    """
+
+    def __init__(
+        self,
+        timeout: float = float(os.getenv('UPSTREAM_TIMEOUT_SECONDS', '10')),
+        connect_timeout: float = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT_SECONDS', '3')),
+        max_connections: int = int(os.getenv('UPSTREAM_MAX_CONNECTIONS', '100')),
+        max_keepalive: int = int(os.getenv('UPSTREAM_MAX_KEEPALIVE', '20')),
+        per_host_limit: int = int(os.getenv('UPSTREAM_PER_HOST_LIMIT', '10')),
+        retries: int = int(os.getenv('UPSTREAM_RETRIES', '2')),
+        backoff: float = float(os.getenv('UPSTREAM_BACKOFF_SECONDS', '0.2')),
+        http2: bool = os.getenv('UPSTREAM_HTTP2', 'true').lower() == 'true',
+    ):
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.backoff = backoff
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._client = httpx.AsyncClient(
+            http2=http2 and _http2_available(),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=30,
+            ),
+            headers={'User-Agent': 'AegisFlood/1.0'},
+        )
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET ``url`` and decode the JSON body, retrying transient failures.
+
+        Raises:
+            httpx.HTTPError: When the request still fails after all retries.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self._host_limit(url):
+                    response = await self._client.get(url, params=params)
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.retries:
+                    raise httpx.HTTPStatusError(
+                        f"Retryable status {response.status_code}", request=response.request, response=response
+                    )
+                response.raise_for_status()
+                return response.json()
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRY_STATUS_CODES
+                if not retryable or attempt >= self.retries:
+                    raise
+                delay = random.uniform(0, self.backoff * 2 ** attempt)
+                logger.warning(f"Upstream GET {url} failed ({e}); retry {attempt + 1} in {delay:.2f}s")
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fail fast to the database instead of waiting on an unreachable Redis
+REDIS_TIMEOUT_SECONDS = float(os.getenv('PREDICTION_CACHE_REDIS_TIMEOUT', '0.5'))
+
+
+def input_fingerprint(inputs: Dict[str, Any]) -> str:
+    """Stable hash of the inputs a prediction was computed from."""
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+
+def seconds_until(valid_until: date) -> float:
+    """Seconds until the start of ``valid_until`` (local time), at least one."""
+    expiry = datetime.combine(valid_until, datetime.min.time())
+    return max(1.0, (expiry - datetime.now()).total_seconds())
+
+
+class MemoryBackend:
+    """In-process LRU store with per-entry expiry.
+
+    Calls are cheap and made directly on the event loop; the lock covers
+    invalidations from sync endpoints running in the threadpool.
+    """
+
+    blocking = False
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shares cached predictions across workers through Redis (or any Redis-compatible server).
+
+    The client is synchronous; ``PredictionCache`` runs its calls in a
+    worker thread so a slow server never stalls the event loop.
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = 'aegisflood:prediction:'):
+        import redis  # optional dependency, only needed for this backend
+
+        self.client = redis.Redis.from_url(url, socket_timeout=REDIS_TIMEOUT_SECONDS,
+                                           socket_connect_timeout=REDIS_TIMEOUT_SECONDS)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        return value.decode() if value is not None else None
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = [self.prefix + key for key in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + '*'))
+
+
+class PredictionCache:
+    """Read-through cache of the current prediction per region.
+
+    An entry holds the prediction and a fingerprint of what it was built
+    from (the id of the stored prediction, or a hash of its inputs). It is
+    served until ``valid_until`` passes or the fingerprint changes, so
+    repeated GETs skip loading and decoding the stored row. Concurrent
+    misses for the same region share one load. A backend error (e.g. a
+    Redis outage) is counted and treated as a miss, so the prediction is
+    still served from the database.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.input_changes = 0
+        self.coalesced = 0
+        self.writes = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    async def _call(self, fn: Callable, *args) -> Any:
+        """Run a backend call, off the event loop for a blocking backend; None on error."""
+        try:
+            if self.backend.blocking:
+                return await asyncio.to_thread(fn, *args)
+            return fn(*args)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Prediction cache backend error ({e}); bypassing the cache")
+            return None
+
+    async def get_or_compute(
+        self, region_id: int, fingerprint: str, compute: Callable[[], Awaitable[Dict]]
+    ) -> Dict:
+        """Cached prediction for these inputs, or the result of ``compute`` (which stores it)."""
+        key = str(region_id)
+        cached = await self._call(self.backend.get, key)
+        if cached is not None:
+            entry = json.loads(cached)
+            if entry['fingerprint'] == fingerprint:
+                self.hits += 1
+                prediction = entry['prediction']
+                prediction['valid_until'] = date.fromisoformat(prediction['valid_until'])
+                return prediction
+            self.input_changes += 1
+        else:
+            self.misses += 1
+
+        flight = (region_id, fingerprint)
+        future = self._inflight.get(flight)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(compute())
+        self._inflight[flight] = future
+        try:
+            prediction = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(flight, None)
+        await self.put(region_id, fingerprint, prediction)
+        return prediction
+
+    async def put(self, region_id: int, fingerprint: str, prediction: Dict) -> None:
+        entry = {'fingerprint': fingerprint, 'prediction': prediction}
+        value = json.dumps(entry, default=str)
+        errors = self.errors
+        await self._call(self.backend.set, str(region_id), value, seconds_until(prediction['valid_until']))
+        if self.errors == errors:
+            self.writes += 1
+
+    def invalidate(self, region_ids: Iterable[int]) -> None:
+        """Drop cached predictions. Blocking: call from sync code (threadpool), not the event loop."""
+        keys = [str(region_id) for region_id in region_ids]
+        try:
+            self.backend.delete(keys)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Prediction cache invalidation failed ({e})")
+            return
+        self.invalidations += len(keys)
+
+    async def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.input_changes
+        return {
+            'name': 'predictions',
+            'backend': type(self.backend).__name__,
+            'size': await self._call(len, self.backend),
+            'hits': self.hits,
+            'misses': self.misses,
+            'input_changes': self.input_changes,
+            'coalesced': self.coalesced,
+            'writes': self.writes,
+            'invalidations': self.invalidations,
+            'errors': self.errors,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+def _make_backend():
+    url = os.getenv('PREDICTION_CACHE_REDIS_URL')
+    if url:
+        try:
+            backend = RedisBackend(url)
+            backend.client.ping()
+            logger.info(f"Prediction cache backed by Redis at {url}")
+            return backend
+        except Exception as e:
+            logger.warning(f"Redis prediction cache unavailable ({e}); using in-process cache")
+    return MemoryBackend(int(os.getenv('PREDICTION_CACHE_SIZE', '10000')))
+
+
+prediction_cache = PredictionCache(_make_backend())
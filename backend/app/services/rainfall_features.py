@@ -0,0 +1,215 @@
+import bisect
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .rainfall_store import RainfallStore, from_day_number, to_day_number
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = (1, 3, 7, 30)
+FEATURES = ('rainfall_1d', 'rainfall_3d', 'rainfall_7d', 'rainfall_30d', 'normal_1d', 'departure_1d', 'percentile_3d')
+GROWTH_DAYS = 366
+NO_HISTORY = np.iinfo(np.int64).max
+
+
+def _day_of_year(day_numbers: np.ndarray) -> np.ndarray:
+    """1-based day of year for an array of day numbers."""
+    days = np.asarray(day_numbers).astype('datetime64[D]')
+    return (days - days.astype('datetime64[Y]')).astype(np.int64) + 1
+
+
+class RainfallFeatures:
+    """Rolling-window rainfall features per district, indexed by day.
+
+    Features live in a dense ``(district, day, feature)`` float32 array, so
+    a lookup is a single index operation. For every district and day it
+    holds the 1/3/7/30-day cumulative rainfall, the day-of-year
+    climatological normal, the departure from that normal and the
+    percentile rank of the 3-day total within the district's history.
+
+    Days without a reading count as 0 mm in the windows and are left out of
+    the normals and percentile ranks. ``append`` folds in a new reading by
+    updating only the days whose windows include it, plus the normal and
+    departure of every year's row for the same day of year.
+    """
+
+    def __init__(self, districts: List[Dict], origin: int, rainfall: np.ndarray, observed: np.ndarray):
+        self.districts = districts
+        self._by_name = {d['name'].lower(): code for code, d in enumerate(districts)}
+        self.origin = origin
+        self.rainfall = rainfall
+        self.observed = observed
+        # Districts without any reading have first = NO_HISTORY and last = -1
+        has_history = observed.any(axis=1)
+        self.first = np.where(has_history, observed.argmax(axis=1), NO_HISTORY)
+        self.last = np.where(has_history, observed.shape[1] - 1 - observed[:, ::-1].argmax(axis=1), -1)
+
+        n_districts, n_days = rainfall.shape
+        self.cumulative = np.zeros((n_districts, n_days + 1))
+        np.cumsum(rainfall, axis=1, out=self.cumulative[:, 1:])
+
+        self.doy = _day_of_year(origin + np.arange(n_days))
+        self.normal_sum = np.zeros((n_districts, 367))
+        self.normal_count = np.zeros((n_districts, 367), dtype=np.int64)
+        for code in range(n_districts):
+            mask = observed[code]
+            np.add.at(self.normal_sum[code], self.doy[mask], rainfall[code, mask])
+            np.add.at(self.normal_count[code], self.doy[mask], 1)
+
+        self.table = np.full((n_districts, n_days, len(FEATURES)), np.nan, dtype=np.float32)
+        self._sorted_3d: List[List[float]] = []
+        for code in range(n_districts):
+            self._sorted_3d.append([])
+            if self.last[code] >= 0:
+                lo, hi = int(self.first[code]), int(self.last[code]) + 1
+                self._refresh(code, lo, hi)
+                span = self.table[code, lo:hi, 1]
+                self._sorted_3d[code] = sorted(span.tolist())
+                self.table[code, lo:hi, 6] = np.searchsorted(self._sorted_3d[code], span, side='right') / len(span)
+
+    @classmethod
+    def from_store(cls, store: RainfallStore) -> 'RainfallFeatures':
+        """Lay the store's sparse daily readings out on a dense day grid."""
+        origin = int(store.day.min())
+        n_days = int(store.day.max()) - origin + 1
+        rainfall = np.zeros((len(store.districts), n_days))
+        observed = np.zeros((len(store.districts), n_days), dtype=bool)
+        for code in range(len(store.districts)):
+            series = store.series_for_code(code)
+            idx = series.day - origin
+            rainfall[code, idx] = series.rainfall
+            observed[code, idx] = True
+        return cls(store.districts, origin, rainfall, observed)
+
+    def _refresh(self, code: int, start: int, stop: int) -> None:
+        """Recompute window, normal and departure features for days ``[start, stop)``."""
+        t = np.arange(start, stop)
+        end = self.cumulative[code, t + 1]
+        for k, window in enumerate(WINDOWS):
+            self.table[code, t, k] = end - self.cumulative[code, np.maximum(t + 1 - window, 0)]
+        doy = _day_of_year(self.origin + t)
+        counts = self.normal_count[code, doy]
+        normal = np.divide(self.normal_sum[code, doy], counts, out=np.zeros(len(t)), where=counts > 0)
+        self.table[code, t, 4] = normal
+        self.table[code, t, 5] = self.rainfall[code, t] - normal
+
+    def _refresh_normal(self, code: int, doy: int) -> None:
+        """Recompute normal and departure on every recorded day with day of year ``doy``."""
+        t = np.flatnonzero(self.doy[self.first[code]:self.last[code] + 1] == doy) + self.first[code]
+        count = self.normal_count[code, doy]
+        normal = self.normal_sum[code, doy] / count if count else 0.0
+        self.table[code, t, 4] = normal
+        self.table[code, t, 5] = self.rainfall[code, t] - normal
+
+    def _grow(self, n_days: int) -> None:
+        extra = n_days - self.rainfall.shape[1]
+        self.doy = _day_of_year(self.origin + np.arange(n_days))
+        self.rainfall = np.pad(self.rainfall, ((0, 0), (0, extra)))
+        self.observed = np.pad(self.observed, ((0, 0), (0, extra)))
+        self.cumulative = np.pad(self.cumulative, ((0, 0), (0, extra)), mode='edge')
+        self.table = np.pad(self.table, ((0, 0), (0, extra), (0, 0)), constant_values=np.nan)
+
+    def district_code(self, name: str) -> Optional[int]:
+        return self._by_name.get(name.strip().lower())
+
+    def append(self, district: str, day: date, rainfall_mm: float) -> None:
+        """Fold one day's reading into the windows, normals and ranks.
+
+        A reading for the day after the latest one touches a single row of
+        each structure; a late or corrected reading also refreshes the
+        following days whose windows cover it. Percentile ranks of days
+        outside those windows are not re-ranked.
+        """
+        code = self.district_code(district)
+        if code is None:
+            raise KeyError(f"Unknown district: {district}")
+        t = to_day_number(day) - self.origin
+        if t < 0:
+            raise ValueError(f"{day} is before the start of the rainfall history")
+        if t >= self.rainfall.shape[1]:
+            self._grow(t + GROWTH_DAYS)
+
+        has_history = self.last[code] >= 0
+        start = t if not has_history or t <= self.last[code] else int(self.last[code]) + 1
+        doy = int(self.doy[t])
+        delta = rainfall_mm - self.rainfall[code, t]
+        if self.observed[code, t]:
+            self.normal_sum[code, doy] += delta
+        else:
+            self.normal_sum[code, doy] += rainfall_mm
+            self.normal_count[code, doy] += 1
+            self.observed[code, t] = True
+        self.rainfall[code, t] = rainfall_mm
+        self.first[code] = min(self.first[code], t)
+        self.last[code] = max(self.last[code], t)
+
+        # Windows ending after the last reading never change, so only the
+        # cumulative sums up to it (and the windows over ``t``) are refreshed.
+        last = int(self.last[code])
+        self.cumulative[code, t + 1:last + 2] += delta
+        self.cumulative[code, last + 2:] = self.cumulative[code, last + 1]
+        stop = min(last + 1, t + max(WINDOWS))
+        sorted_3d = self._sorted_3d[code]
+        for day_index in range(start, stop):
+            old = self.table[code, day_index, 1]
+            if not np.isnan(old):
+                del sorted_3d[bisect.bisect_left(sorted_3d, float(old))]
+        self._refresh(code, start, stop)
+        for day_index in range(start, stop):
+            bisect.insort(sorted_3d, float(self.table[code, day_index, 1]))
+        for day_index in range(start, stop):
+            value = float(self.table[code, day_index, 1])
+            self.table[code, day_index, 6] = bisect.bisect_right(sorted_3d, value) / len(sorted_3d)
+        # The day-of-year normal moved for every year, not just the refreshed span
+        self._refresh_normal(code, doy)
+
+    def lookup(self, district: str, day: date) -> Optional[Dict[str, float]]:
+        """Features of ``district`` on ``day``, or None outside its history."""
+        code = self.district_code(district)
+        if code is None:
+            return None
+        t = to_day_number(day) - self.origin
+        if t < self.first[code] or t > self.last[code]:
+            return None
+        return dict(zip(FEATURES, self.table[code, t].tolist()))
+
+    def latest_day(self, district: str) -> Optional[date]:
+        code = self.district_code(district)
+        if code is None or self.last[code] < 0:
+            return None
+        return from_day_number(self.origin + int(self.last[code]))
+
+    def latest(self, district: str) -> Optional[Dict[str, float]]:
+        """Features for the most recent day on record."""
+        day = self.latest_day(district)
+        return self.lookup(district, day) if day else None
+
+    def current(self, district: str, today: Optional[date] = None) -> Optional[Dict[str, float]]:
+        """Features for the most recent day on record, if that is yesterday or later.
+
+        Older records no longer describe the current rain, so callers
+        fall back to a live reading instead.
+        """
+        day = self.latest_day(district)
+        if day is None or to_day_number(day) < to_day_number(today or date.today()) - 1:
+            return None
+        return self.lookup(district, day)
+
+
+_features: Optional[RainfallFeatures] = None
+
+
+def load_rainfall_features(store: Optional[RainfallStore]) -> Optional[RainfallFeatures]:
+    """Precompute the feature table from the rainfall store at startup."""
+    global _features
+    _features = RainfallFeatures.from_store(store) if store is not None else None
+    if _features is not None:
+        logger.info(f"Rainfall features precomputed for {len(_features.districts)} districts")
+    return _features
+
+
+def get_rainfall_features() -> Optional[RainfallFeatures]:
+    return _features
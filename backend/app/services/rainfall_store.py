@@ -0,0 +1,151 @@
+import csv
+import json
+import logging
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+SOURCES = ['IMD', 'NRSC_Corrected']
+
+DEFAULT_CSV_PATH = Path(__file__).resolve().parents[3] / 'data' / 'combined_imd_nrsc_rainfall.csv'
+DEFAULT_STORE_DIR = Path(__file__).resolve().parents[2] / 'data' / 'rainfall_store'
+
+
+def to_day_number(value: date) -> int:
+    """Days since 1970-01-01."""
+    return (value - EPOCH).days
+
+
+def from_day_number(day: int) -> date:
+    return EPOCH + timedelta(days=int(day))
+
+
+def build_rainfall_store(csv_path: Path, out_dir: Path) -> int:
+    """Convert the IMD/NRSC rainfall CSV into the columnar on-disk format.
+
+    Rows are sorted by district then date and written as one ``.npy`` file
+    per column (``district`` uint8, ``day`` int32, ``rainfall`` float32,
+    ``source`` uint8), plus ``index.json`` holding the district names and
+    the ``[start, stop)`` row range of each district.
+
+    Args:
+        csv_path: Path to ``combined_imd_nrsc_rainfall.csv``.
+        out_dir: Directory to write the store into.
+
+    Returns:
+        Number of rows written.
+    """
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        rows = [
+            (row['State'], row['District'], date.fromisoformat(row['Date']), float(row['Avg_rainfall']), row['Source'])
+            for row in csv.DictReader(f)
+        ]
+    rows.sort(key=lambda r: (r[0], r[1], r[2]))
+
+    districts: List[Dict] = []
+    codes: Dict[Tuple[str, str], int] = {}
+    for state, name, *_ in rows:
+        if (state, name) not in codes:
+            codes[(state, name)] = len(districts)
+            districts.append({'name': name, 'state': state})
+    if len(districts) > 255:
+        raise ValueError(f"{len(districts)} districts do not fit the uint8 district code")
+
+    district = np.fromiter((codes[(r[0], r[1])] for r in rows), dtype=np.uint8, count=len(rows))
+    day = np.fromiter((to_day_number(r[2]) for r in rows), dtype=np.int32, count=len(rows))
+    rainfall = np.fromiter((r[3] for r in rows), dtype=np.float32, count=len(rows))
+    source = np.fromiter((SOURCES.index(r[4]) for r in rows), dtype=np.uint8, count=len(rows))
+
+    bounds = np.searchsorted(district, np.arange(len(districts) + 1))
+    for code, entry in enumerate(districts):
+        entry['start'], entry['stop'] = int(bounds[code]), int(bounds[code + 1])
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, column in (('district', district), ('day', day), ('rainfall', rainfall), ('source', source)):
+        np.save(out_dir / f'{name}.npy', column)
+    (out_dir / 'index.json').write_text(
+        json.dumps({'sources': SOURCES, 'districts': districts}, indent=2), encoding='utf-8'
+    )
+    return len(rows)
+
+
+class RainfallSeries:
+    """Zero-copy view of one district's daily rainfall history."""
+
+    __slots__ = ('name', 'state', 'day', 'rainfall', 'source')
+
+    def __init__(self, name: str, state: str, day: np.ndarray, rainfall: np.ndarray, source: np.ndarray):
+        self.name = name
+        self.state = state
+        self.day = day
+        self.rainfall = rainfall
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    def between(self, start: date, end: date) -> 'RainfallSeries':
+        """Rows with ``start <= date <= end``, still as views."""
+        lo, hi = np.searchsorted(self.day, [to_day_number(start), to_day_number(end) + 1])
+        return RainfallSeries(self.name, self.state, self.day[lo:hi], self.rainfall[lo:hi], self.source[lo:hi])
+
+
+class RainfallStore:
+    """Memory-mapped columnar store of the IMD/NRSC district rainfall history."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        index = json.loads((self.path / 'index.json').read_text(encoding='utf-8'))
+        self.sources: List[str] = index['sources']
+        self.districts: List[Dict] = index['districts']
+        self._by_name = {d['name'].lower(): code for code, d in enumerate(self.districts)}
+        self.district = np.load(self.path / 'district.npy', mmap_mode='r')
+        self.day = np.load(self.path / 'day.npy', mmap_mode='r')
+        self.rainfall = np.load(self.path / 'rainfall.npy', mmap_mode='r')
+        self.source = np.load(self.path / 'source.npy', mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    def district_code(self, name: str) -> Optional[int]:
+        return self._by_name.get(name.strip().lower())
+
+    def series(self, name: str) -> Optional[RainfallSeries]:
+        """Return the full history of a district, or None if it is unknown."""
+        code = self.district_code(name)
+        if code is None:
+            return None
+        return self.series_for_code(code)
+
+    def series_for_code(self, code: int) -> RainfallSeries:
+        entry = self.districts[code]
+        window = slice(entry['start'], entry['stop'])
+        return RainfallSeries(
+            entry['name'], entry['state'], self.day[window], self.rainfall[window], self.source[window]
+        )
+
+
+_store: Optional[RainfallStore] = None
+
+
+def load_rainfall_store(path: Optional[Path] = None) -> Optional[RainfallStore]:
+    """Open the store at startup; returns None if it has not been built yet."""
+    global _store
+    path = Path(path or os.getenv('RAINFALL_STORE_DIR', DEFAULT_STORE_DIR))
+    if not (path / 'index.json').exists():
+        logger.warning(f"Rainfall store not found at {path}; run scripts/build_rainfall_store.py")
+        _store = None
+        return None
+    _store = RainfallStore(path)
+    logger.info(f"Rainfall store loaded: {len(_store)} rows, {len(_store.districts)} districts")
+    return _store
+
+
+def get_rainfall_store() -> Optional[RainfallStore]:
+    return _store
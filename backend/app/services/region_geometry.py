@@ -0,0 +1,193 @@
+import gzip
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .region_resolver import RegionResolver
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+class ZoomBand(NamedTuple):
+    name: str
+    max_zoom: Optional[int]
+    tolerance: float
+    precision: int
+
+
+# Tolerance is roughly one screen pixel at the band's highest zoom and
+# coordinates are quantized to a grid no coarser than that tolerance.
+ZOOM_BANDS = (
+    ZoomBand('low', 6, 0.01, 2),
+    ZoomBand('medium', 9, 0.001, 3),
+    ZoomBand('high', None, 0.0001, 4),
+)
+
+
+def zoom_band(zoom: int) -> ZoomBand:
+    for band in ZOOM_BANDS:
+        if band.max_zoom is None or zoom <= band.max_zoom:
+            return band
+    return ZOOM_BANDS[-1]
+
+
+def simplify_ring(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker simplification of a closed ring of (lon, lat) points."""
+    n = len(points)
+    if n <= 4:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end <= start + 1:
+            continue
+        a, b = points[start], points[end]
+        inner = points[start + 1:end]
+        dx, dy = b - a
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distance = np.hypot(inner[:, 0] - a[0], inner[:, 1] - a[1])
+        else:
+            distance = np.abs(dx * (inner[:, 1] - a[1]) - dy * (inner[:, 0] - a[0])) / length
+        i = int(distance.argmax())
+        if distance[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.extend(((start, split), (split, end)))
+    return points[keep]
+
+
+def quantize_ring(points: np.ndarray, precision: int) -> np.ndarray:
+    """Round to ``precision`` decimals and drop consecutive duplicate vertices."""
+    rounded = np.round(points, precision)
+    distinct = np.ones(len(rounded), dtype=bool)
+    distinct[1:] = np.any(rounded[1:] != rounded[:-1], axis=1)
+    return rounded[distinct]
+
+
+def _band_geometry(parts, band: ZoomBand) -> Optional[Dict]:
+    """Simplified, quantized MultiPolygon for one region; tiny parts and holes are dropped."""
+    largest = max(range(len(parts)), key=lambda i: len(parts[i][1][0]))
+    polygons = []
+    for index, (_, rings) in enumerate(parts):
+        polygon = []
+        for ring_index, ring in enumerate(rings):
+            simplified = quantize_ring(simplify_ring(ring, band.tolerance), band.precision)
+            if len(simplified) < 4:
+                if ring_index == 0 and index == largest:
+                    # Never let a region disappear: keep its main outline unsimplified
+                    simplified = quantize_ring(ring, band.precision)
+                elif ring_index == 0:
+                    break
+                else:
+                    continue
+            polygon.append(simplified.tolist())
+        if polygon:
+            polygons.append(polygon)
+    return {'type': 'MultiPolygon', 'coordinates': polygons} if polygons else None
+
+
+class RegionGeometry:
+    """Precomputed per-zoom-band district geometry with risk joined at request time.
+
+    Geometry is simplified and serialized once per band when the region
+    resolver is (re)loaded; a request only merges the current risk into
+    the feature properties. Rendered and compressed bodies are kept per
+    ETag, so repeat requests for unchanged data cost one hash.
+    """
+
+    def __init__(self, resolver: RegionResolver, max_bodies: int = 32):
+        self.resolver = resolver
+        self.max_bodies = max_bodies
+        self._bodies: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self.features: Dict[str, List[Tuple[Optional[int], str, Optional[str], str]]] = {}
+        digest = hashlib.sha1()
+        for band in ZOOM_BANDS:
+            features = []
+            for shape in resolver.shapes:
+                geometry = _band_geometry(shape.parts, band)
+                if geometry is None:
+                    continue
+                encoded = json.dumps(geometry, separators=(',', ':'))
+                region = shape.region
+                features.append((region.region_id, region.name, region.state, encoded))
+                digest.update(encoded.encode())
+            self.features[band.name] = features
+        self.digest = digest.hexdigest()[:16]
+
+    def etag(self, band: ZoomBand, risks: Dict[int, Tuple[str, int]]) -> str:
+        risk_digest = hashlib.sha1(json.dumps(sorted(risks.items())).encode()).hexdigest()[:16]
+        return f'"{band.name}-{self.digest}-{risk_digest}"'
+
+    def render(self, band: ZoomBand, risks: Dict[int, Tuple[str, int]]) -> bytes:
+        """FeatureCollection for ``band`` with each region's current risk in its properties."""
+        parts = []
+        for region_id, name, state, geometry in self.features[band.name]:
+            risk_level, risk_score = risks.get(region_id, (None, None))
+            properties = json.dumps(
+                {'region_id': region_id, 'name': name, 'state': state,
+                 'risk_level': risk_level, 'risk_score': risk_score},
+                separators=(',', ':'),
+            )
+            parts.append(f'{{"type":"Feature","geometry":{geometry},"properties":{properties}}}')
+        return ('{"type":"FeatureCollection","features":[' + ','.join(parts) + ']}').encode()
+
+    def body(self, band: ZoomBand, risks: Dict[int, Tuple[str, int]], encoding: str) -> Tuple[str, bytes]:
+        """ETag and the (possibly compressed) response body for ``band``."""
+        etag = self.etag(band, risks)
+        key = (etag, encoding)
+        cached = self._bodies.get(key)
+        if cached is None:
+            raw = self._bodies.get((etag, 'identity'))
+            if raw is None:
+                raw = self.render(band, risks)
+                self._store((etag, 'identity'), raw)
+            if encoding == 'br':
+                cached = brotli.compress(raw, quality=9)
+            elif encoding == 'gzip':
+                cached = gzip.compress(raw, compresslevel=6)
+            else:
+                cached = raw
+            self._store(key, cached)
+        else:
+            self._bodies.move_to_end(key)
+        return etag, cached
+
+    def _store(self, key: Tuple[str, str], body: bytes) -> None:
+        self._bodies[key] = body
+        while len(self._bodies) > self.max_bodies:
+            self._bodies.popitem(last=False)
+
+
+def choose_encoding(accept_encoding: str) -> str:
+    accepted = {part.split(';')[0].strip().lower() for part in accept_encoding.split(',')}
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return 'identity'
+
+
+_geometry: Optional[RegionGeometry] = None
+
+
+def get_region_geometry(resolver: Optional[RegionResolver]) -> Optional[RegionGeometry]:
+    """Shared geometry for the current resolver, rebuilt after the resolver reloads."""
+    global _geometry
+    if resolver is None:
+        return None
+    if _geometry is None or _geometry.resolver is not resolver:
+        _geometry = RegionGeometry(resolver)
+        logger.info(f"Region geometry simplified for {len(ZOOM_BANDS)} zoom bands")
+    return _geometry
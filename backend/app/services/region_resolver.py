@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import Region
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GEOJSON_PATH = Path(__file__).resolve().parents[3] / 'frontend' / 'public' / 'bihar.geojson'
+GRID_DEGREES = float(os.getenv('REGION_GRID_DEG', '0.25'))
+
+
+class ResolvedRegion(NamedTuple):
+    region_id: Optional[int]
+    name: str
+    state: Optional[str]
+
+
+def _ring_contains(ring: np.ndarray, x: float, y: float) -> bool:
+    """Even-odd ray casting test against one closed ring of (lon, lat) vertices."""
+    xi, yi = ring[:-1, 0], ring[:-1, 1]
+    xj, yj = ring[1:, 0], ring[1:, 1]
+    crosses = (yi > y) != (yj > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_at_y = (xj - xi) * (y - yi) / (yj - yi) + xi
+    return bool(np.count_nonzero(crosses & (x < x_at_y)) % 2)
+
+
+class _Shape:
+    """One region's polygons as NumPy rings plus their bounding boxes."""
+
+    __slots__ = ('region', 'parts', 'bbox')
+
+    def __init__(self, region: ResolvedRegion, geometry: Dict):
+        self.region = region
+        polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        self.parts: List[Tuple[Tuple[float, float, float, float], List[np.ndarray]]] = []
+        for polygon in polygons:
+            rings = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon]
+            outer = rings[0]
+            bbox = (outer[:, 0].min(), outer[:, 1].min(), outer[:, 0].max(), outer[:, 1].max())
+            self.parts.append((bbox, rings))
+        self.bbox = (
+            min(p[0][0] for p in self.parts),
+            min(p[0][1] for p in self.parts),
+            max(p[0][2] for p in self.parts),
+            max(p[0][3] for p in self.parts),
+        )
+
+    def contains(self, lon: float, lat: float) -> bool:
+        for (min_x, min_y, max_x, max_y), rings in self.parts:
+            if not (min_x <= lon <= max_x and min_y <= lat <= max_y):
+                continue
+            # Inside the outer ring and outside every hole
+            if _ring_contains(rings[0], lon, lat) and not any(_ring_contains(h, lon, lat) for h in rings[1:]):
+                return True
+        return False
+
+
+class RegionResolver:
+    """In-memory point-in-polygon lookup from a coordinate to its region.
+
+    Region bounding boxes are bucketed into a uniform lat/lon grid; a lookup
+    only runs the exact ray-casting test against the few shapes whose boxes
+    overlap the point's grid cell.
+    """
+
+    def __init__(self, shapes: Iterable[_Shape], grid_degrees: float = GRID_DEGREES):
+        self.shapes = list(shapes)
+        self.grid_degrees = grid_degrees
+        self.grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for index, shape in enumerate(self.shapes):
+            min_x, min_y, max_x, max_y = shape.bbox
+            for cx in range(self._cell(min_x), self._cell(max_x) + 1):
+                for cy in range(self._cell(min_y), self._cell(max_y) + 1):
+                    self.grid[(cx, cy)].append(index)
+        self.by_region_id = {s.region.region_id: s for s in self.shapes if s.region.region_id is not None}
+
+    def _cell(self, value: float) -> int:
+        return int(np.floor(value / self.grid_degrees))
+
+    def __len__(self) -> int:
+        return len(self.shapes)
+
+    def resolve(self, lat: float, lon: float) -> Optional[ResolvedRegion]:
+        """Region containing the point, or None if it falls outside every region."""
+        for index in self.grid.get((self._cell(lon), self._cell(lat)), ()):
+            shape = self.shapes[index]
+            if shape.contains(lon, lat):
+                return shape.region
+        return None
+
+    def centroid(self, region_id: int) -> Optional[Tuple[float, float]]:
+        """Approximate (lat, lon) centre of a region: the mean of its largest ring's vertices."""
+        shape = self.by_region_id.get(region_id)
+        if shape is None:
+            return None
+        ring = max((rings[0] for _, rings in shape.parts), key=len)
+        return float(ring[:-1, 1].mean()), float(ring[:-1, 0].mean())
+
+    @classmethod
+    def load(cls, db: Optional[Session] = None, geojson_path: Optional[Path] = DEFAULT_GEOJSON_PATH) -> 'RegionResolver':
+        """Build the resolver from ``Region.geometry`` and the district GeoJSON.
+
+        Polygons stored in the database take precedence. GeoJSON features
+        fill in the rest and are linked to a region by district and state
+        name when one exists.
+        """
+        shapes: List[_Shape] = []
+        regions: Dict[Tuple[str, Optional[str]], int] = {}
+        covered = set()
+        if db is not None:
+            rows = db.execute(
+                select(Region.id, Region.name, Region.state, func.ST_AsGeoJSON(Region.geometry))
+            ).all()
+            for region_id, name, state, geometry in rows:
+                regions[(name.lower(), (state or '').lower())] = region_id
+                if geometry:
+                    shapes.append(_Shape(ResolvedRegion(region_id, name, state), json.loads(geometry)))
+                    covered.add(region_id)
+
+        if geojson_path and Path(geojson_path).exists():
+            features = json.loads(Path(geojson_path).read_text(encoding='utf-8'))['features']
+            for feature in features:
+                props = feature.get('properties') or {}
+                name, state = props.get('DISTRICT'), props.get('ST_NM')
+                if not name or not feature.get('geometry'):
+                    continue
+                region_id = regions.get((name.lower(), (state or '').lower()))
+                if region_id in covered:
+                    continue
+                shapes.append(_Shape(ResolvedRegion(region_id, name, state), feature['geometry']))
+        return cls(shapes)
+
+    @staticmethod
+    def version(db: Session) -> Tuple:
+        """Cheap fingerprint of the regions table, used to detect when to reload."""
+        return tuple(db.execute(select(func.count(Region.id), func.max(Region.id), func.max(Region.updated_at))).one())
+
+
+_resolver: Optional[RegionResolver] = None
+_version: Optional[Tuple] = None
+
+
+def load_region_resolver(db: Optional[Session] = None) -> RegionResolver:
+    """(Re)build the shared resolver; falls back to the GeoJSON alone without a database."""
+    global _resolver, _version
+    try:
+        version = RegionResolver.version(db) if db is not None else None
+        resolver = RegionResolver.load(db)
+    except Exception as e:
+        logger.warning(f"Loading regions from the database failed ({e}); using GeoJSON only")
+        version, resolver = None, RegionResolver.load(None)
+    _resolver, _version = resolver, version
+    logger.info(f"Region resolver loaded with {len(resolver)} regions")
+    return resolver
+
+
+def refresh_region_resolver(db: Session) -> bool:
+    """Reload the resolver if regions changed since the last load."""
+    if _resolver is not None and RegionResolver.version(db) == _version:
+        return False
+    load_region_resolver(db)
+    return True
+
+
+def get_region_resolver() -> Optional[RegionResolver]:
+    return _resolver
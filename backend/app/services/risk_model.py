@@ -0,0 +1,265 @@
+import json
+import logging
+import os
+from datetime import date
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .rainfall_features import RainfallFeatures, _day_of_year
+from .rainfall_store import to_day_number
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parents[2] / 'data' / 'risk_model.json'
+MODEL_FEATURES = (
+    'rainfall_1d',
+    'antecedent_3d',
+    'antecedent_7d',
+    'antecedent_30d',
+    'antecedent_departure',
+    'dfsi_percentile',
+    'season_sin',
+    'season_cos',
+)
+LEVELS = np.array(['low', 'medium', 'high'])
+# Used for districts the DFSI table could not be matched to
+DEFAULT_DFSI_PERCENTILE = 0.5
+
+
+def model_inputs(
+    rainfall_1d: np.ndarray,
+    antecedent: np.ndarray,
+    dfsi_percentile: np.ndarray,
+    day_numbers: np.ndarray,
+) -> np.ndarray:
+    """Feature matrix in ``MODEL_FEATURES`` order.
+
+    Args:
+        rainfall_1d: Rainfall today in mm.
+        antecedent: ``(n, 4)`` 3/7/30-day totals and 1-day departure from
+            normal for the windows ending yesterday.
+        dfsi_percentile: DFSI percentile rank, NaN when unknown.
+        day_numbers: Day numbers (days since epoch) of "today".
+    """
+    angle = 2 * np.pi * _day_of_year(day_numbers) / 366.0
+    return np.column_stack([
+        np.log1p(np.asarray(rainfall_1d, dtype=np.float64)),
+        np.log1p(np.maximum(antecedent[:, :3], 0)),
+        np.sign(antecedent[:, 3]) * np.log1p(np.abs(antecedent[:, 3])),
+        np.where(np.isnan(dfsi_percentile), DEFAULT_DFSI_PERCENTILE, dfsi_percentile),
+        np.sin(angle),
+        np.cos(angle),
+    ])
+
+
+def antecedent_features(features: RainfallFeatures, codes: np.ndarray, day_index: np.ndarray) -> np.ndarray:
+    """3/7/30-day totals and departure for the day before ``day_index`` (table columns 1, 2, 3, 5)."""
+    return features.table[codes, day_index - 1][:, [1, 2, 3, 5]].astype(np.float64)
+
+
+def training_examples(
+    features: RainfallFeatures, dfsi_by_code: np.ndarray, label_mm: float, horizon: int = 3
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Labelled examples from the rainfall history.
+
+    A day is positive when rainfall over it and the following
+    ``horizon - 1`` days reaches ``label_mm``, a proxy for flood-producing
+    rain. Only days with 30 days of history before them and every label
+    day observed are used.
+
+    Returns:
+        ``(X, y, day_numbers)``.
+    """
+    rainfall, observed = features.rainfall, features.observed
+    n_days = rainfall.shape[1] - horizon + 1
+    future = sum(rainfall[:, k:k + n_days] for k in range(horizon))
+    labelled = np.ones_like(future, dtype=bool)
+    for k in range(horizon):
+        labelled &= observed[:, k:k + n_days]
+    labelled[:, :30] = False
+    for code in range(rainfall.shape[0]):
+        labelled[code, :int(features.first[code]) + 30] = False
+
+    codes, day_index = np.nonzero(labelled)
+    X = model_inputs(
+        rainfall[codes, day_index],
+        antecedent_features(features, codes, day_index),
+        dfsi_by_code[codes],
+        features.origin + day_index,
+    )
+    y = future[codes, day_index] >= label_mm
+    return X, y, features.origin + day_index
+
+
+def roc_auc(y: np.ndarray, score: np.ndarray) -> float:
+    """Area under the ROC curve (rank statistic, ties averaged)."""
+    order = np.argsort(score, kind='mergesort')
+    ranks = np.empty(len(score))
+    sorted_score = score[order]
+    # Average ranks over tied scores
+    _, start, counts = np.unique(sorted_score, return_index=True, return_counts=True)
+    ranks[order] = np.repeat(start + (counts + 1) / 2.0, counts)
+    positives = y.sum()
+    negatives = len(y) - positives
+    if positives == 0 or negatives == 0:
+        return float('nan')
+    return float((ranks[y].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def classification_metrics(y: np.ndarray, predicted: np.ndarray) -> Dict[str, float]:
+    tp = int((predicted & y).sum())
+    fp = int((predicted & ~y).sum())
+    fn = int((~predicted & y).sum())
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': round(precision, 4), 'recall': round(recall, 4), 'f1': round(f1, 4)}
+
+
+class RiskModel:
+    """Standardized logistic regression over ``MODEL_FEATURES``.
+
+    Scores a whole batch with one matrix-vector product. The flood
+    probability maps to a level through two cut-offs chosen at training
+    time, and ``risk_score`` is the probability in percent.
+    """
+
+    def __init__(
+        self,
+        mean: Sequence[float],
+        scale: Sequence[float],
+        weights: Sequence[float],
+        bias: float,
+        thresholds: Sequence[float],
+        features: Sequence[str] = MODEL_FEATURES,
+        metadata: Optional[Dict] = None,
+    ):
+        self.features = tuple(features)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.metadata = metadata or {}
+
+    @classmethod
+    def fit(
+        cls, X: np.ndarray, y: np.ndarray, l2: float = 1.0, iterations: int = 25
+    ) -> 'RiskModel':
+        """Fit by Newton's method (IRLS) with an L2 penalty on the weights."""
+        mean, scale = X.mean(axis=0), X.std(axis=0)
+        scale[scale == 0] = 1.0
+        Z = np.column_stack([(X - mean) / scale, np.ones(len(X))])
+        beta = np.zeros(Z.shape[1])
+        penalty = np.full(Z.shape[1], l2)
+        penalty[-1] = 0.0
+        for _ in range(iterations):
+            p = 1.0 / (1.0 + np.exp(-(Z @ beta)))
+            gradient = Z.T @ (p - y) + penalty * beta
+            hessian = (Z * (p * (1 - p))[:, None]).T @ Z + np.diag(penalty)
+            step = np.linalg.solve(hessian, gradient)
+            beta -= step
+            if np.abs(step).max() < 1e-8:
+                break
+        return cls(mean, scale, beta[:-1], beta[-1], thresholds=(0.5, 0.5))
+
+    def probability(self, X: np.ndarray) -> np.ndarray:
+        logits = ((X - self.mean) / self.scale) @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def score(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        """Risk level, score and probability for every row of ``X``."""
+        probability = self.probability(X)
+        return {
+            'risk_level': LEVELS[np.searchsorted(self.thresholds, probability, side='right')],
+            'risk_score': np.clip(np.round(probability * 100), 0, 100).astype(np.int64),
+            'probability': probability,
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'model': 'logistic_regression',
+            'features': list(self.features),
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+            'weights': self.weights.tolist(),
+            'bias': self.bias,
+            'thresholds': self.thresholds.tolist(),
+            'metadata': self.metadata,
+        }
+
+    def save(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2), encoding='utf-8')
+
+    @classmethod
+    def load(cls, path: Path) -> 'RiskModel':
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+        if tuple(data['features']) != MODEL_FEATURES:
+            raise ValueError(f"Model features {data['features']} do not match {MODEL_FEATURES}")
+        return cls(
+            data['mean'], data['scale'], data['weights'], data['bias'],
+            data['thresholds'], data['features'], data.get('metadata'),
+        )
+
+
+def region_inputs(
+    features: RainfallFeatures,
+    district_names: Sequence[str],
+    rainfall_1d: np.ndarray,
+    dfsi_percentile: np.ndarray,
+    today: Optional[date] = None,
+    reading_days: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Model inputs for live predictions, with antecedent rain from the history.
+
+    Rows match ``training_examples``: the windows end the day before the
+    reading. ``reading_days`` are the day numbers the readings are for
+    (default: ``today``). A reading for a recorded day, such as the
+    district's latest, uses the windows ending the day before it; a reading
+    past the history is treated as the day that follows its latest day.
+
+    Returns:
+        ``(X, available)``: rows of ``X`` are only meaningful where
+        ``available`` is true, i.e. the region maps to a district with
+        rainfall history.
+    """
+    codes = np.array([
+        code if (code := features.district_code(name)) is not None else -1 for name in district_names
+    ], dtype=np.int64)
+    available = codes >= 0
+    available[available] &= features.last[codes[available]] >= 0
+    safe_codes = np.where(available, codes, 0)
+    last = np.where(available, features.last[safe_codes], 0)
+    if reading_days is None:
+        reading_days = np.full(len(codes), to_day_number(today or date.today()), dtype=np.int64)
+    reading_days = np.asarray(reading_days, dtype=np.int64)
+    day_index = np.clip(reading_days - features.origin, 1, last + 1)
+    antecedent = antecedent_features(features, safe_codes, day_index)
+    X = model_inputs(rainfall_1d, antecedent, dfsi_percentile, reading_days)
+    X[~available] = 0.0
+    return X, available
+
+
+_model: Optional[RiskModel] = None
+
+
+def load_risk_model(path: Optional[Path] = None) -> Optional[RiskModel]:
+    """Load the model artifact at startup; predictions fall back to the rules without it."""
+    global _model
+    path = Path(path or os.getenv('RISK_MODEL_PATH') or DEFAULT_MODEL_PATH)
+    try:
+        _model = RiskModel.load(path)
+        logger.info(f"Risk model loaded from {path}")
+    except FileNotFoundError:
+        _model = None
+        logger.warning(f"Risk model not found at {path}; using rule-based scoring")
+    except (ValueError, KeyError) as e:
+        _model = None
+        logger.warning(f"Risk model at {path} is invalid ({e}); using rule-based scoring")
+    return _model
+
+
+def get_risk_model() -> Optional[RiskModel]:
+    return _model
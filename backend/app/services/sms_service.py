@@ -1,4 +1,5 @@
 import os
+import time
 import logging
 from typing import Optional
 from twilio.rest import Client
@@ -6,6 +7,9 @@ from twilio.base.exceptions import TwilioException
 
 logger = logging.getLogger(__name__)
 
+# Simulated provider round trip for mock mode, so dispatch throughput can be benchmarked locally
+MOCK_LATENCY_SECONDS = float(os.getenv('MOCK_PROVIDER_LATENCY_MS', '0')) / 1000
+
 class SMSService:
     def __init__(self):
         self.account_sid = os.getenv('TWILIO_ACCOUNT_SID')
@@ -25,6 +29,8 @@ class SMSService:
         """
         try:
             if self.mock_enabled or not self.client:
+                if MOCK_LATENCY_SECONDS:
+                    time.sleep(MOCK_LATENCY_SECONDS)
                 logger.info(f"[MOCK SMS] To: {to_number}, Message: {message}")
                 return True
             
@@ -62,6 +68,8 @@ class WhatsAppService:
         """
         try:
             if self.mock_enabled or not self.client:
+                if MOCK_LATENCY_SECONDS:
+                    time.sleep(MOCK_LATENCY_SECONDS)
                 logger.info(f"[MOCK WhatsApp] To: {to_number}, Message: {message}")
                 return True
             
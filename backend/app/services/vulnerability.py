@@ -0,0 +1,200 @@
+import csv
+import difflib
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import RegionVulnerability
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV_PATH = Path(__file__).resolve().parents[3] / 'data' / 'district_flood_severity.csv'
+MATCH_CUTOFF = float(os.getenv('VULNERABILITY_MATCH_CUTOFF', '0.85'))
+# Up to this many risk points are added for the most vulnerable district
+MAX_POINTS = int(os.getenv('VULNERABILITY_MAX_POINTS', '15'))
+# Districts at or above this DFSI percentile move up one risk level
+ESCALATION_PERCENTILE = float(os.getenv('VULNERABILITY_ESCALATION_PERCENTILE', '0.9'))
+
+
+class Vulnerability(NamedTuple):
+    source_name: str
+    dfsi: float
+    dfsi_percentile: float
+    flooded_area_pct: Optional[float]
+    fatalities_per_100k: Optional[float]
+    injuries_per_100k: Optional[float]
+    flood_duration: Optional[float]
+
+    @property
+    def points(self) -> int:
+        return int(round(MAX_POINTS * self.dfsi_percentile))
+
+    @property
+    def escalates(self) -> bool:
+        return self.dfsi_percentile >= ESCALATION_PERCENTILE
+
+    def factors(self) -> Dict[str, float | str]:
+        """Flat factor entries for ``PredictionResponse.factors``."""
+        values = {
+            'vulnerability_source': self.source_name,
+            'dfsi': self.dfsi,
+            'dfsi_percentile': self.dfsi_percentile,
+            'flooded_area_pct': self.flooded_area_pct,
+            'fatalities_per_100k': self.fatalities_per_100k,
+            'injuries_per_100k': self.injuries_per_100k,
+            'flood_duration': self.flood_duration,
+            'vulnerability_points': self.points,
+        }
+        return {k: v for k, v in values.items() if v is not None}
+
+
+def normalize_district_name(name: str) -> str:
+    """Lower-case, '&' -> 'and', drop bracketed aliases, punctuation and 'district'."""
+    name = re.sub(r'\(.*?\)', ' ', name.lower()).replace('&', ' and ')
+    name = re.sub(r'[^a-z0-9 ]+', ' ', name)
+    name = re.sub(r'\bdistrict\b', ' ', name)
+    return ' '.join(name.split())
+
+
+def _float(value: str) -> Optional[float]:
+    return float(value) if value not in (None, '') else None
+
+
+def read_severity_csv(path: Path = DEFAULT_CSV_PATH) -> List[Dict]:
+    """Rows of the DFSI CSV with each district's percentile rank of DFSI."""
+    with Path(path).open(newline='', encoding='utf-8') as f:
+        rows = [
+            {
+                'source_name': ' '.join(row['Dist_Name'].split()),
+                'dfsi': float(row['DFSI']),
+                'flooded_area_pct': _float(row.get('Corrected_Percent_Flooded_Area')),
+                'fatalities_per_100k': _float(row.get('Fatalities_Per_100k')),
+                'injuries_per_100k': _float(row.get('Injuries_Per_100k')),
+                'flood_duration': _float(row.get('Normalized_Flood_Duration')),
+            }
+            for row in csv.DictReader(f)
+            if row.get('Dist_Name') and row.get('DFSI')
+        ]
+    # DFSI is heavily skewed (median ~1, max ~500), so rank rather than scale it
+    dfsi = np.array([row['dfsi'] for row in rows])
+    ranks = np.searchsorted(np.sort(dfsi), dfsi, side='right') / len(dfsi)
+    for row, rank in zip(rows, ranks):
+        row['dfsi_percentile'] = float(rank)
+    return rows
+
+
+def match_regions(
+    regions: Iterable[Tuple[int, str]], rows: List[Dict], cutoff: float = MATCH_CUTOFF
+) -> Tuple[List[Dict], List[str]]:
+    """Fuzzy-match region names to severity rows.
+
+    Exact matches on the normalized name win; otherwise the closest name
+    above ``cutoff`` (difflib ratio) is used. Names that occur more than
+    once in the CSV (same district name in two states) are ambiguous and
+    never matched.
+
+    Returns:
+        Matched rows with ``region_id`` and ``match_score`` set, and the
+        names of regions left unmatched.
+    """
+    by_name: Dict[str, List[Dict]] = {}
+    for row in rows:
+        by_name.setdefault(normalize_district_name(row['source_name']), []).append(row)
+    names = list(by_name)
+
+    matched, unmatched = [], []
+    for region_id, region_name in regions:
+        key = normalize_district_name(region_name)
+        score = 1.0
+        if key not in by_name:
+            close = difflib.get_close_matches(key, names, n=1, cutoff=cutoff)
+            if not close:
+                unmatched.append(region_name)
+                continue
+            score = difflib.SequenceMatcher(None, key, close[0]).ratio()
+            key = close[0]
+        if len(by_name[key]) > 1:
+            unmatched.append(region_name)
+            continue
+        matched.append({**by_name[key][0], 'region_id': region_id, 'match_score': round(score, 4)})
+    return matched, unmatched
+
+
+class VulnerabilityIndex:
+    """In-memory region -> vulnerability map for O(1) scoring lookups.
+
+    ``percentiles`` serves the batch engine with a vectorized lookup over
+    a sorted region id array.
+    """
+
+    def __init__(self, by_region: Dict[int, Vulnerability]):
+        self.by_region = by_region
+        self._ids = np.array(sorted(by_region), dtype=np.int64)
+        self._percentiles = np.array([by_region[i].dfsi_percentile for i in self._ids], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.by_region)
+
+    def get(self, region_id: int) -> Optional[Vulnerability]:
+        return self.by_region.get(region_id)
+
+    def percentiles(self, region_ids: np.ndarray) -> np.ndarray:
+        """DFSI percentile per region id, NaN where a region has no match."""
+        region_ids = np.asarray(region_ids, dtype=np.int64)
+        out = np.full(len(region_ids), np.nan)
+        if len(self._ids):
+            pos = np.minimum(np.searchsorted(self._ids, region_ids), len(self._ids) - 1)
+            found = self._ids[pos] == region_ids
+            out[found] = self._percentiles[pos[found]]
+        return out
+
+    @classmethod
+    def load(cls, db: Session) -> 'VulnerabilityIndex':
+        rows = db.scalars(select(RegionVulnerability)).all()
+        return cls({
+            row.region_id: Vulnerability(
+                row.source_name, row.dfsi, row.dfsi_percentile, row.flooded_area_pct,
+                row.fatalities_per_100k, row.injuries_per_100k, row.flood_duration,
+            )
+            for row in rows
+        })
+
+    @staticmethod
+    def version(db: Session) -> Tuple:
+        return tuple(db.execute(
+            select(func.count(RegionVulnerability.region_id), func.max(RegionVulnerability.updated_at))
+        ).one())
+
+
+_index: Optional[VulnerabilityIndex] = None
+_version: Optional[Tuple] = None
+
+
+def load_vulnerability_index(db: Session) -> Optional[VulnerabilityIndex]:
+    """Load the shared index; scoring runs on hazard alone if this fails."""
+    global _index, _version
+    try:
+        _version = VulnerabilityIndex.version(db)
+        _index = VulnerabilityIndex.load(db)
+        logger.info(f"Vulnerability index loaded for {len(_index)} regions")
+    except Exception as e:
+        logger.warning(f"Vulnerability index unavailable: {e}")
+    return _index
+
+
+def refresh_vulnerability_index(db: Session) -> bool:
+    """Reload the index if region_vulnerability changed since the last load."""
+    if _index is not None and VulnerabilityIndex.version(db) == _version:
+        return False
+    load_vulnerability_index(db)
+    return True
+
+
+def get_vulnerability_index() -> Optional[VulnerabilityIndex]:
+    return _index
@@ -1,16 +1,65 @@
-import requests
+import asyncio
 import json
+import os
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Awaitable, Dict, List, Optional, Tuple
 from fastapi import HTTPException
 import logging
 
+from .cache import AsyncTTLCache, register_cache
+from .http_client import UpstreamClient
+from .rainfall_features import get_rainfall_features
+
 logger = logging.getLogger(__name__)
 
+# Upstream APIs are only called when explicitly enabled; otherwise responses are simulated
+LIVE_API_ENABLED = os.getenv('WEATHER_LIVE_API', 'false').lower() == 'true'
+
+# Nowcasts are shared by every request that falls in the same grid cell
+GRID_DEGREES = float(os.getenv('WEATHER_CACHE_GRID_DEG', '0.05'))
+
+nowcast_cache = register_cache(AsyncTTLCache(
+    'imd_nowcast',
+    ttl=float(os.getenv('IMD_NOWCAST_TTL_SECONDS', '300')),
+    stale_ttl=float(os.getenv('IMD_NOWCAST_STALE_SECONDS', '600')),
+    maxsize=int(os.getenv('IMD_NOWCAST_CACHE_SIZE', '4096')),
+))
+water_level_cache = register_cache(AsyncTTLCache(
+    'cwc_water_level',
+    ttl=float(os.getenv('CWC_WATER_LEVEL_TTL_SECONDS', '900')),
+    stale_ttl=float(os.getenv('CWC_WATER_LEVEL_STALE_SECONDS', '900')),
+    maxsize=int(os.getenv('CWC_STATION_CACHE_SIZE', '2048')),
+))
+flood_forecast_cache = register_cache(AsyncTTLCache(
+    'cwc_flood_forecast',
+    ttl=float(os.getenv('CWC_FORECAST_TTL_SECONDS', '3600')),
+    stale_ttl=float(os.getenv('CWC_FORECAST_STALE_SECONDS', '3600')),
+    maxsize=int(os.getenv('CWC_BASIN_CACHE_SIZE', '512')),
+))
+
+
+# Per-source deadlines for the comprehensive fan-out; a slow source is dropped, not awaited
+SOURCE_DEADLINES = {
+    'nowcast': float(os.getenv('IMD_NOWCAST_DEADLINE_SECONDS', '3')),
+    'water_level': float(os.getenv('CWC_WATER_LEVEL_DEADLINE_SECONDS', '3')),
+    'flood_forecast': float(os.getenv('CWC_FORECAST_DEADLINE_SECONDS', '5')),
+    'rainfall_history': float(os.getenv('IMD_RAINFALL_DEADLINE_SECONDS', '5')),
+}
+
+
+def grid_cell(lat: float, lon: float) -> Tuple[float, float]:
+    """Snap a coordinate to the centre of its nowcast cache cell"""
+    return (
+        round(round(lat / GRID_DEGREES) * GRID_DEGREES, 4),
+        round(round(lon / GRID_DEGREES) * GRID_DEGREES, 4),
+    )
+
 class IMDWeatherService:
     """Service for integrating with India Meteorological Department (IMD) APIs"""
     
-    def __init__(self):
+    def __init__(self, http: Optional[UpstreamClient] = None):
+        self.http = http
         # IMD API endpoints (these would need to be updated with actual endpoints)
         self.base_url = "https://mausam.imd.gov.in/api"
         self.nowcast_url = f"{self.base_url}/nowcast"
@@ -20,7 +69,13 @@ class IMDWeatherService:
         """
         Get nowcast data from IMD for a specific location
         Nowcast provides short-term weather predictions (0-6 hours)
+        Responses are cached per grid cell and shared across requests
         """
+        cell = grid_cell(lat, lon)
+        return await nowcast_cache.get_or_fetch(cell, lambda: self._fetch_nowcast_data(*cell))
+    
+    async def _fetch_nowcast_data(self, lat: float, lon: float) -> Dict:
+        """Fetch nowcast data for a grid cell from IMD"""
         try:
             # IMD API call for nowcast data
             params = {
@@ -29,10 +84,10 @@ class IMDWeatherService:
                 'format': 'json'
             }
             
-            # For demo purposes, we'll simulate the API response
-            # In production, this would be the actual API call
-            # response = requests.get(self.nowcast_url, params=params, timeout=10)
+            if self.http and LIVE_API_ENABLED:
+                return await self.http.get_json(self.nowcast_url, params=params)
             
+            # For demo purposes, we'll simulate the API response
             # Simulated IMD nowcast response
             nowcast_data = {
                 'timestamp': datetime.now().isoformat(),
@@ -59,11 +114,22 @@ class IMDWeatherService:
             logger.error(f"Error fetching IMD nowcast data: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to fetch IMD nowcast data")
     
-    async def get_rainfall_data(self, lat: float, lon: float, days: int = 7) -> Dict:
+    async def get_rainfall_data(self, lat: float, lon: float, days: int = 7, district: Optional[str] = None) -> Dict:
         """
         Get historical rainfall data from IMD
+        When a district is given and the rainfall history is loaded, the
+        last ``days`` days on record come from the precomputed features
         """
         try:
+            features = get_rainfall_features()
+            if district and features and features.latest_day(district):
+                return self._recorded_rainfall(features, lat, lon, days, district)
+            
+            if self.http and LIVE_API_ENABLED:
+                return await self.http.get_json(
+                    self.rainfall_url, params={'lat': lat, 'lon': lon, 'days': days, 'format': 'json'}
+                )
+
             # Simulated historical rainfall data
             rainfall_data = {
                 'location': {'lat': lat, 'lon': lon},
@@ -86,6 +152,34 @@ class IMDWeatherService:
             logger.error(f"Error fetching IMD rainfall data: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to fetch IMD rainfall data")
     
+    def _recorded_rainfall(self, features, lat: float, lon: float, days: int, district: str) -> Dict:
+        """Build the rainfall response from the district's recorded history"""
+        as_of = features.latest_day(district)
+        rainfall_data = {
+            'location': {'lat': lat, 'lon': lon},
+            'district': district,
+            'period': f"Last {days} days",
+            'as_of': as_of.strftime('%Y-%m-%d'),
+            'data': []
+        }
+        for i in range(days):
+            date = as_of - timedelta(days=i)
+            row = features.lookup(district, date)
+            if row is None:
+                break
+            normal = row['normal_1d']
+            rainfall_data['data'].append({
+                'date': date.strftime('%Y-%m-%d'),
+                'rainfall_mm': round(row['rainfall_1d'], 1),
+                'normal_mm': round(normal, 1),
+                'departure_percent': round(row['departure_1d'] / normal * 100, 1) if normal > 0 else None,
+                'rainfall_3d_mm': round(row['rainfall_3d'], 1),
+                'rainfall_7d_mm': round(row['rainfall_7d'], 1),
+                'rainfall_30d_mm': round(row['rainfall_30d'], 1),
+                'percentile_3d': round(row['percentile_3d'], 3)
+            })
+        return rainfall_data
+    
     def _simulate_rainfall(self, hours: int = 1) -> float:
         """Simulate rainfall data for demo purposes"""
         import random
@@ -137,7 +231,8 @@ class IMDWeatherService:
 class CWCService:
     """Service for integrating with Central Water Commission (CWC) APIs"""
     
-    def __init__(self):
+    def __init__(self, http: Optional[UpstreamClient] = None):
+        self.http = http
         # CWC API endpoints (these would need to be updated with actual endpoints)
         self.base_url = "https://cwc.gov.in/api"
         self.water_level_url = f"{self.base_url}/water-level"
@@ -146,8 +241,18 @@ class CWCService:
     async def get_water_level_data(self, station_id: str) -> Dict:
         """
         Get real-time water level data from CWC monitoring stations
+        Responses are cached per station and shared across requests
         """
+        return await water_level_cache.get_or_fetch(
+            station_id, lambda: self._fetch_water_level_data(station_id)
+        )
+    
+    async def _fetch_water_level_data(self, station_id: str) -> Dict:
+        """Fetch water level data for a station from CWC"""
         try:
+            if self.http and LIVE_API_ENABLED:
+                return await self.http.get_json(self.water_level_url, params={'station_id': station_id})
+            
             # Simulated CWC water level data
             water_level_data = {
                 'station_id': station_id,
@@ -175,8 +280,18 @@ class CWCService:
     async def get_flood_forecast(self, basin_id: str) -> Dict:
         """
         Get flood forecast data from CWC
+        Responses are cached per river basin and shared across requests
         """
+        return await flood_forecast_cache.get_or_fetch(
+            basin_id, lambda: self._fetch_flood_forecast(basin_id)
+        )
+    
+    async def _fetch_flood_forecast(self, basin_id: str) -> Dict:
+        """Fetch the flood forecast for a river basin from CWC"""
         try:
+            if self.http and LIVE_API_ENABLED:
+                return await self.http.get_json(self.flood_forecast_url, params={'basin_id': basin_id})
+            
             # Simulated CWC flood forecast data
             forecast_data = {
                 'basin_id': basin_id,
@@ -262,22 +377,45 @@ class CWCService:
 class IntegratedWeatherService:
     """Main service that integrates IMD and CWC data for comprehensive flood prediction"""
     
-    def __init__(self):
-        self.imd_service = IMDWeatherService()
-        self.cwc_service = CWCService()
+    def __init__(self, imd_service: Optional[IMDWeatherService] = None, cwc_service: Optional[CWCService] = None):
+        self.imd_service = imd_service or IMDWeatherService()
+        self.cwc_service = cwc_service or CWCService()
     
-    async def get_comprehensive_flood_data(self, lat: float, lon: float, station_id: str = None) -> Dict:
+    async def get_comprehensive_flood_data(
+        self,
+        lat: float,
+        lon: float,
+        station_id: str = None,
+        basin_id: str = None,
+        district: str = None
+    ) -> Dict:
         """
         Get comprehensive flood prediction data by combining IMD and CWC data
+        All upstream sources are fetched concurrently, each under its own
+        deadline. A source that times out or fails is reported in
+        ``sources`` and left out of the assessment instead of failing the
+        whole response, so latency is bounded by the slowest deadline
         """
         try:
-            # Get IMD nowcast data
-            imd_data = await self.imd_service.get_nowcast_data(lat, lon)
-            
-            # Get CWC water level data (if station_id provided)
-            cwc_data = None
+            pending = {'nowcast': self.imd_service.get_nowcast_data(lat, lon)}
             if station_id:
-                cwc_data = await self.cwc_service.get_water_level_data(station_id)
+                pending['water_level'] = self.cwc_service.get_water_level_data(station_id)
+            if basin_id:
+                pending['flood_forecast'] = self.cwc_service.get_flood_forecast(basin_id)
+            pending['rainfall_history'] = self.imd_service.get_rainfall_data(lat, lon, 7, district)
+            
+            names = list(pending)
+            outcomes = await asyncio.gather(*(
+                self._fetch_source(name, pending[name], SOURCE_DEADLINES[name]) for name in names
+            ))
+            results = dict(zip(names, outcomes))
+            data = {name: result[0] for name, result in results.items()}
+            sources = {name: result[1] for name, result in results.items()}
+            for name in ('water_level', 'flood_forecast'):
+                sources.setdefault(name, {'status': 'skipped'})
+            
+            imd_data = data.get('nowcast')
+            cwc_data = data.get('water_level')
             
             # Combine data for comprehensive analysis
             comprehensive_data = {
@@ -285,8 +423,12 @@ class IntegratedWeatherService:
                 'location': {'lat': lat, 'lon': lon},
                 'imd_data': imd_data,
                 'cwc_data': cwc_data,
+                'cwc_forecast': data.get('flood_forecast'),
+                'rainfall_history': data.get('rainfall_history'),
                 'flood_risk_assessment': self._assess_flood_risk(imd_data, cwc_data),
-                'recommendations': self._generate_recommendations(imd_data, cwc_data)
+                'recommendations': self._generate_recommendations(imd_data, cwc_data),
+                'sources': sources,
+                'partial': any(source['status'] in ('timeout', 'error') for source in sources.values())
             }
             
             return comprehensive_data
@@ -295,6 +437,20 @@ class IntegratedWeatherService:
             logger.error(f"Error in comprehensive flood data: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to generate comprehensive flood data")
     
+    async def _fetch_source(self, name: str, request: Awaitable, deadline: float) -> Tuple[Optional[Dict], Dict]:
+        """Await one upstream source, returning its data (or None) and a status entry"""
+        start = time.perf_counter()
+        try:
+            data = await asyncio.wait_for(request, timeout=deadline)
+            status = 'ok'
+        except asyncio.TimeoutError:
+            logger.warning(f"{name} did not respond within {deadline}s; continuing without it")
+            data, status = None, 'timeout'
+        except Exception as e:
+            logger.warning(f"{name} failed: {e}; continuing without it")
+            data, status = None, 'error'
+        return data, {'status': status, 'latency_ms': round((time.perf_counter() - start) * 1000, 1)}
+    
     def _assess_flood_risk(self, imd_data: Dict, cwc_data: Dict = None) -> Dict:
         """Assess flood risk based on combined IMD and CWC data"""
         risk_score = 0
@@ -373,7 +529,13 @@ class IntegratedWeatherService:
         return recommendations
 
 
+# Global instances shared by the route handlers
+imd_service = IMDWeatherService()
+cwc_service = CWCService()
+integrated_weather_service = IntegratedWeatherService(imd_service, cwc_service)
 
 
-
-
+def attach_http_client(http: Optional[UpstreamClient]) -> None:
+    """Inject the app-lifetime HTTP client into the shared services"""
+    imd_service.http = http
+    cwc_service.http = http
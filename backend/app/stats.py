@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .schemas import DashboardStats
+
+STATS_CACHE_SECONDS = float(os.getenv("STATS_CACHE_SECONDS", "5"))
+RING_SLOTS = 24 * 60
+
+USERS = "users"
+REGIONS = "regions"
+
+_INCREMENT = text(
+    "INSERT INTO stat_counters (name, value) VALUES (:name, :by) "
+    "ON CONFLICT (name) DO UPDATE SET value = stat_counters.value + EXCLUDED.value"
+)
+# The slot for the current minute is reset when it still holds the same minute of a previous day
+_RECORD_ALERT_MINUTE = text(
+    """
+    INSERT INTO alert_minute_counts (slot, bucket_start, alert_count)
+    SELECT CAST(floor(extract(epoch FROM m) / 60) AS bigint) % :slots, m, :count
+    FROM (SELECT date_trunc('minute', now()::timestamp) AS m) AS minute
+    ON CONFLICT (slot) DO UPDATE SET
+        alert_count = CASE WHEN alert_minute_counts.bucket_start = EXCLUDED.bucket_start
+                           THEN alert_minute_counts.alert_count + EXCLUDED.alert_count
+                           ELSE EXCLUDED.alert_count END,
+        bucket_start = EXCLUDED.bucket_start
+    """
+)
+
+
+def increment(db: Session, name: str, by: int = 1) -> None:
+    """Add ``by`` to a counter; the caller's transaction makes it atomic with the counted rows."""
+    if by:
+        db.execute(_INCREMENT, {"name": name, "by": by})
+
+
+def record_alerts(db: Session, count: int = 1) -> None:
+    """Count sent alerts in the current minute's bucket; the dispatch worker calls it as a job finishes."""
+    db.execute(_RECORD_ALERT_MINUTE, {"slots": RING_SLOTS, "count": count})
+
+
+def read_stats(db: Session) -> DashboardStats:
+    """Counters plus the last 24h of alert buckets: at most a few rows and 1440 buckets, whatever the table sizes."""
+    counters: Dict[str, int] = dict(db.execute(text(
+        "SELECT name, value FROM stat_counters WHERE name IN (:users, :regions)"
+    ), {"users": USERS, "regions": REGIONS}).all())
+    alerts_24h = db.execute(text(
+        "SELECT coalesce(sum(alert_count), 0) FROM alert_minute_counts "
+        "WHERE bucket_start > now()::timestamp - interval '24 hours'"
+    )).scalar()
+    return DashboardStats(
+        total_users=counters.get(USERS, 0),
+        total_regions=counters.get(REGIONS, 0),
+        alerts_sent_24h=int(alerts_24h),
+    )
+
+
+def recount_stats(db: Session) -> DashboardStats:
+    """Rebuild the counters and the alert ring from the source tables (backfill or repair)."""
+    db.execute(text(
+        """
+        INSERT INTO stat_counters (name, value)
+        VALUES (:users, (SELECT count(*) FROM users)),
+               (:regions, (SELECT count(*) FROM regions))
+        ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value
+        """
+    ), {"users": USERS, "regions": REGIONS})
+    db.execute(text("DELETE FROM alert_minute_counts"))
+    db.execute(text(
+        """
+        INSERT INTO alert_minute_counts (slot, bucket_start, alert_count)
+        SELECT CAST(floor(extract(epoch FROM m) / 60) AS bigint) % :slots, m, count(*)
+        FROM (
+            SELECT date_trunc('minute', completed_at) AS m FROM alert_dispatch_jobs
+            WHERE completed_at > now()::timestamp - interval '24 hours' AND sent_count > 0
+        ) AS recent
+        GROUP BY m
+        """
+    ), {"slots": RING_SLOTS})
+    return read_stats(db)
+
+
+_cached: Optional[Tuple[float, DashboardStats]] = None
+_lock = threading.Lock()
+
+
+def dashboard_stats(db: Session) -> DashboardStats:
+    """``read_stats`` cached for STATS_CACHE_SECONDS, so dashboard polling never reaches the database."""
+    global _cached
+    cached = _cached
+    if cached is not None and time.monotonic() - cached[0] < STATS_CACHE_SECONDS:
+        return cached[1]
+    with _lock:
+        cached = _cached
+        if cached is None or time.monotonic() - cached[0] >= STATS_CACHE_SECONDS:
+            cached = (time.monotonic(), read_stats(db))
+            _cached = cached
+    return cached[1]
@@ -0,0 +1,113 @@
+from typing import Iterator, List, Optional
+
+from geoalchemy2 import WKTElement
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.orm import Session
+
+from .models import Region, User
+
+
+def point_element(lat: float, lon: float) -> WKTElement:
+    """Geography point for a user location (PostGIS wants lon, lat)."""
+    return WKTElement(f"POINT({lon} {lat})", srid=4326)
+
+
+def point_geography(lat: float, lon: float):
+    """Geography point expression for spatial predicates against geography columns."""
+    return func.ST_GeogFromText(f"SRID=4326;POINT({float(lon)} {float(lat)})")
+
+
+def region_id_for_point(db: Session, lat: float, lon: float) -> Optional[int]:
+    """Region whose polygon covers the point, found through the GiST index on regions.geometry."""
+    return db.scalar(
+        select(Region.id)
+        .where(func.ST_Covers(Region.geometry, point_geography(lat, lon)))
+        .order_by(Region.id)
+        .limit(1)
+    )
+
+
+def region_id_for_name(db: Session, name: str) -> Optional[int]:
+    return db.scalar(
+        select(Region.id).where(func.lower(Region.name) == name.strip().lower()).order_by(Region.id).limit(1)
+    )
+
+
+def assign_user_region(
+    db: Session,
+    user: User,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    place: Optional[str] = None,
+) -> None:
+    """Set ``user.location`` and the precomputed ``user.region_id``.
+
+    Coordinates win over a place name; a place name is matched against
+    region names when no coordinates are given.
+    """
+    if lat is not None and lon is not None:
+        user.location = point_element(lat, lon)
+        user.region_id = region_id_for_point(db, lat, lon)
+    elif place:
+        user.region_id = region_id_for_name(db, place)
+
+
+def _in_region(region_id: int):
+    # Served by ix_users_region_id_id; users without a region_id are picked up once
+    # scripts/assign_user_regions.py (reassign_user_regions) has run
+    return User.region_id == region_id
+
+
+def region_recipients(db: Session, region_id: int, after_id: int, limit: int) -> List:
+    """One keyset page of opted-in, active users in a region, ordered by id."""
+    return db.execute(
+        select(User.id, User.phone_number, User.sms_alerts, User.whatsapp_alerts)
+        .where(
+            _in_region(region_id),
+            User.id > after_id,
+            User.is_active.is_(True),
+            or_(User.sms_alerts.is_(True), User.whatsapp_alerts.is_(True)),
+        )
+        .order_by(User.id)
+        .limit(limit)
+    ).all()
+
+
+def iter_region_recipients(db: Session, region_id: int, chunk_size: int = 1000) -> Iterator[List]:
+    """Stream a region's recipients in chunks without loading them all."""
+    after_id = 0
+    while True:
+        chunk = region_recipients(db, region_id, after_id, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+        after_id = chunk[-1].id
+
+
+def reassign_user_regions(db: Session) -> int:
+    """Recompute every user's region with one set-based spatial join.
+
+    Run after region geometries change; the caller commits.
+    """
+    result = db.execute(text(
+        """
+        UPDATE users u
+        SET region_id = r.id
+        FROM regions r
+        WHERE u.location IS NOT NULL
+          AND ST_Covers(r.geometry, u.location)
+          AND u.region_id IS DISTINCT FROM r.id
+        """
+    ))
+    cleared = db.execute(text(
+        """
+        UPDATE users u
+        SET region_id = NULL
+        WHERE u.location IS NOT NULL
+          AND u.region_id IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM regions r WHERE r.id = u.region_id AND ST_Covers(r.geometry, u.location)
+          )
+        """
+    ))
+    return result.rowcount + cleared.rowcount
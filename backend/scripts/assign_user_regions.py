@@ -0,0 +1,16 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.targeting import reassign_user_regions
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        changed = reassign_user_regions(db)
+        db.commit()
+        print(f"User regions reassigned ({changed} rows updated).")
+    finally:
+        db.close()
@@ -0,0 +1,56 @@
+"""Benchmark per-request authentication overhead, uncached vs cached.
+
+Issues --users tokens and resolves --requests random ones through:
+- verify_token: HS256 signature and expiry check with python-jose on
+  every request (the previous behaviour)
+- get_current_user: the same, behind the verified-token LRU keyed by
+  token hash
+
+No database is needed: profile fields are loaded lazily and are not
+touched by either path.
+
+Usage:
+    python scripts/bench_auth.py [--users 1000] [--requests 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.auth import create_access_token, get_current_user, token_cache, verify_token
+
+
+def per_call_us(fn, tokens) -> float:
+    start = time.perf_counter()
+    for token in tokens:
+        fn(token)
+    return (time.perf_counter() - start) / len(tokens) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    issued = [create_access_token(f"+91{9000000000 + i}", "citizen") for i in range(args.users)]
+    tokens = [random.choice(issued) for _ in range(args.requests)]
+
+    uncached = per_call_us(verify_token, tokens)
+    token_cache.invalidate()
+    cached = per_call_us(get_current_user, tokens)
+    print(f"{args.users} users, {args.requests} requests")
+    print(f"  jose verify every request : {uncached:8.2f} us/request")
+    print(f"  verified-token cache      : {cached:8.2f} us/request ({uncached / cached:.0f}x, "
+          f"hit ratio {token_cache.stats()['hit_ratio']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Simulate the auto-alert stage through a state-wide surge and compare it with naive alerting.
+
+Regions get noisy 24h rainfall that hovers around the rule thresholds,
+and several upstream updates (nowcast, gauge data, ...) arrive between
+two alerting passes, so levels flap and one region can produce several
+transitions per pass. Midway, a storm pushes --surge-fraction of the
+regions past the threshold within a few ticks. Levels come from
+``BatchPredictionEngine`` and transitions are recorded like
+``record_transitions`` does. Each tick runs ``plan_alerts`` over the
+pending transitions, with the cooldown tracked in memory. No database
+is needed.
+
+Reported against a naive stage that alerts on every transition into the
+threshold level:
+- alerts and messages sent (recipients per region are drawn at random)
+- peak alerts and messages in one pass
+- transitions coalesced, suppressed by the cooldown, and deferred by the surge cap
+- worst delay from a region's first crossing to its alert, in ticks
+- repeat alerts for a region inside the cooldown (must be 0)
+- plan_alerts time per pass
+
+Usage:
+    python scripts/bench_auto_alerts.py --regions 700 --ticks 360 --max-per-pass 100
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.auto_alerts import RISK_RANKS, Trigger, plan_alerts
+from app.prediction import BatchPredictionEngine
+
+
+def rainfall_at(rng, base, tick, args):
+    """24h rainfall per region for one upstream update: baseline noise plus the storm."""
+    rain = base + rng.normal(0, args.noise_mm, len(base))
+    if args.surge_tick <= tick < args.surge_tick + args.surge_ticks:
+        ramp = min(1.0, (tick - args.surge_tick + 1) / 3)
+        rain = rain + args.surge_mask * ramp * args.surge_mm
+    return np.maximum(rain, 0)
+
+
+def simulate(args):
+    rng = np.random.default_rng(args.seed)
+    random.seed(args.seed)
+    engine = BatchPredictionEngine()
+    region_ids = np.arange(1, args.regions + 1)
+    base = rng.uniform(10, 95, args.regions)  # some regions sit right at the 50/100mm edges
+    args.surge_mask = (rng.random(args.regions) < args.surge_fraction).astype(float)
+    recipients = rng.integers(100, 5000, args.regions)
+    limit = RISK_RANKS[args.level]
+    cooldown_ticks = args.cooldown_seconds / args.tick_seconds
+
+    levels = [None] * args.regions
+    pending = []
+    next_id = 1
+    last_alert = {}
+    first_crossing = {}
+    delays = []
+    repeats = 0
+    naive_alerts = naive_messages = 0
+    naive_peak_alerts = naive_peak_messages = 0
+    alerts = messages = coalesced = cooldown = 0
+    peak_alerts = peak_messages = peak_deferred = 0
+    plan_seconds = []
+
+    for tick in range(args.ticks):
+        naive_tick = naive_tick_messages = 0
+        for _ in range(args.updates_per_tick):
+            scored = engine.predict_flood_risk(rainfall_at(rng, base, tick, args))
+            for i, level in enumerate(scored['risk_level']):
+                level = str(level)
+                if level == levels[i]:
+                    continue
+                from_level = levels[i]
+                pending.append(Trigger(next_id, int(region_ids[i]), from_level, level, int(scored['risk_score'][i])))
+                next_id += 1
+                levels[i] = level
+                crossed = (RISK_RANKS[from_level] if from_level else -1) < limit <= RISK_RANKS[level]
+                if crossed:
+                    naive_tick += 1
+                    naive_tick_messages += int(recipients[i])
+                    first_crossing.setdefault(int(region_ids[i]), tick)
+        naive_alerts += naive_tick
+        naive_messages += naive_tick_messages
+        naive_peak_alerts = max(naive_peak_alerts, naive_tick)
+        naive_peak_messages = max(naive_peak_messages, naive_tick_messages)
+
+        recent = {region for region, at in last_alert.items() if tick - at < cooldown_ticks}
+        start = time.perf_counter()
+        plan = plan_alerts(pending, recent, args.level, args.max_per_pass)
+        plan_seconds.append(time.perf_counter() - start)
+        handled = set(plan.handled)
+        pending = [trigger for trigger in pending if trigger.transition_id not in handled]
+
+        tick_messages = 0
+        for alert in plan.alerts:
+            if alert.region_id in last_alert and tick - last_alert[alert.region_id] < cooldown_ticks:
+                repeats += 1
+            last_alert[alert.region_id] = tick
+            tick_messages += int(recipients[alert.region_id - 1])
+            delays.append(tick - first_crossing.pop(alert.region_id, tick))
+        for region_id in list(first_crossing):
+            if region_id in recent or levels[region_id - 1] is None or RISK_RANKS[levels[region_id - 1]] < limit:
+                first_crossing.pop(region_id)  # suppressed or fell back: no alert is owed
+        alerts += len(plan.alerts)
+        messages += tick_messages
+        coalesced += plan.coalesced
+        cooldown += plan.cooldown
+        peak_alerts = max(peak_alerts, len(plan.alerts))
+        peak_messages = max(peak_messages, tick_messages)
+        peak_deferred = max(peak_deferred, plan.deferred)
+
+    print(
+        f"{args.regions} regions, {args.ticks} ticks of {args.tick_seconds:g}s, {args.updates_per_tick} updates/tick, "
+        f"surge of {int(args.surge_mask.sum())} regions at tick {args.surge_tick}"
+    )
+    print(f"transitions recorded: {next_id - 1}")
+    print(f"{'':<22}{'naive':>12}{'auto-alert':>14}")
+    print(f"{'alerts':<22}{naive_alerts:>12}{alerts:>14}")
+    print(f"{'messages':<22}{naive_messages:>12}{messages:>14}")
+    print(f"{'peak alerts/pass':<22}{naive_peak_alerts:>12}{peak_alerts:>14}")
+    print(f"{'peak messages/pass':<22}{naive_peak_messages:>12}{peak_messages:>14}")
+    print(f"coalesced transitions: {coalesced}, cooldown-suppressed regions: {cooldown}, peak deferred: {peak_deferred}")
+    if delays:
+        print(f"crossing-to-alert delay: median {statistics.median(delays):g} ticks, max {max(delays)} ticks")
+    print(f"repeat alerts inside cooldown: {repeats}")
+    plan_seconds.sort()
+    print(
+        f"plan_alerts: p50 {statistics.median(plan_seconds) * 1000:.2f} ms, "
+        f"max {plan_seconds[-1] * 1000:.2f} ms per pass"
+    )
+    assert repeats == 0, "a region was alerted twice inside the cooldown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--regions", type=int, default=700)
+    parser.add_argument("--ticks", type=int, default=360)
+    parser.add_argument("--tick-seconds", type=float, default=60)
+    parser.add_argument("--updates-per-tick", type=int, default=3)
+    parser.add_argument("--noise-mm", type=float, default=8)
+    parser.add_argument("--level", default="high", choices=sorted(RISK_RANKS))
+    parser.add_argument("--cooldown-seconds", type=float, default=21600)
+    parser.add_argument("--max-per-pass", type=int, default=100)
+    parser.add_argument("--surge-tick", type=int, default=120)
+    parser.add_argument("--surge-ticks", type=int, default=90)
+    parser.add_argument("--surge-fraction", type=float, default=0.8)
+    parser.add_argument("--surge-mm", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=7)
+    simulate(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
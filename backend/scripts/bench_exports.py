@@ -0,0 +1,141 @@
+"""Benchmark the streaming exports: throughput and memory over millions of rows.
+
+By default no database is needed: synthetic prediction rows are generated
+chunk by chunk and pushed through the same CSV/NDJSON encoder and gzip
+stage as GET /exports/predictions. With --database the script instead
+streams the real endpoint through a TestClient against DATABASE_URL. Add
+--seed to insert that many predictions first (with generate_series, so
+seeding takes a few seconds).
+
+Resident memory is sampled every few MB of output. If it stays flat, the
+export is streaming rather than buffering.
+
+Usage:
+    python scripts/bench_exports.py --rows 5000000 [--format ndjson] [--no-gzip]
+    python scripts/bench_exports.py --database --seed 5000000
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.exports import EXPORT_CHUNK_ROWS, encode_chunks, gzip_chunks
+
+COLUMNS = ["id", "region_id", "prediction_date", "created_at", "risk_level", "risk_score"]
+LEVELS = ("low", "medium", "high")
+
+
+def rss_mb() -> float:
+    """Current resident set size."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def synthetic_chunks(rows: int, chunk_rows: int):
+    start = datetime(2024, 6, 1)
+    for offset in range(0, rows, chunk_rows):
+        chunk = []
+        for i in range(offset, min(rows, offset + chunk_rows)):
+            created = start + timedelta(seconds=i)
+            chunk.append((i + 1, i % 38 + 1, created.date(), created, LEVELS[i % 3], random.randint(0, 100)))
+        yield chunk
+
+
+def seed_predictions(count: int):
+    from sqlalchemy import text
+
+    from app.database import SessionLocal
+    from app.prediction_history import ensure_partitions
+
+    db = SessionLocal()
+    try:
+        ensure_partitions(db)
+        region_ids = db.execute(text("SELECT array_agg(id) FROM regions")).scalar()
+        if not region_ids:
+            sys.exit("No regions; run scripts/load_regions.py first")
+        db.execute(text(
+            """
+            INSERT INTO flood_predictions (region_id, prediction_date, risk_level, risk_score, created_at)
+            SELECT (:ids)[1 + g % cardinality(CAST(:ids AS int[]))],
+                   (now() - make_interval(secs => g % 86400))::date,
+                   (ARRAY['low', 'medium', 'high'])[1 + g % 3],
+                   g % 101,
+                   now() - make_interval(secs => g % 86400)
+            FROM generate_series(1, :count) AS g
+            """
+        ), {"ids": region_ids, "count": count})
+        db.commit()
+    finally:
+        db.close()
+
+
+def database_stream(fmt: str, use_gzip: bool):
+    """Body chunks of GET /exports/predictions as the client receives them (still compressed)."""
+    from fastapi.testclient import TestClient
+
+    from app.auth import create_access_token
+    from app.main import app
+
+    client = TestClient(app, base_url="http://localhost")
+    headers = {
+        "Authorization": f"Bearer {create_access_token('bench', 'authority')}",
+        "Accept-Encoding": "gzip" if use_gzip else "identity",
+    }
+    with client.stream("GET", "/exports/predictions", params={"format": fmt}, headers=headers) as response:
+        response.raise_for_status()
+        yield from response.iter_raw()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    parser.add_argument("--no-gzip", action="store_true")
+    parser.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    parser.add_argument("--database", action="store_true", help="Stream the real endpoint from DATABASE_URL")
+    parser.add_argument("--seed", type=int, default=0, help="With --database, insert this many predictions first")
+    args = parser.parse_args()
+
+    if args.database:
+        if args.seed:
+            start = time.perf_counter()
+            seed_predictions(args.seed)
+            print(f"Seeded {args.seed} predictions in {time.perf_counter() - start:.1f}s")
+        body = database_stream(args.format, not args.no_gzip)
+        rows = None
+    else:
+        body = encode_chunks(COLUMNS, synthetic_chunks(args.rows, args.chunk_rows), args.format)
+        if not args.no_gzip:
+            body = gzip_chunks(body)
+        rows = args.rows
+
+    baseline = rss_mb()
+    start = time.perf_counter()
+    sent = 0
+    samples = []
+    next_sample = 4 << 20
+    for chunk in body:
+        sent += len(chunk)
+        if sent >= next_sample:
+            samples.append(rss_mb())
+            next_sample = sent + (4 << 20)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.format}{'' if args.no_gzip else '+gzip'}: {sent / 2**20:.1f} MB on the wire in {elapsed:.1f}s")
+    if rows:
+        print(f"  {rows / elapsed:,.0f} rows/s")
+    print(f"  RSS before {baseline:.1f} MB; during export min {min(samples, default=baseline):.1f} / "
+          f"max {max(samples, default=baseline):.1f} MB; peak {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compare cold start and peak RSS of the rainfall store against CSV parsing.
+
+Each loader runs in a fresh interpreter, loads the history and pulls one
+district's series, then reports elapsed time and ``ru_maxrss``.
+
+Usage:
+    python scripts/build_rainfall_store.py
+    python scripts/bench_rainfall_store.py --district Patna
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.rainfall_store import DEFAULT_CSV_PATH, DEFAULT_STORE_DIR
+
+CHILD = r"""
+import csv, json, resource, sys, time
+sys.path.insert(0, {backend!r})
+mode, csv_path, store_dir, district = {args!r}
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if mode == "mmap":
+    from app.services.rainfall_store import RainfallStore
+    store = RainfallStore(store_dir)
+    total = float(store.series(district).rainfall.sum())
+elif mode == "csv":
+    with open(csv_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    total = sum(float(r["Avg_rainfall"]) for r in rows if r["District"] == district)
+else:
+    import pandas as pd
+    frame = pd.read_csv(csv_path, parse_dates=["Date"])
+    total = float(frame.loc[frame["District"] == district, "Avg_rainfall"].sum())
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"ms": elapsed * 1000, "rss_kb": rss, "delta_kb": rss - baseline, "total": total}}))
+"""
+
+
+def run(mode: str, args) -> dict:
+    code = CHILD.format(
+        backend=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        args=(mode, str(args.csv), str(args.store), args.district),
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1]}
+    return json.loads(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=DEFAULT_CSV_PATH)
+    parser.add_argument("--store", default=os.getenv("RAINFALL_STORE_DIR", DEFAULT_STORE_DIR))
+    parser.add_argument("--district", default="Patna")
+    parser.add_argument("--modes", nargs="+", default=["mmap", "csv", "pandas"])
+    args = parser.parse_args()
+
+    print(f"{'loader':>8} {'cold ms':>10} {'peak rss MB':>12} {'load rss MB':>12}")
+    for mode in args.modes:
+        result = run(mode, args)
+        if "error" in result:
+            print(f"{mode:>8} skipped: {result['error']}")
+            continue
+        print(f"{mode:>8} {result['ms']:>10.1f} {result['rss_kb'] / 1024:>12.1f} {result['delta_kb'] / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark coordinate -> region lookups: in-memory resolver vs PostGIS.
+
+Draws random points over the bounding box of the loaded regions and times
+``RegionResolver.resolve`` against a per-point ``ST_Contains`` query on
+``regions.geometry``. Without a reachable database only the in-memory
+resolver (built from frontend/public/bihar.geojson) is timed.
+
+Usage:
+    python scripts/bench_region_resolver.py --points 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from app.database import SessionLocal
+from app.models import Region
+from app.services.region_resolver import RegionResolver
+
+
+def random_points(resolver: RegionResolver, count: int, seed: int):
+    min_x = min(s.bbox[0] for s in resolver.shapes)
+    min_y = min(s.bbox[1] for s in resolver.shapes)
+    max_x = max(s.bbox[2] for s in resolver.shapes)
+    max_y = max(s.bbox[3] for s in resolver.shapes)
+    rng = random.Random(seed)
+    return [(rng.uniform(min_y, max_y), rng.uniform(min_x, max_x)) for _ in range(count)]
+
+
+def time_lookups(lookup, points):
+    """Per-lookup latencies in microseconds plus the results."""
+    latencies, results = [], []
+    for lat, lon in points:
+        start = time.perf_counter()
+        results.append(lookup(lat, lon))
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies, results
+
+
+def report(label: str, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:<22} mean {statistics.fmean(latencies):9.1f}us  p50 {latencies[len(latencies) // 2]:9.1f}us  "
+        f"p99 {p99:9.1f}us  ({len(latencies) / (sum(latencies) / 1e6):,.0f} lookups/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--db-points", type=int, default=2000, help="Points sent to PostGIS (slower)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        try:
+            db.execute(select(func.count(Region.id))).scalar()
+        except Exception as e:
+            print(f"Database unavailable ({e.__class__.__name__}); timing the GeoJSON resolver only")
+            db.rollback()
+            db = None
+
+        start = time.perf_counter()
+        resolver = RegionResolver.load(db)
+        print(f"Loaded {len(resolver)} regions into {len(resolver.grid)} grid cells in {time.perf_counter() - start:.3f}s")
+
+        points = random_points(resolver, args.points, args.seed)
+        latencies, results = time_lookups(resolver.resolve, points)
+        hits = sum(r is not None for r in results)
+        report("in-memory resolver", latencies)
+        print(f"{hits}/{len(points)} points inside a region")
+
+        if db is None:
+            return
+
+        def postgis(lat, lon):
+            point = func.ST_GeogFromText(f"SRID=4326;POINT({lon} {lat})")
+            return db.execute(
+                select(Region.id).where(func.ST_Contains(func.geometry(Region.geometry), func.geometry(point))).limit(1)
+            ).scalar()
+
+        db_points = points[:args.db_points]
+        db_latencies, db_results = time_lookups(postgis, db_points)
+        report("PostGIS ST_Contains", db_latencies)
+
+        mismatches = sum(
+            1 for resolved, region_id in zip(results, db_results)
+            if resolved is not None and resolved.region_id is not None and resolved.region_id != region_id
+        )
+        print(f"{mismatches} disagreements with PostGIS over {len(db_points)} points")
+    finally:
+        if db is not None:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
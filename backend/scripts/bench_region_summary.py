@@ -0,0 +1,112 @@
+"""Benchmark the /dashboard/regions read path as flood_predictions grows.
+
+Seeds ``flood_predictions`` with synthetic rows for every region, rebuilds the
+``region_current_risk`` projection, and times ``admin.region_summaries``
+against the original per-region N+1 loop. Both tables are TRUNCATED between
+sizes, so point DATABASE_URL at a scratch database.
+
+Usage:
+    python scripts/bench_region_summary.py --sizes 10000 100000 1000000 10000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.database import engine, SessionLocal, Base
+from app.models import Region, FloodPrediction
+from app.admin import region_summaries
+from app.prediction_store import rebuild_current_risk
+
+
+def seed(size: int, regions: int):
+    """Replace flood_predictions with ``size`` synthetic rows spread over all regions."""
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE flood_predictions, region_current_risk"))
+        conn.execute(
+            text(
+                """
+                INSERT INTO flood_predictions (region_id, prediction_date, risk_level, risk_score, created_at)
+                SELECT r.id,
+                       current_date,
+                       (ARRAY['low', 'medium', 'high'])[1 + (g % 3)],
+                       g % 100,
+                       now() - (g || ' seconds')::interval
+                FROM generate_series(1, :size) AS g
+                JOIN regions r ON r.id = (SELECT min(id) FROM regions) + (g % :regions)
+                """
+            ),
+            {"size": size, "regions": regions},
+        )
+        conn.execute(text("ANALYZE flood_predictions"))
+    db = SessionLocal()
+    try:
+        rebuild_current_risk(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def legacy_summaries(db, limit: int = 200):
+    """The original N+1 implementation, kept here for comparison."""
+    items = []
+    for r in db.query(Region).limit(limit).all():
+        latest = (
+            db.query(FloodPrediction)
+            .filter(FloodPrediction.region_id == r.id)
+            .order_by(FloodPrediction.created_at.desc())
+            .first()
+        )
+        items.append((r.id, latest.risk_level if latest else None))
+    return items
+
+
+def time_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            fn(db)
+            samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+    return statistics.median(samples)
+
+
+def ensure_regions(count: int) -> int:
+    db = SessionLocal()
+    try:
+        existing = db.query(Region).count()
+        for i in range(existing, count):
+            db.add(Region(name=f"Bench Region {i}", state="Bench"))
+        db.commit()
+        return max(existing, count)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--regions", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    regions = ensure_regions(args.regions)
+
+    print(f"{'rows':>12} {'current ms':>10} {'n+1 ms':>10}")
+    for size in args.sizes:
+        seed(size, regions)
+        current = time_ms(lambda db: region_summaries(db, limit=args.regions), args.repeat)
+        legacy = time_ms(lambda db: legacy_summaries(db, limit=args.regions), max(1, args.repeat // 4))
+        print(f"{size:>12} {current:>10.2f} {legacy:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
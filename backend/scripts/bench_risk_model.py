@@ -0,0 +1,97 @@
+"""Compare the trained risk model with the rule engine: latency and accuracy.
+
+Rebuilds the labelled district-days used for training and scores the
+holdout days (on or after the model's split date) three ways:
+- SimplePredictionEngine, one call per region
+- BatchPredictionEngine, the vectorized rules
+- RiskModel.score, one vectorized call
+
+For each it reports the time per region, plus precision/recall/F1 for the
+"high" and "medium or high" levels and ROC AUC, all against the model's
+label.
+
+Usage:
+    python scripts/train_risk_model.py
+    python scripts/bench_risk_model.py [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.prediction import BatchPredictionEngine, SimplePredictionEngine
+from app.services.rainfall_store import to_day_number
+from app.services.risk_model import classification_metrics, load_risk_model, roc_auc
+from train_risk_model import load_examples
+
+
+def per_region_us(fn, n: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best / n * 1e6
+
+
+def report(label: str, us: float, y: np.ndarray, level: np.ndarray, score: np.ndarray):
+    high = classification_metrics(y, level == "high")
+    elevated = classification_metrics(y, level != "low")
+    print(
+        f"{label:<24} {us:8.3f}us/region  AUC {roc_auc(y, score):.4f}  "
+        f"high P/R/F1 {high['precision']:.3f}/{high['recall']:.3f}/{high['f1']:.3f}  "
+        f"medium+ P/R/F1 {elevated['precision']:.3f}/{elevated['recall']:.3f}/{elevated['f1']:.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--model", default=None, help="Model artifact (default: RISK_MODEL_PATH or data/risk_model.json)")
+    args = parser.parse_args()
+
+    model = load_risk_model(args.model)
+    if model is None:
+        sys.exit("No model artifact; run scripts/train_risk_model.py first")
+    label_mm = float(model.metadata.get("label", "75 mm").split(">=")[-1].split()[0])
+    split = date.fromisoformat(model.metadata.get("split_date", "2023-01-01"))
+
+    X, y, days = load_examples(label_mm)
+    holdout = days >= to_day_number(split)
+    X, y = X[holdout], y[holdout]
+    rainfall_24h = np.expm1(X[:, 0])
+    n = len(y)
+    print(f"{n} holdout district-days from {split} ({y.mean():.2%} positive, label >= {label_mm:g} mm over 3 days)")
+
+    simple = SimplePredictionEngine()
+    simple_results = []
+
+    def run_simple():
+        simple_results[:] = [simple.predict_flood_risk(0, {"rainfall_24h": float(r)}) for r in rainfall_24h]
+
+    us = per_region_us(run_simple, n, max(1, args.repeat // 10))
+    level = np.array([r["risk_level"] for r in simple_results])
+    score = np.array([r["risk_score"] for r in simple_results], dtype=float)
+    report("rules (per region)", us, y, level, score)
+
+    batch = BatchPredictionEngine()
+    us = per_region_us(lambda: batch.predict_flood_risk(rainfall_24h), n, args.repeat)
+    scored = batch.predict_flood_risk(rainfall_24h)
+    report("rules (vectorized)", us, y, scored["risk_level"], scored["risk_score"].astype(float))
+
+    us = per_region_us(lambda: model.score(X), n, args.repeat)
+    scored = model.score(X)
+    report("model (vectorized)", us, y, scored["risk_level"], scored["probability"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Exercise the shared upstream cache against a local fake IMD upstream.
+
+Simulates a crowd of citizens opening the app during an alert and checks
+that identical nowcast lookups collapse into one upstream call per grid
+cell, that expired entries are served stale while a single refresh runs,
+and that the LRU bound holds. Exits non-zero if any expectation fails.
+
+Usage:
+    python scripts/bench_weather_cache.py --requests 5000 --cells 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cache import AsyncTTLCache
+from app.services import weather_service
+from app.services.weather_service import IMDWeatherService, grid_cell
+
+
+class FakeIMDUpstream(IMDWeatherService):
+    """IMD service whose upstream is a local coroutine with fixed latency."""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+
+    async def _fetch_nowcast_data(self, lat: float, lon: float):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return {'location': {'lat': lat, 'lon': lon}, 'nowcast': {'rainfall_6h': random.uniform(0, 100)}}
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"  {'ok ' if ok else 'FAIL'} {label}")
+    return ok
+
+
+async def run(args) -> bool:
+    passed = True
+    cells = [(25.0 + i * 0.1, 85.0) for i in range(args.cells)]
+
+    weather_service.nowcast_cache = AsyncTTLCache('imd_nowcast', ttl=args.ttl, stale_ttl=args.ttl * 10, maxsize=args.cells)
+    upstream = FakeIMDUpstream(args.latency)
+    lookups = [random.choice(cells) for _ in range(args.requests)]
+    start = time.perf_counter()
+    await asyncio.gather(*(upstream.get_nowcast_data(lat + random.uniform(-0.01, 0.01), lon) for lat, lon in lookups))
+    elapsed = time.perf_counter() - start
+    print(f"burst: {args.requests} requests over {args.cells} cells in {elapsed * 1000:.1f} ms, "
+          f"{upstream.calls} upstream calls")
+    print(f"  {weather_service.nowcast_cache.stats()}")
+    passed &= check("one upstream call per grid cell", upstream.calls == len({grid_cell(*c) for c in cells}))
+
+    await asyncio.sleep(args.ttl * 1.5)
+    calls_before = upstream.calls
+    start = time.perf_counter()
+    await asyncio.gather(*(upstream.get_nowcast_data(*cells[0]) for _ in range(100)))
+    stale_ms = (time.perf_counter() - start) * 1000
+    await asyncio.sleep(args.latency * 2)
+    print(f"stale-while-revalidate: 100 requests in {stale_ms:.2f} ms")
+    passed &= check("stale entry served without waiting on upstream", stale_ms < args.latency * 1000)
+    passed &= check("single background refresh", upstream.calls - calls_before == 1)
+
+    extra = (26.5, 86.5)
+    await upstream.get_nowcast_data(*extra)
+    stats = weather_service.nowcast_cache.stats()
+    passed &= check("LRU bound respected", stats['size'] <= args.cells and stats['evictions'] >= 1)
+
+    uncached = FakeIMDUpstream(args.latency)
+    start = time.perf_counter()
+    await asyncio.gather(*(uncached._fetch_nowcast_data(lat, lon) for lat, lon in lookups))
+    print(f"without cache: {uncached.calls} upstream calls in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--cells", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake upstream latency in seconds")
+    parser.add_argument("--ttl", type=float, default=0.5)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.rainfall_store import DEFAULT_CSV_PATH, DEFAULT_STORE_DIR, build_rainfall_store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mapped rainfall history store.")
+    parser.add_argument("--csv", type=Path, default=DEFAULT_CSV_PATH)
+    parser.add_argument("--out", type=Path, default=Path(os.getenv("RAINFALL_STORE_DIR", DEFAULT_STORE_DIR)))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = build_rainfall_store(args.csv, args.out)
+    print(f"Rainfall store built: {rows} rows -> {args.out} ({time.perf_counter() - start:.2f}s)")
@@ -0,0 +1,146 @@
+"""Exercise read-replica routing locally with SQLite files standing in for Postgres.
+
+Creates a primary and two replica databases, each holding a table that
+names it. A third replica URL points at a path that cannot be opened, to
+stand in for a replica that is down. The script then checks, through the
+real app and its read dependencies:
+- round-robin across the healthy replicas, sync and async
+- failover: the broken replica is marked down and skipped
+- read-your-writes: after a POST the client reads from the primary until
+  READ_YOUR_WRITES_SECONDS pass, both for a cookie-carrying browser and
+  for a bearer-token client that never sends cookies back (like the
+  cross-origin frontend); other principals stay on the replicas
+- the primary-only fallback when DATABASE_REPLICA_URLS is empty
+
+Needs aiosqlite (pip install -r requirements-dev.txt). Against real
+containers, set DATABASE_URL and DATABASE_REPLICA_URLS
+instead and hit /dashboard/regions or /health.
+
+Usage:
+    python scripts/check_replica_routing.py
+"""
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+
+def make_database(path: str, name: str) -> str:
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE whoami (name TEXT)")
+        conn.execute("INSERT INTO whoami VALUES (?)", (name,))
+    return f"sqlite:///{path}"
+
+
+def check():
+    from fastapi import Depends
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+
+    from app.auth import create_access_token
+    from app.database import async_replica_router, get_async_read_db, get_read_db
+    from app.main import create_app
+
+    app = create_app()
+
+    def whoami(db=Depends(get_read_db)):
+        return db.execute(text("SELECT name FROM whoami")).scalar()
+
+    async def whoami_async(db=Depends(get_async_read_db)):
+        return (await db.execute(text("SELECT name FROM whoami"))).scalar()
+
+    def write():
+        return {"written": True}
+
+    app.add_api_route("/whoami", whoami)
+    app.add_api_route("/whoami-async", whoami_async)
+    app.add_api_route("/write", write, methods=["POST"])
+
+    client = TestClient(app, base_url="http://localhost")
+    replicas = bool(os.environ.get("DATABASE_REPLICA_URLS"))
+    for path in ("/whoami", "/whoami-async"):
+        served = [client.get(path).json() for _ in range(6)]
+        print(f"{path:<14} reads: {served}")
+        if replicas:
+            assert set(served) == {"replica-1", "replica-2"}, served
+        else:
+            assert set(served) == {"primary"}, served
+
+    if replicas:
+        status = client.get("/health").json()["replicas"]
+        print(f"health: {status}")
+        assert [r["healthy"] for r in status] == [True, False, True], status
+
+        client.post("/write")
+        pinned = [client.get("/whoami").json() for _ in range(3)]
+        print(f"after write:   {pinned}")
+        assert set(pinned) == {"primary"}, pinned
+        time.sleep(float(os.environ["READ_YOUR_WRITES_SECONDS"]) + 0.1)
+        released = [client.get("/whoami").json() for _ in range(2)]
+        print(f"window passed: {released}")
+        assert "primary" not in released, released
+
+        # Bearer clients: a fresh client per request, so no cookie can carry the pin
+        def bearer(subject):
+            return {"Authorization": f"Bearer {create_access_token(subject, 'citizen')}"}
+
+        writer, other = bearer("+910000000001"), bearer("+910000000002")
+        TestClient(app, base_url="http://localhost").post("/write", headers=writer)
+        pinned = [TestClient(app, base_url="http://localhost").get(path, headers=writer).json()
+                  for path in ("/whoami", "/whoami-async")]
+        others = [TestClient(app, base_url="http://localhost").get("/whoami", headers=other).json() for _ in range(2)]
+        print(f"bearer write:  {pinned}, other principal: {others}")
+        assert set(pinned) == {"primary"}, pinned
+        assert "primary" not in others, others
+        time.sleep(float(os.environ["READ_YOUR_WRITES_SECONDS"]) + 0.1)
+        released = [TestClient(app, base_url="http://localhost").get("/whoami", headers=writer).json()
+                    for _ in range(2)]
+        print(f"window passed: {released}")
+        assert "primary" not in released, released
+
+    # aiosqlite keeps a thread per pooled connection; close them so the process can exit
+    async def dispose():
+        for bind in async_replica_router.replicas + [async_replica_router.primary]:
+            await bind.dispose()
+    asyncio.run(dispose())
+    print("OK")
+
+
+def main():
+    if os.environ.get("REPLICA_CHECK_CHILD"):
+        check()
+        return
+
+    directory = tempfile.mkdtemp()
+    primary = make_database(os.path.join(directory, "primary.db"), "primary")
+    replica_1 = make_database(os.path.join(directory, "replica1.db"), "replica-1")
+    replica_2 = make_database(os.path.join(directory, "replica2.db"), "replica-2")
+    unreachable = f"sqlite:///{os.path.join(directory, 'missing', 'replica.db')}"
+
+    base = {
+        **os.environ,
+        "REPLICA_CHECK_CHILD": "1",
+        "DATABASE_URL": primary,
+        "JWT_SECRET": os.environ.get("JWT_SECRET", "replica-check"),
+    }
+    runs = {
+        "with replicas": {
+            "DATABASE_REPLICA_URLS": ",".join([replica_1, unreachable, replica_2]),
+            "READ_YOUR_WRITES_SECONDS": "1",
+        },
+        "primary only": {"DATABASE_REPLICA_URLS": ""},
+    }
+    # Engines are configured at import, so each configuration runs in its own process
+    for label, env in runs.items():
+        print(f"== {label}")
+        subprocess.run([sys.executable, os.path.abspath(__file__)], env={**base, **env}, cwd=BACKEND_DIR, check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,175 @@
+"""Bulk, idempotent region loader.
+
+Streams regions from ``regions.json``, a district GeoJSON (e.g.
+frontend/public/bihar.geojson) or the district list in
+data/district_flood_severity.csv and upserts them in batches with
+``INSERT ... ON CONFLICT (name, state)``. Geometry is stored as a
+MULTIPOLYGON and population is loaded when the source has it. Rows whose
+values have not changed are left untouched, so re-running a load is a
+cheap no-op.
+
+Usage:
+    python scripts/load_regions.py                       # data/regions.json
+    python scripts/load_regions.py ../frontend/public/bihar.geojson ../data/district_flood_severity.csv
+"""
+import argparse
+import csv
 import json
+import os
+import sys
+import time
+from collections import Counter
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from backend.app.database import SessionLocal
-from backend.app.models import Region
+from app.database import SessionLocal
+from app.models import Region
+from app.stats import REGIONS, increment
+
+DEFAULT_PATH = Path(__file__).parent.parent / "data" / "regions.json"
+NAME_KEYS = ("name", "DISTRICT", "district", "Dist_Name", "NAME")
+STATE_KEYS = ("state", "ST_NM", "State", "STATE")
+POPULATION_KEYS = ("population", "Population", "POPULATION")
+
+
+def _clean_name(value) -> Optional[str]:
+    return " ".join(str(value).split()) if value not in (None, "") else None
 
 
-def load_regions(db: Session, path: Path):
+def _first(props: Dict, keys: Iterable[str]):
+    for key in keys:
+        if props.get(key) not in (None, ""):
+            return props[key]
+    return None
+
+
+def _row(props: Dict, geometry: Optional[Dict] = None) -> Optional[Dict]:
+    name = _clean_name(_first(props, NAME_KEYS))
+    if name is None:
+        return None
+    population = _first(props, POPULATION_KEYS)
+    return {
+        "name": name,
+        "state": _clean_name(_first(props, STATE_KEYS)),
+        "population": int(float(population)) if population is not None else None,
+        "geojson": json.dumps(geometry, separators=(",", ":")) if geometry else None,
+    }
+
+
+def read_regions(path: Path) -> Iterator[Dict]:
+    """Yield region rows (name, state, population, geojson) from a JSON, GeoJSON or CSV file."""
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            for props in csv.DictReader(f):
+                row = _row(props)
+                if row is not None:
+                    yield row
+        return
+
     data = json.loads(path.read_text(encoding="utf-8"))
-    for item in data:
-        exists = db.query(Region).filter(Region.name == item["name"]).one_or_none()
-        if exists:
-            continue
-        region = Region(name=item["name"], state=item.get("state"))
-        db.add(region)
-    db.commit()
+    if isinstance(data, dict) and data.get("type") == "FeatureCollection":
+        for feature in data["features"]:
+            row = _row(feature.get("properties") or {}, feature.get("geometry"))
+            if row is not None:
+                yield row
+    else:
+        for item in data:
+            row = _row(item, item.get("geometry"))
+            if row is not None:
+                yield row
+
+
+def fill_missing_states(db: Session, rows: List[Dict]) -> tuple[List[Dict], int]:
+    """Give stateless rows (the severity CSV) the state of the one existing region with that name.
+
+    Names that occur more than once in a stateless source (e.g. Aurangabad,
+    Bihar and Aurangabad, Maharashtra) cannot be told apart and are skipped.
+    """
+    stateless = Counter(row["name"].lower() for row in rows if row["state"] is None)
+    if not stateless:
+        return rows, 0
+    known: Dict[str, Optional[str]] = {}
+    for name, state in db.execute(select(Region.name, Region.state).where(Region.state.is_not(None))):
+        key = name.lower()
+        known[key] = state if key not in known or known[key] == state else None
+    kept, skipped = [], 0
+    for row in rows:
+        if row["state"] is None:
+            key = row["name"].lower()
+            if stateless[key] > 1:
+                skipped += 1
+                continue
+            row["state"] = known.get(key)
+        kept.append(row)
+    return kept, skipped
+
+
+def _upsert_statement():
+    stmt = pg_insert(Region).values(
+        name=bindparam("name"),
+        state=bindparam("state"),
+        population=bindparam("population"),
+        geometry=func.geography(func.ST_Multi(func.ST_SetSRID(func.ST_GeomFromGeoJSON(bindparam("geojson")), 4326))),
+    )
+    # Sources without geometry or population never clear what another source loaded
+    geometry = func.coalesce(stmt.excluded.geometry, Region.geometry)
+    population = func.coalesce(stmt.excluded.population, Region.population)
+    return stmt.on_conflict_do_update(
+        constraint="uq_regions_name_state",
+        set_={"geometry": geometry, "population": population, "updated_at": func.now()},
+        # Only rewrite rows whose values change, so re-runs are no-ops
+        where=or_(
+            Region.population.is_distinct_from(population),
+            func.ST_AsBinary(Region.geometry).is_distinct_from(func.ST_AsBinary(geometry)),
+        ),
+    ).returning(Region.id, literal_column("(xmax = 0)").label("inserted"))
+
+
+def load_regions(db: Session, path: Path, batch_size: int = 500) -> Dict[str, int]:
+    """Upsert every region in ``path`` in batches; the caller commits.
+
+    Returns:
+        Counts of rows read, inserted, updated, unchanged and skipped.
+    """
+    rows, skipped = fill_missing_states(db, list(read_regions(path)))
+    stmt = _upsert_statement()
+    stats = {"read": len(rows) + skipped, "inserted": 0, "updated": 0, "unchanged": 0, "skipped": skipped}
+    for start in range(0, len(rows), batch_size):
+        # ON CONFLICT cannot touch one row twice in a statement: keep the last duplicate
+        batch = list({(r["name"], r["state"]): r for r in rows[start:start + batch_size]}.values())
+        returned = db.execute(stmt, batch).all()
+        inserted = sum(1 for row in returned if row.inserted)
+        stats["inserted"] += inserted
+        stats["updated"] += len(returned) - inserted
+        stats["unchanged"] += len(batch) - len(returned)
+    increment(db, REGIONS, stats["inserted"])
+    return stats
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk upsert regions from JSON, GeoJSON or CSV files")
+    parser.add_argument("paths", nargs="*", type=Path, default=[DEFAULT_PATH])
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
     db = SessionLocal()
     try:
-        load_regions(db, Path(__file__).parent.parent / "data" / "regions.json")
+        for path in args.paths:
+            start = time.perf_counter()
+            stats = load_regions(db, path, args.batch_size)
+            db.commit()
+            elapsed = time.perf_counter() - start
+            print(
+                f"{path.name}: {stats['read']} read, {stats['inserted']} inserted, {stats['updated']} updated, "
+                f"{stats['unchanged']} unchanged, {stats['skipped']} skipped "
+                f"in {elapsed:.2f}s ({stats['read'] / elapsed:,.0f} rows/s)"
+            )
         print("Regions loaded.")
     finally:
         db.close()
-
-
-
-
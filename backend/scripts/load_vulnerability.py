@@ -0,0 +1,63 @@
+"""Match district_flood_severity.csv to regions and load region_vulnerability.
+
+Region names are fuzzy-matched to the CSV's district names once here, so
+scoring only does an in-memory lookup by region id. Re-running replaces
+each region's row.
+
+Usage:
+    python scripts/load_vulnerability.py [--csv ../data/district_flood_severity.csv] [--cutoff 0.85]
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.database import SessionLocal
+from app.models import Region, RegionVulnerability
+from app.services.vulnerability import DEFAULT_CSV_PATH, MATCH_CUTOFF, match_regions, read_severity_csv
+
+COLUMNS = (
+    "source_name", "match_score", "dfsi", "dfsi_percentile", "flooded_area_pct",
+    "fatalities_per_100k", "injuries_per_100k", "flood_duration",
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", type=Path, default=DEFAULT_CSV_PATH)
+    parser.add_argument("--cutoff", type=float, default=MATCH_CUTOFF)
+    args = parser.parse_args()
+
+    rows = read_severity_csv(args.csv)
+    db = SessionLocal()
+    try:
+        regions = db.execute(select(Region.id, Region.name)).all()
+        matched, unmatched = match_regions(regions, rows, args.cutoff)
+        if matched:
+            stmt = pg_insert(RegionVulnerability).values(
+                [{"region_id": m["region_id"], **{c: m[c] for c in COLUMNS}} for m in matched]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[RegionVulnerability.region_id],
+                set_={**{c: stmt.excluded[c] for c in COLUMNS}, "updated_at": func.now()},
+            )
+            db.execute(stmt)
+        db.commit()
+    finally:
+        db.close()
+
+    fuzzy = [m for m in matched if m["match_score"] < 1]
+    print(f"{len(matched)}/{len(regions)} regions matched ({len(fuzzy)} fuzzy) from {len(rows)} districts")
+    for m in fuzzy:
+        print(f"  fuzzy: region {m['region_id']} -> {m['source_name']} ({m['match_score']:.2f})")
+    if unmatched:
+        print(f"Unmatched: {', '.join(unmatched)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Load test the pooled upstream client against a local stub server.
+
+Starts a keep-alive HTTP stub in a background thread that answers every
+request after a fixed delay, then issues the same number of concurrent
+GETs through ``UpstreamClient`` and through blocking ``requests`` calls made
+from the event loop (the pattern the services used before) and reports
+throughput for each.
+
+Usage:
+    python scripts/loadtest_http_client.py --requests 500 --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.http_client import UpstreamClient
+
+BODY = json.dumps({"nowcast": {"rainfall_6h": 12.5}}).encode()
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, latency: float):
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head:
+                break
+            await asyncio.sleep(latency)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(BODY)).encode() + b"\r\nConnection: keep-alive\r\n\r\n" + BODY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+def start_stub(port: int, latency: float) -> threading.Event:
+    ready = threading.Event()
+
+    def serve():
+        async def main():
+            server = await asyncio.start_server(lambda r, w: handle(r, w, latency), "127.0.0.1", port, backlog=1024)
+            ready.set()
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(main())
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return ready
+
+
+async def pooled(url: str, count: int, per_host: int) -> float:
+    client = UpstreamClient(per_host_limit=per_host, max_connections=per_host, max_keepalive=per_host)
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(client.get_json(url, params={"i": i}) for i in range(count)))
+        return time.perf_counter() - start
+    finally:
+        await client.aclose()
+
+
+async def blocking(url: str, count: int) -> float:
+    import requests
+
+    async def call(i):
+        return requests.get(url, params={"i": i}, timeout=10).json()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(count)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub response delay in seconds")
+    parser.add_argument("--per-host", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    start_stub(args.port, args.latency)
+    url = f"http://127.0.0.1:{args.port}/nowcast"
+
+    elapsed = asyncio.run(pooled(url, args.requests, args.per_host))
+    print(f"pooled async client: {args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:.0f} req/s)")
+    blocking_count = min(args.requests, 100)
+    elapsed = asyncio.run(blocking(url, blocking_count))
+    print(f"blocking requests:   {blocking_count} requests in {elapsed:.2f}s ({blocking_count / elapsed:.0f} req/s)")
+
+
+if __name__ == "__main__":
+    main()
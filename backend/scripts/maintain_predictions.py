@@ -0,0 +1,38 @@
+"""Run prediction storage maintenance once: partitions, rollups and retention.
+
+The API runs the same job every PREDICTION_MAINTENANCE_SECONDS; this script
+is for cron or manual runs (e.g. when no API worker is up, or to backfill
+rollups after a bulk import).
+
+Usage:
+    python scripts/maintain_predictions.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.database import SessionLocal
+from app.prediction_history import run_maintenance
+
+
+def main():
+    db = SessionLocal()
+    try:
+        report = run_maintenance(db)
+    finally:
+        db.close()
+    if report is None:
+        print("Another worker is running maintenance; nothing done")
+        return
+    print(f"Partitions created: {', '.join(report['partitions_created']) or 'none'}")
+    print(f"Predictions rolled up: {report['rolled_up']}")
+    print(f"Partitions dropped: {', '.join(report['partitions_dropped']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
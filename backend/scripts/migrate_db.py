@@ -0,0 +1,144 @@
+"""Upgrade an existing database in place to the current schema.
+
+``setup_db.py`` drops and recreates every table, and ``create_all`` (used by
+``start_backend.py``) only creates missing tables: neither converts an
+existing ``flood_predictions`` table to the partitioned layout or adds
+columns to existing tables. This script does both, in one transaction,
+and is safe to re-run:
+
+- adds the columns and indexes introduced since the first schema
+  (users.region_id, regions.updated_at, alerts.region_id,
+  region_current_risk.input_fingerprint / prediction_date,
+  risk_transitions.processed_at /
+  alert_id, the spatial indexes)
+- creates missing tables
+- moves the rows of an unpartitioned ``flood_predictions`` into the
+  monthly partitions, keeping ids, and rebuilds ``region_current_risk``
+
+Run ``assign_user_regions.py`` afterwards so existing users get a region.
+
+Usage:
+    python scripts/migrate_db.py
+"""
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine, Base
+from app.models import User, Region, FloodPrediction, PredictionPayload, PredictionRollup, RollupWatermark, RegionCurrentRisk, RiskTransition, RegionVulnerability, AlertHistory, Alert, StatCounter, AlertMinuteCount, AlertDispatchJob, AlertDelivery
+from app.prediction_history import PARTITION_MONTHS_AHEAD, ensure_partitions
+from app.prediction_store import rebuild_current_risk
+from app.stats import recount_stats
+
+LEGACY_PREDICTIONS = "flood_predictions_unpartitioned"
+
+# Columns added to tables that may predate them; new tables get them from create_all
+ADD_COLUMNS = [
+    "ALTER TABLE IF EXISTS users ADD COLUMN IF NOT EXISTS region_id INTEGER REFERENCES regions(id)",
+    "ALTER TABLE IF EXISTS regions ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT now()",
+    "ALTER TABLE IF EXISTS alerts ADD COLUMN IF NOT EXISTS region_id INTEGER REFERENCES regions(id)",
+    "ALTER TABLE IF EXISTS region_current_risk ADD COLUMN IF NOT EXISTS input_fingerprint VARCHAR(40)",
+    "ALTER TABLE IF EXISTS region_current_risk ADD COLUMN IF NOT EXISTS prediction_date DATE",
+    "ALTER TABLE IF EXISTS risk_transitions ADD COLUMN IF NOT EXISTS processed_at TIMESTAMP",
+    "ALTER TABLE IF EXISTS risk_transitions ADD COLUMN IF NOT EXISTS alert_id INTEGER REFERENCES alerts(id)",
+]
+
+ADD_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_users_region_id_id ON users (region_id, id)",
+    "CREATE INDEX IF NOT EXISTS idx_users_location ON users USING gist (location)",
+    "CREATE INDEX IF NOT EXISTS idx_regions_geometry ON regions USING gist (geometry)",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_region_id ON alerts (region_id)",
+    "CREATE INDEX IF NOT EXISTS ix_flood_predictions_date_id ON flood_predictions (prediction_date, id)",
+    "CREATE INDEX IF NOT EXISTS ix_risk_transitions_pending ON risk_transitions (id) WHERE processed_at IS NULL",
+]
+
+
+def _months_between(start: date, end: date) -> int:
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+def upgrade_regions(conn):
+    """Polygons become multipolygons, and (name, state) becomes unique."""
+    conn.execute(text(
+        "ALTER TABLE regions ALTER COLUMN geometry TYPE geography(MULTIPOLYGON, 4326) "
+        "USING ST_Multi(geometry::geometry)::geography"
+    ))
+    has_constraint = conn.execute(text(
+        "SELECT 1 FROM pg_constraint WHERE conname = 'uq_regions_name_state'"
+    )).scalar()
+    if not has_constraint:
+        conn.execute(text(
+            "ALTER TABLE regions ADD CONSTRAINT uq_regions_name_state UNIQUE NULLS NOT DISTINCT (name, state)"
+        ))
+
+
+def set_aside_unpartitioned_predictions(conn) -> bool:
+    """Rename a plain ``flood_predictions`` (with its sequence and indexes) out of the way of create_all."""
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE relname = 'flood_predictions'")).scalar()
+    if kind != "r":
+        return False
+    conn.execute(text(f"ALTER TABLE flood_predictions RENAME TO {LEGACY_PREDICTIONS}"))
+    conn.execute(text(f"ALTER SEQUENCE IF EXISTS flood_predictions_id_seq RENAME TO {LEGACY_PREDICTIONS}_id_seq"))
+    indexes = conn.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = :table"
+    ), {"table": LEGACY_PREDICTIONS}).scalars().all()
+    for index in indexes:
+        conn.execute(text(f"ALTER INDEX {index} RENAME TO {LEGACY_PREDICTIONS}_{index}"))
+    return True
+
+
+def copy_unpartitioned_predictions(db: Session) -> int:
+    """Fill the partitioned table from the set-aside one, then drop it."""
+    first = db.execute(text(f"SELECT min(prediction_date) FROM {LEGACY_PREDICTIONS}")).scalar()
+    copied = 0
+    if first is not None:
+        ensure_partitions(db, today=first, months_ahead=_months_between(first, date.today()) + PARTITION_MONTHS_AHEAD)
+        copied = db.execute(text(
+            f"""
+            INSERT INTO flood_predictions
+                (id, prediction_date, region_id, risk_level, risk_score, weather_data, created_at)
+            SELECT id, prediction_date, region_id, risk_level, risk_score, weather_data, created_at
+            FROM {LEGACY_PREDICTIONS}
+            """
+        )).rowcount
+        db.execute(text(
+            "SELECT setval(pg_get_serial_sequence('flood_predictions', 'id'), "
+            "(SELECT max(id) FROM flood_predictions))"
+        ))
+    db.execute(text(f"DROP TABLE {LEGACY_PREDICTIONS}"))
+    return copied
+
+
+def main():
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+        for statement in ADD_COLUMNS:
+            conn.execute(text(statement))
+        legacy = set_aside_unpartitioned_predictions(conn)
+        Base.metadata.create_all(bind=conn)
+        upgrade_regions(conn)
+        for statement in ADD_INDEXES:
+            conn.execute(text(statement))
+
+        db = Session(bind=conn)
+        ensure_partitions(db)
+        if legacy:
+            copied = copy_unpartitioned_predictions(db)
+            print(f"Moved {copied} predictions into the partitioned table")
+        rebuild_current_risk(db)
+        recount_stats(db)
+        db.flush()
+    print("Database upgraded. Run scripts/assign_user_regions.py to assign existing users to regions.")
+
+
+if __name__ == "__main__":
+    main()
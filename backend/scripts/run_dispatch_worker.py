@@ -0,0 +1,26 @@
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.dispatch import DISPATCH_WORKERS, start_dispatch_workers, stop_dispatch_workers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run alert dispatch workers outside the API process.")
+    parser.add_argument("--workers", type=int, default=max(1, DISPATCH_WORKERS))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+
+    workers = start_dispatch_workers(args.workers)
+    print(f"Alert dispatch running with {len(workers)} workers. Ctrl+C to stop.")
+    stopped.wait()
+    stop_dispatch_workers(workers)
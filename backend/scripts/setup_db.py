@@ -4,8 +4,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
-from app.database import engine, Base
-from app.models import User, Region, FloodPrediction, AlertHistory, Alert
+from app.database import engine, Base, SessionLocal
+from app.models import User, Region, FloodPrediction, PredictionPayload, PredictionRollup, RollupWatermark, RegionCurrentRisk, RiskTransition, RegionVulnerability, AlertHistory, Alert, StatCounter, AlertMinuteCount, AlertDispatchJob, AlertDelivery
+from app.prediction_history import ensure_partitions
 
 
 def ensure_postgis():
@@ -23,6 +24,13 @@ def init_tables():
     Base.metadata.drop_all(bind=engine)
     # Create all tables defined in Base.metadata
     Base.metadata.create_all(bind=engine)
+    # Partitioned tables only accept rows once their partitions exist
+    db = SessionLocal()
+    try:
+        ensure_partitions(db)
+        db.commit()
+    finally:
+        db.close()
 
 
 if __name__ == "__main__":
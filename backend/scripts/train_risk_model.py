@@ -0,0 +1,110 @@
+"""Train the flood-risk model from the rainfall history and DFSI data.
+
+Builds one example per district-day from the rainfall store. The features
+are the day's rainfall, the antecedent 3/7/30-day totals and departure
+from normal, the district's DFSI percentile and the season. A day is
+labelled positive when the 3-day total starting on it reaches --label-mm,
+a proxy for flood-producing rain. The script fits a logistic regression
+on the days before --split-date and reports holdout metrics on the days
+after. Cut-offs are picked on the training days:
+- medium: recall >= --medium-recall
+- high: best F1
+
+The model is written to a small JSON artifact that the app loads at
+startup.
+
+Usage:
+    python scripts/build_rainfall_store.py
+    python scripts/train_risk_model.py [--label-mm 75] [--out data/risk_model.json]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.rainfall_features import RainfallFeatures
+from app.services.rainfall_store import load_rainfall_store, to_day_number
+from app.services.risk_model import (
+    DEFAULT_MODEL_PATH,
+    RiskModel,
+    classification_metrics,
+    roc_auc,
+    training_examples,
+)
+from app.services.vulnerability import match_regions, read_severity_csv
+
+
+def dfsi_by_district(features: RainfallFeatures) -> np.ndarray:
+    """DFSI percentile per rainfall district code, NaN where no unique match exists."""
+    matched, _ = match_regions(
+        ((code, d['name']) for code, d in enumerate(features.districts)), read_severity_csv()
+    )
+    out = np.full(len(features.districts), np.nan)
+    for m in matched:
+        out[m['region_id']] = m['dfsi_percentile']
+    return out
+
+
+def load_examples(label_mm: float):
+    store = load_rainfall_store()
+    if store is None:
+        sys.exit("Rainfall store missing; run scripts/build_rainfall_store.py first")
+    features = RainfallFeatures.from_store(store)
+    return training_examples(features, dfsi_by_district(features), label_mm)
+
+
+def pick_thresholds(y: np.ndarray, probability: np.ndarray, medium_recall: float):
+    candidates = np.unique(np.round(probability, 4))
+    f1 = [classification_metrics(y, probability >= t)['f1'] for t in candidates]
+    high = float(candidates[int(np.argmax(f1))])
+    recall_ok = [t for t in candidates if classification_metrics(y, probability >= t)['recall'] >= medium_recall]
+    medium = float(max(recall_ok)) if recall_ok else float(candidates[0])
+    return min(medium, high), high
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--label-mm", type=float, default=75.0)
+    parser.add_argument("--split-date", type=date.fromisoformat, default=date(2023, 1, 1))
+    parser.add_argument("--medium-recall", type=float, default=0.9)
+    parser.add_argument("--l2", type=float, default=1.0)
+    parser.add_argument("--out", default=str(DEFAULT_MODEL_PATH))
+    args = parser.parse_args()
+
+    X, y, days = load_examples(args.label_mm)
+    train = days < to_day_number(args.split_date)
+    print(f"{len(y)} examples ({y.mean():.2%} positive), {train.sum()} before {args.split_date}")
+
+    start = time.perf_counter()
+    model = RiskModel.fit(X[train], y[train], l2=args.l2)
+    train_probability = model.probability(X[train])
+    model.thresholds = np.array(pick_thresholds(y[train], train_probability, args.medium_recall))
+    print(f"Fitted in {time.perf_counter() - start:.2f}s; thresholds medium={model.thresholds[0]:.4f} high={model.thresholds[1]:.4f}")
+
+    holdout = model.score(X[~train])
+    metrics = {
+        "examples": int(len(y)),
+        "holdout_examples": int((~train).sum()),
+        "holdout_auc": round(roc_auc(y[~train], holdout["probability"]), 4),
+        "holdout_high": classification_metrics(y[~train], holdout["risk_level"] == "high"),
+        "holdout_medium_or_high": classification_metrics(y[~train], holdout["risk_level"] != "low"),
+    }
+    model.metadata = {
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "label": f"rainfall over 3 days >= {args.label_mm:g} mm",
+        "split_date": args.split_date.isoformat(),
+        "metrics": metrics,
+    }
+    model.save(args.out)
+    for name, value in metrics.items():
+        print(f"  {name}: {value}")
+    print(f"Model written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
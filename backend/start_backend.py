@@ -2,6 +2,9 @@
 """
 AegisFlood Backend Startup Script
 Handles environment setup, database initialization, and server startup
+
+    python start_backend.py              # API server (re-scores regions in its lifespan)
+    python start_backend.py --scheduler  # Prediction re-scoring only; run the API with PREDICTION_SCHEDULER=off
 """
 import os
 import sys
@@ -79,19 +82,47 @@ def check_database():
         return False
 
 def setup_database():
-    """Initialize database tables"""
+    """Initialize database tables
+
+    Only missing tables are created; a database from an earlier version is
+    upgraded with scripts/migrate_db.py.
+    """
     try:
-        from app.database import engine, Base
-        from app.models import User, Region, FloodPrediction, AlertHistory, Alert
+        from app.database import engine, Base, SessionLocal
+        from app.models import User, Region, FloodPrediction, PredictionPayload, PredictionRollup, RollupWatermark, RegionCurrentRisk, RiskTransition, RegionVulnerability, AlertHistory, Alert, StatCounter, AlertMinuteCount, AlertDispatchJob, AlertDelivery
+        from app.prediction_history import ensure_partitions
+        from app.stats import recount_stats
         
         # Create all tables
         Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        try:
+            ensure_partitions(db)
+            # Counters start from the rows already present
+            recount_stats(db)
+            db.commit()
+        finally:
+            db.close()
         print("✓ Database tables initialized")
         return True
     except Exception as e:
         print(f"✗ Database setup failed: {e}")
+        print("  An existing database from an earlier version needs: python scripts/migrate_db.py")
         return False
 
+def build_rainfall_store():
+    """Build the memory-mapped rainfall history store if it is missing"""
+    try:
+        from app.services.rainfall_store import DEFAULT_CSV_PATH, DEFAULT_STORE_DIR, build_rainfall_store as build
+        store_dir = Path(os.getenv('RAINFALL_STORE_DIR', DEFAULT_STORE_DIR))
+        if (store_dir / 'index.json').exists():
+            print("✓ Rainfall store already built")
+            return
+        rows = build(DEFAULT_CSV_PATH, store_dir)
+        print(f"✓ Rainfall store built ({rows} rows)")
+    except Exception as e:
+        print(f"✗ Rainfall store build failed: {e}")
+
 def start_server():
     """Start the FastAPI server"""
     try:
@@ -113,6 +144,22 @@ def start_server():
     except Exception as e:
         print(f"✗ Server startup failed: {e}")
 
+def start_scheduler():
+    """Run the prediction re-scoring scheduler in this process"""
+    try:
+        import asyncio
+        import logging
+        from dotenv import load_dotenv
+        load_dotenv()
+        logging.basicConfig(level=logging.INFO)
+        from app.scheduler import run_standalone
+        print("🗓  Starting AegisFlood prediction scheduler...")
+        asyncio.run(run_standalone())
+    except KeyboardInterrupt:
+        print("\n🛑 Scheduler stopped by user")
+    except Exception as e:
+        print(f"✗ Scheduler startup failed: {e}")
+
 def main():
     """Main startup sequence"""
     print("🌊 AegisFlood Backend Startup")
@@ -145,8 +192,14 @@ def main():
     if not setup_database():
         return
     
-    # Step 4: Start the server
-    start_server()
+    # Step 4: Build the rainfall history store
+    build_rainfall_store()
+    
+    # Step 5: Start the server, or the re-scoring scheduler on its own
+    if '--scheduler' in sys.argv[1:]:
+        start_scheduler()
+    else:
+        start_server()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.auth refuses to import without a secret; nothing here talks to a database
+os.environ.setdefault("JWT_SECRET", "test-secret")
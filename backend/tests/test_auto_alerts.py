@@ -0,0 +1,60 @@
+from app.auto_alerts import Trigger, plan_alerts
+
+
+def test_first_crossing_alerts():
+    plan = plan_alerts([Trigger(1, 10, 'medium', 'high', 80)], set(), 'high', 100)
+    assert [(alert.region_id, alert.risk_level, alert.risk_score) for alert in plan.alerts] == [(10, 'high', 80)]
+    assert plan.handled == [1]
+
+
+def test_first_prediction_counts_as_crossing():
+    plan = plan_alerts([Trigger(1, 10, None, 'high', 80)], set(), 'high', 100)
+    assert [alert.region_id for alert in plan.alerts] == [10]
+
+
+def test_transitions_below_threshold_are_consumed_without_alert():
+    plan = plan_alerts([Trigger(1, 10, 'low', 'medium', 40), Trigger(2, 11, 'high', 'critical', 95)], set(), 'high', 100)
+    assert plan.alerts == []
+    assert sorted(plan.handled) == [1, 2]
+    assert plan.no_crossing == 2
+
+
+def test_region_that_flapped_back_below_is_not_alerted():
+    triggers = [Trigger(1, 10, 'medium', 'high', 80), Trigger(2, 10, 'high', 'medium', 45)]
+    plan = plan_alerts(triggers, set(), 'high', 100)
+    assert plan.alerts == []
+    assert sorted(plan.handled) == [1, 2]
+
+
+def test_transitions_of_a_region_coalesce_into_latest_level():
+    triggers = [
+        Trigger(3, 10, 'high', 'medium', 45),
+        Trigger(1, 10, 'medium', 'high', 80),
+        Trigger(4, 10, 'medium', 'high', 85),
+    ]
+    plan = plan_alerts(triggers, set(), 'high', 100)
+    assert len(plan.alerts) == 1
+    assert (plan.alerts[0].risk_score, plan.alerts[0].transition_ids) == (85, [1, 3, 4])
+    assert plan.coalesced == 2
+
+
+def test_cooldown_suppresses_and_consumes():
+    plan = plan_alerts([Trigger(1, 10, 'medium', 'high', 80)], {10}, 'high', 100)
+    assert plan.alerts == []
+    assert plan.handled == [1]
+    assert plan.cooldown == 1
+
+
+def test_surge_alerts_most_severe_and_defers_the_rest():
+    triggers = [
+        Trigger(1, 10, 'medium', 'high', 70),
+        Trigger(2, 11, 'medium', 'critical', 90),
+        Trigger(3, 12, 'medium', 'high', 85),
+        Trigger(4, 13, 'low', 'medium', 30),
+    ]
+    plan = plan_alerts(triggers, set(), 'high', 2)
+    assert [alert.region_id for alert in plan.alerts] == [11, 12]
+    assert plan.deferred == 1
+    # The deferred region's transition stays pending for the next pass
+    assert 1 not in plan.handled
+    assert sorted(plan.handled) == [2, 3, 4]
@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.services.rainfall_features import RainfallFeatures
+from app.services.rainfall_store import to_day_number
+from app.services.risk_model import antecedent_features, region_inputs, training_examples
+
+ORIGIN = to_day_number(date(2024, 6, 1))
+DFSI = 0.7
+
+
+def make_features(n_days: int = 120) -> RainfallFeatures:
+    rng = np.random.default_rng(3)
+    rainfall = np.round(rng.gamma(0.6, 12.0, (1, n_days)), 2)
+    observed = np.ones((1, n_days), dtype=bool)
+    return RainfallFeatures([{'name': 'Siwan'}], ORIGIN, rainfall, observed)
+
+
+def test_live_row_for_past_day_matches_training_row():
+    features = make_features()
+    X, _, day_numbers = training_examples(features, np.array([DFSI]), label_mm=50.0)
+    for i in (0, len(X) // 2, len(X) - 1):
+        day = int(day_numbers[i])
+        live, available = region_inputs(
+            features, ['Siwan'], np.array([features.rainfall[0, day - ORIGIN]]), np.array([DFSI]),
+            reading_days=np.array([day]),
+        )
+        assert available.all()
+        np.testing.assert_allclose(live[0], X[i])
+
+
+def test_latest_recorded_day_is_not_counted_twice():
+    features = make_features()
+    last = int(features.last[0])
+    live, _ = region_inputs(
+        features, ['Siwan'], np.array([features.rainfall[0, last]]), np.array([DFSI]),
+        reading_days=np.array([ORIGIN + last]),
+    )
+    windows = antecedent_features(features, np.array([0]), np.array([last]))[0]
+    # The 3-day window ends the day before, so it excludes the day's own rain
+    assert np.isclose(live[0, 1], np.log1p(windows[0]))
+    assert np.isclose(windows[0], features.table[0, last - 1, 1])
+
+
+def test_live_reading_after_history_follows_latest_day():
+    features = make_features()
+    last = int(features.last[0])
+    live, _ = region_inputs(features, ['Siwan'], np.array([12.0]), np.array([DFSI]), today=date(2026, 10, 17))
+    assert np.isclose(live[0, 1], np.log1p(features.table[0, last, 1]))
+
+
+def test_current_record_only_while_recent():
+    features = make_features()
+    last_day = features.latest_day('Siwan')
+    assert features.current('Siwan', today=last_day) == features.latest('Siwan')
+    assert features.current('Siwan', today=last_day + timedelta(days=1)) == features.latest('Siwan')
+    # A stale history no longer stands in for today's rain
+    assert features.current('Siwan', today=last_day + timedelta(days=2)) is None
+    assert features.current('Unknown', today=last_day) is None
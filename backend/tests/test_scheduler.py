@@ -0,0 +1,55 @@
+from collections import namedtuple
+from datetime import date
+
+from app.scheduler import RescoreScheduler, scoring_fingerprint
+
+DAY = date(2026, 10, 17)
+GAUGED = {
+    'rainfall_6h': 4.0,
+    'temperature': 29.5,
+    'nowcast_time': '2026-10-17T06:00:00',
+    'rainfall_24h': 62.5,
+    'rainfall_date': '2026-10-16',
+}
+UNGAUGED = {'rainfall_6h': 4.0, 'temperature': 29.5, 'nowcast_time': '2026-10-17T06:00:00', 'rainfall_24h': 16.0}
+
+Row = namedtuple('Row', 'id name input_fingerprint scored_inputs')
+
+
+def test_fingerprint_ignores_temperature_and_nowcast_time():
+    changed = {**GAUGED, 'temperature': 31.0, 'nowcast_time': '2026-10-17T09:00:00'}
+    assert scoring_fingerprint(changed, 0.4, DAY) == scoring_fingerprint(GAUGED, 0.4, DAY)
+
+
+def test_fingerprint_ignores_nowcast_when_gauge_history_exists():
+    assert scoring_fingerprint({**GAUGED, 'rainfall_6h': 12.0}, 0.4, DAY) == scoring_fingerprint(GAUGED, 0.4, DAY)
+
+
+def test_fingerprint_uses_nowcast_without_gauge_history():
+    assert scoring_fingerprint({**UNGAUGED, 'rainfall_6h': 5.0}, 0.4, DAY) != scoring_fingerprint(UNGAUGED, 0.4, DAY)
+
+
+def test_fingerprint_changes_with_scored_values():
+    base = scoring_fingerprint(GAUGED, 0.4, DAY)
+    assert scoring_fingerprint({**GAUGED, 'rainfall_24h': 70.0}, 0.4, DAY) != base
+    assert scoring_fingerprint({**GAUGED, 'rainfall_date': '2026-10-17'}, 0.4, DAY) != base
+    assert scoring_fingerprint(GAUGED, 0.5, DAY) != base
+    assert scoring_fingerprint(GAUGED, 0.4, date(2026, 10, 18)) != base
+
+
+def test_fingerprint_without_dfsi_is_stable():
+    assert scoring_fingerprint(GAUGED, float('nan'), DAY) == scoring_fingerprint(GAUGED, float('nan'), DAY)
+    assert scoring_fingerprint(GAUGED, float('nan'), DAY) != scoring_fingerprint(GAUGED, 0.4, DAY)
+
+
+def test_due_regions_skips_unchanged_and_orders_rising_first():
+    nan = float('nan')
+    regions = [
+        Row(1, 'Unchanged', scoring_fingerprint(GAUGED, nan, DAY), GAUGED),
+        Row(2, 'Slow rise', None, {**GAUGED, 'rainfall_24h': 60.0}),
+        Row(3, 'Steep rise', None, {**GAUGED, 'rainfall_24h': 10.0}),
+        Row(4, 'Never scored', None, None),
+    ]
+    due = RescoreScheduler(processes=0).due_regions(regions, [GAUGED] * len(regions), DAY)
+    assert [region.region_id for region in due] == [3, 2, 4]
+    assert [region.rising for region in due] == [52.5, 2.5, 0.0]
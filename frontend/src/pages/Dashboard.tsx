@@ -2,6 +2,7 @@ import { useState, useEffect, useRef } from 'react'
 import { useAuth } from '../context/AuthContext'
 import { useI18n } from '../context/I18nContext'
 import { useNavigate } from 'react-router-dom'
+import api from '../services/api'
 import Header from '../components/ui/Header'
 import NavigationBar from '../components/ui/NavigationBar'
 import DashboardCard from '../components/ui/DashboardCard'
@@ -178,33 +179,42 @@ export default function Dashboard() {
             // Add layer control
             L.control.layers(baseMaps, overlayMaps, {collapsed: false, position: 'topleft'}).addTo(map)
 
-            // Load GeoJSON data
-            fetch('/bihar.geojson')
-              .then(res => res.json())
+            // Load simplified district boundaries with current risk joined in
+            const riskIndex = (level?: string | null) => {
+              switch (level) {
+                case 'minimal': case 'low': return 0
+                case 'medium': case 'moderate': return 1
+                case 'high': case 'critical': return 2
+                default: return -1
+              }
+            }
+            fetch(`${api.defaults.baseURL}/dashboard/regions/geometry?zoom=${map.getZoom()}`)
+              .then(res => res.ok ? res.json() : fetch('/bihar.geojson').then(r => r.json()))
               .then(data => {
+                const riskColors = ["#27ae60", "#f39c12", "#e74c3c"] // green, yellow, red
                 const geojsonLayer = L.geoJSON(data, {
                   style: function (feature: any) {
-                    const randomRisk = Math.floor(Math.random() * 3)
-                    const riskColors = ["#27ae60", "#f39c12", "#e74c3c"] // green, yellow, red
+                    const index = riskIndex(feature.properties?.risk_level)
+                    const color = index >= 0 ? riskColors[index] : "#9ca3af"
                     return {
-                      color: riskColors[randomRisk],
+                      color,
                       weight: 2,
-                      fillColor: riskColors[randomRisk],
+                      fillColor: color,
                       fillOpacity: 0.6
                     }
                   },
                   onEachFeature: function (feature: any, layer: any) {
-                    if (feature.properties && feature.properties.DISTRICT) {
+                    const name = feature.properties?.name || feature.properties?.DISTRICT
+                    if (name) {
                       const riskLevels = ["Low", "Medium", "High"]
                       const riskIcons = ["🟢", "🟠", "🔴"]
-                      const riskIndex = Math.floor(Math.random() * 3)
-                      const riskLevel = riskLevels[riskIndex]
-                      const riskIcon = riskIcons[riskIndex]
+                      const index = riskIndex(feature.properties.risk_level)
+                      const riskLabel = index >= 0 ? `${riskIcons[index]} <strong>${riskLevels[index]} Risk</strong>` : '<strong>No prediction yet</strong>'
                       layer.bindPopup(`
                         <div style='text-align: center; padding: 8px; font-family: Inter, sans-serif;'>
-                          <strong style='font-size: 16px; color: #1f2937;'>${feature.properties.DISTRICT}</strong><br>
+                          <strong style='font-size: 16px; color: #1f2937;'>${name}</strong><br>
                           <div style='margin: 8px 0; padding: 4px 8px; background: rgba(59, 130, 246, 0.1); border-radius: 6px; font-size: 14px;'>
-                            ${riskIcon} <strong>${riskLevel} Risk</strong>
+                            ${riskLabel}
                           </div>
                           <small style='color: #6b7280;'>Bihar District</small>
                         </div>